@@ -0,0 +1,259 @@
+# backend/ann_index.py
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib  # Optional: pip install hnswlib
+except ImportError:
+    hnswlib = None
+
+
+class ANNBackend:
+    """
+    Approximate nearest-neighbour structure over the rows of FlightVectorIndex.matrix.
+
+    Rows are pre-normalized, so inner product == cosine similarity. Row numbers are
+    the labels, which lets the exact matrix and the ANN structure share flight_ids/summaries.
+    """
+
+    name = "base"
+
+    def build(self, matrix: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def add(self, vectors: np.ndarray, start_row: int) -> None:
+        """Indexes new rows appended at start_row, start_row + 1, ..."""
+        raise NotImplementedError
+
+    def update(self, row: int, vector: np.ndarray) -> None:
+        """Re-indexes a row whose vector was replaced in place."""
+        raise NotImplementedError
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (rows, scores) for up to k candidates, best first."""
+        raise NotImplementedError
+
+    def save(self, directory: str) -> None:
+        raise NotImplementedError
+
+    def load(self, directory: str, matrix: np.ndarray) -> bool:
+        """Restores a saved structure for `matrix`. Returns False if nothing usable is on disk."""
+        raise NotImplementedError
+
+    def get_params(self) -> Dict:
+        return {}
+
+
+class IVFBackend(ANNBackend):
+    """
+    Inverted-file index in plain NumPy: spherical k-means centroids, one list of rows per centroid.
+    A query only scores the rows in its `nprobe` closest lists - raise nprobe for recall, lower it for latency.
+    """
+
+    name = "ivf"
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, train_sample: int = 20000, iterations: int = 10, seed: int = 0):
+        self.nlist = nlist  # 0 = pick sqrt(n) at build time
+        self.nprobe = nprobe
+        self.train_sample = train_sample
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(0, dtype=np.int32)  # row -> list id
+        self.lists = []  # list id -> np.ndarray of rows
+        self.trained_size = 0
+
+    def _train(self, matrix: np.ndarray) -> None:
+        n = matrix.shape[0]
+        nlist = self.nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+
+        sample = matrix
+        if n > self.train_sample:
+            sample = matrix[rng.choice(n, self.train_sample, replace=False)]
+
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[c] = centroid / norm if norm else centroid
+        self.centroids = centroids.astype(np.float32)
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _rebuild_lists(self) -> None:
+        order = np.argsort(self.assignments, kind="stable")
+        bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+
+    def build(self, matrix: np.ndarray) -> None:
+        if matrix.shape[0] == 0:
+            self.centroids, self.assignments, self.lists, self.trained_size = None, np.zeros(0, dtype=np.int32), [], 0
+            return
+        self._train(matrix)
+        self.assignments = self._assign(matrix)
+        self.trained_size = matrix.shape[0]
+        self._rebuild_lists()
+
+    def add(self, vectors: np.ndarray, start_row: int) -> None:
+        if self.centroids is None:
+            return
+        new = self._assign(vectors)
+        self.assignments = np.concatenate([self.assignments, new])
+        for offset, c in enumerate(new):
+            self.lists[c] = np.append(self.lists[c], start_row + offset)
+
+    def update(self, row: int, vector: np.ndarray) -> None:
+        if self.centroids is None:
+            return
+        old, new = self.assignments[row], self._assign(vector.reshape(1, -1))[0]
+        if old != new:
+            self.assignments[row] = new
+            self.lists[old] = self.lists[old][self.lists[old] != row]
+            self.lists[new] = np.append(self.lists[new], row)
+
+    def needs_retrain(self, size: int) -> bool:
+        # Centroids drift out of date once the corpus has doubled since training
+        return self.centroids is None or size > 2 * self.trained_size
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, k: int):
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([self.lists[c] for c in probes])
+        if rows.size == 0:
+            return rows, np.zeros(0, dtype=np.float32)
+        scores = matrix[rows] @ query
+        k = min(k, rows.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
+
+    def save(self, directory: str) -> None:
+        np.savez(
+            os.path.join(directory, "ivf.npz"),
+            centroids=self.centroids, assignments=self.assignments, trained_size=self.trained_size
+        )
+
+    def load(self, directory: str, matrix: np.ndarray) -> bool:
+        path = os.path.join(directory, "ivf.npz")
+        if not os.path.exists(path):
+            return False
+        data = np.load(path)
+        self.centroids = data["centroids"]
+        self.assignments = data["assignments"]
+        self.trained_size = int(data["trained_size"])
+        self._rebuild_lists()
+        return True
+
+    def get_params(self) -> Dict:
+        return {"nlist": 0 if self.centroids is None else len(self.centroids), "nprobe": self.nprobe}
+
+
+class HNSWBackend(ANNBackend):
+    """
+    Graph index backed by hnswlib. `ef_search` is the recall/latency knob.
+    """
+
+    name = "hnsw"
+
+    def __init__(self, m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        if hnswlib is None:
+            raise ImportError("hnswlib is not installed - pip install hnswlib or use VECTOR_INDEX_BACKEND=ivf")
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index = None
+
+    def _new_index(self, dim: int, capacity: int):
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.init_index(max_elements=max(capacity, 1), ef_construction=self.ef_construction, M=self.m)
+        index.set_ef(self.ef_search)
+        return index
+
+    def build(self, matrix: np.ndarray) -> None:
+        if matrix.shape[0] == 0:
+            self.index = None
+            return
+        self.index = self._new_index(matrix.shape[1], matrix.shape[0] * 2)
+        self.index.add_items(matrix, np.arange(matrix.shape[0]))
+
+    def add(self, vectors: np.ndarray, start_row: int) -> None:
+        if self.index is None:
+            return
+        needed = start_row + vectors.shape[0]
+        if needed > self.index.get_max_elements():
+            self.index.resize_index(needed * 2)
+        self.index.add_items(vectors, np.arange(start_row, needed))
+
+    def update(self, row: int, vector: np.ndarray) -> None:
+        if self.index is not None:
+            # Re-adding an existing label replaces its vector
+            self.index.add_items(vector.reshape(1, -1), np.array([row]))
+
+    def needs_retrain(self, size: int) -> bool:
+        return self.index is None
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, k: int):
+        k = min(k, self.index.get_current_count())
+        self.index.set_ef(max(self.ef_search, k))
+        labels, distances = self.index.knn_query(query.reshape(1, -1), k=k)
+        # hnswlib "ip" distance is 1 - inner product
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def save(self, directory: str) -> None:
+        if self.index is not None:
+            self.index.save_index(os.path.join(directory, "hnsw.bin"))
+
+    def load(self, directory: str, matrix: np.ndarray) -> bool:
+        path = os.path.join(directory, "hnsw.bin")
+        if not os.path.exists(path):
+            return False
+        self.index = self._new_index(matrix.shape[1], 1)
+        self.index.load_index(path, max_elements=matrix.shape[0] * 2)
+        self.index.set_ef(self.ef_search)
+        return True
+
+    def get_params(self) -> Dict:
+        return {"M": self.m, "ef_construction": self.ef_construction, "ef_search": self.ef_search}
+
+
+def create_ann_backend(name: str, **params) -> Optional[ANNBackend]:
+    """
+    Builds the ANN backend named in settings.VECTOR_INDEX_BACKEND.
+
+    Args:
+        name: "exact" (no ANN, brute force only), "ivf" or "hnsw"
+        **params: Backend-specific tuning knobs
+
+    Returns:
+        ANNBackend or None for exact search
+    """
+    if name == "exact":
+        return None
+    if name == "ivf":
+        return IVFBackend(**params)
+    if name == "hnsw":
+        return HNSWBackend(**params)
+    raise ValueError(f"Unknown vector index backend: {name}")
+
+
+def write_meta(directory: str, meta: Dict) -> None:
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def read_meta(directory: str) -> Optional[Dict]:
+    path = os.path.join(directory, "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
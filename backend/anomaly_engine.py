@@ -0,0 +1,197 @@
+# backend/anomaly_engine.py
+from typing import Dict, List
+
+import numpy as np
+
+# Reference approach speeds (Vref, knots) by aircraft type substring; DEFAULT_VREF otherwise
+VREF_KNOTS = {
+    "747": 150,
+    "777": 145,
+    "737": 135,
+    "A330": 140,
+    "A320": 130,
+    "Q400": 120,
+    "DHC-8": 120,
+}
+DEFAULT_VREF = 130
+
+# Rule thresholds - deliberately conservative, these gate whether the LLM is called at all
+THRESHOLDS = {
+    "approach_agl_ft": 3000,  # speed/configuration rules only apply below this height
+    "airborne_agl_ft": 50,  # below this (or gear down under taxi speed) the aircraft is on the ground
+    "taxi_speed_knots": 40,
+    "sink_rate_fpm": [(500, 1000), (1000, 1500), (2500, 2500)],  # (below AGL ft, max sink fpm)
+    "vref_margin_knots": 5,
+    "terrain_warning_ft": 1000,
+    "terrain_critical_ft": 500,
+    "engine_asymmetry_pct": 15,
+    "gear_up_agl_ft": 1000,
+    "altimeter_disagreement_ft": 200,
+}
+
+# Warning strings that mean the radio altimeter itself is suspect
+ALTIMETER_WARNING_KEYWORDS = ("altimeter", "radio alt")
+# Stall warner / stick shaker (COLGAN3407, AF447)
+STALL_WARNING_KEYWORDS = ("stall", "stick shaker")
+# Airspeed the crew can't trust, e.g. iced pitot tubes (AF447)
+UNRELIABLE_AIRSPEED_KEYWORDS = ("unreliable airspeed", "unreliable speed", "airspeed disagree", "ias disagree", "pitot")
+
+# Returned instead of an LLM answer when every rule passes
+NOMINAL_MESSAGE = "✅ No anomalies detected - all monitored parameters within limits. Continue normal operations and monitoring."
+
+_stats = {"evaluations": 0, "anomalous": 0, "llm_calls_skipped": 0}
+
+
+def vref_for(aircraft_type: str) -> float:
+    aircraft_type = aircraft_type or ""
+    for key, vref in VREF_KNOTS.items():
+        if key in aircraft_type:
+            return vref
+    return DEFAULT_VREF
+
+
+def _column(documents: List[Dict], section: str, field: str) -> np.ndarray:
+    # Missing / None values become NaN, and every comparison against NaN is False (rule doesn't fire)
+    return np.array([
+        np.nan if (value := (doc.get(section) or {}).get(field)) is None else value
+        for doc in documents
+    ], dtype=float)
+
+
+def _warning_text(warning) -> str:
+    # "STALL_WARNING" and "Stall Warning" are the same warning
+    return str(warning).lower().replace("_", " ")
+
+
+def _has_warning(warnings: List[str], keywords) -> bool:
+    return any(keyword in warning for warning in warnings for keyword in keywords)
+
+
+def _anomaly(code: str, severity: str, message: str, value, threshold) -> Dict:
+    return {"code": code, "severity": severity, "message": message,
+            "value": None if value is None else round(float(value), 1),
+            "threshold": None if threshold is None else round(float(threshold), 1)}
+
+
+def detect_batch(documents: List[Dict]) -> List[List[Dict]]:
+    """
+    Runs every rule over a batch of FlightData documents at once.
+
+    Each field is pulled into a NumPy array and every rule is a single vectorized
+    comparison, so a batch costs about the same as one sample.
+
+    Args:
+        documents: FlightData dicts (model_dump() or MongoDB documents)
+
+    Returns:
+        One list of anomalies per document (empty list = nominal). Each anomaly is
+        {"code", "severity" ("warning" / "critical"), "message", "value", "threshold"}
+    """
+    if not documents:
+        return []
+
+    altitude = _column(documents, "location", "altitude_ft")
+    airspeed = _column(documents, "speed", "airspeed_knots")
+    vertical_speed = _column(documents, "speed", "vertical_speed_fpm")
+    engine_1 = _column(documents, "engine", "engine_1_rpm")
+    engine_2 = _column(documents, "engine", "engine_2_rpm")
+    terrain = _column(documents, "environment", "terrain_proximity_ft")
+    systems = [doc.get("aircraft_systems") or {} for doc in documents]
+    gear_up = np.array([str(s.get("landing_gear_status", "")).upper() == "UP" for s in systems])
+    gear_down = np.array([str(s.get("landing_gear_status", "")).upper() == "DOWN" for s in systems])
+    autopilot = np.array([bool(s.get("autopilot_engaged")) for s in systems])
+    warnings = [[_warning_text(warning) for warning in s.get("warnings") or []] for s in systems]
+    altimeter_warning = np.array([_has_warning(w, ALTIMETER_WARNING_KEYWORDS) for w in warnings])
+    vref = np.array([vref_for(doc.get("aircraft_type")) for doc in documents], dtype=float)
+
+    # Height above ground: radio altimeter (terrain proximity) when reported, else altitude
+    agl = np.where(np.isnan(terrain), altitude, terrain)
+    # Parked, taxiing or rolling out: Vref and terrain clearance don't apply on the ground
+    on_ground = (agl < THRESHOLDS["airborne_agl_ft"]) | (gear_down & (airspeed < THRESHOLDS["taxi_speed_knots"]))
+    on_approach = ~on_ground & (agl < THRESHOLDS["approach_agl_ft"])
+    sink = -vertical_speed
+
+    # Sink rate limit by height band (GPWS "excessive descent rate" style)
+    sink_limit = np.full(len(documents), np.nan)
+    for below_ft, max_sink in reversed(THRESHOLDS["sink_rate_fpm"]):
+        sink_limit = np.where(agl < below_ft, max_sink, sink_limit)
+
+    low_speed_limit = vref - THRESHOLDS["vref_margin_knots"]
+    asymmetry = np.abs(engine_1 - engine_2)
+    altimeter_gap = terrain - altitude  # radio height can't exceed altitude above sea level
+
+    rules = [
+        ("excessive_sink_rate", sink > sink_limit,
+         np.where(agl < THRESHOLDS["terrain_critical_ft"], "critical", "warning"),
+         "Sink rate {value:.0f} fpm exceeds {threshold:.0f} fpm at this height", sink, sink_limit),
+        ("airspeed_below_vref", on_approach & (airspeed < low_speed_limit), "critical",
+         "Airspeed {value:.0f} kt below Vref-{margin} ({threshold:.0f} kt)", airspeed, low_speed_limit),
+        ("terrain_proximity", ~on_ground & (terrain < THRESHOLDS["terrain_warning_ft"]),
+         np.where(terrain < THRESHOLDS["terrain_critical_ft"], "critical", "warning"),
+         "Terrain {value:.0f} ft below aircraft", terrain, np.full(len(documents), THRESHOLDS["terrain_warning_ft"])),
+        ("engine_rpm_asymmetry", asymmetry > THRESHOLDS["engine_asymmetry_pct"], "warning",
+         "Engine RPM split {value:.0f}%", asymmetry, np.full(len(documents), THRESHOLDS["engine_asymmetry_pct"])),
+        ("gear_up_low_altitude", gear_up & (agl < THRESHOLDS["gear_up_agl_ft"]) & (vertical_speed < 0), "critical",
+         "Landing gear UP descending through {value:.0f} ft AGL", agl, np.full(len(documents), THRESHOLDS["gear_up_agl_ft"])),
+        ("radio_altimeter_disagreement",
+         altimeter_warning | (altimeter_gap > THRESHOLDS["altimeter_disagreement_ft"]), "warning",
+         "Radio altimeter disagrees with barometric altitude", altimeter_gap,
+         np.full(len(documents), THRESHOLDS["altimeter_disagreement_ft"])),
+    ]
+
+    results: List[List[Dict]] = [[] for _ in documents]
+    for code, fired, severity, message, values, limits in rules:
+        severities = np.broadcast_to(severity, len(documents))
+        for i in np.flatnonzero(fired):
+            text = message.format(value=values[i], threshold=limits[i], margin=THRESHOLDS["vref_margin_knots"])
+            value = None if np.isnan(values[i]) else values[i]
+            results[i].append(_anomaly(code, str(severities[i]), text, value, limits[i]))
+
+    # The aircraft's own warnings: never treat a sample that is raising one as nominal
+    specific_keywords = ALTIMETER_WARNING_KEYWORDS + STALL_WARNING_KEYWORDS + UNRELIABLE_AIRSPEED_KEYWORDS
+    for i, anomalies in enumerate(results):
+        if _has_warning(warnings[i], STALL_WARNING_KEYWORDS):
+            anomalies.append(_anomaly("stall_warning", "critical", "Stall warning active", None, None))
+        if _has_warning(warnings[i], UNRELIABLE_AIRSPEED_KEYWORDS):
+            anomalies.append(_anomaly("unreliable_airspeed", "critical",
+                                      "Unreliable airspeed - indicated speed and speed-based rules can't be trusted",
+                                      None, None))
+        other = [raw for raw, text in zip(systems[i].get("warnings") or [], warnings[i])
+                 if not any(keyword in text for keyword in specific_keywords)]
+        if other:
+            anomalies.append(_anomaly("aircraft_warning", "warning",
+                                      f"Aircraft warnings active: {', '.join(map(str, other))}", None, None))
+
+    # Autopilot still flying the aircraft through any critical condition (THY1951-style)
+    for i, anomalies in enumerate(results):
+        if autopilot[i] and any(a["severity"] == "critical" for a in anomalies):
+            anomalies.append(_anomaly("autopilot_engaged_in_anomaly", "warning",
+                                      "Autopilot engaged during a critical condition - verify automation mode",
+                                      None, None))
+
+    _stats["evaluations"] += len(documents)
+    _stats["anomalous"] += sum(1 for anomalies in results if anomalies)
+    return results
+
+
+def detect(document: Dict) -> List[Dict]:
+    """Anomalies for a single FlightData document (empty list = nominal)."""
+    return detect_batch([document])[0]
+
+
+def describe_anomalies(anomalies: List[Dict]) -> str:
+    """Turns anomalies into the anomaly_description text the LLM chains expect, most severe first."""
+    ordered = sorted(anomalies, key=lambda a: a["severity"] != "critical")
+    return "; ".join(f"{a['severity'].upper()}: {a['message']}" for a in ordered)
+
+
+def should_call_llm(anomalies: List[Dict], short_circuit: bool = True) -> bool:
+    """False when the sample is nominal and short-circuiting is on; counts the skipped LLM calls."""
+    if anomalies or not short_circuit:
+        return True
+    _stats["llm_calls_skipped"] += 1
+    return False
+
+
+def get_stats() -> Dict:
+    return dict(_stats)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: building the prompt | llm | parser chain on every chat request vs the ChainRegistry.
+
+Only the per-request chain setup is measured (no LLM call), offline:
+    MONGO_URI=mongodb://x DB_NAME=t python benchmarks/bench_chain_registry.py --requests 500
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from chain_registry import ChainRegistry, chain_profile
+from router_utils import chat_chain_registry
+
+FLIGHTS = ["KAL801", "AAR214", "AF447", "COLGAN3407", "THY1951"]
+
+
+def rebuild_per_request(flight_id, intent):
+    # What get_flight_specific_chain did before the registry: a fresh chain every call
+    return chat_chain_registry.builders[intent](chain_profile(flight_id))
+
+
+def bench(label, get_chain, requests):
+    intents = list(chat_chain_registry.builders)
+    calls = [(FLIGHTS[i % len(FLIGHTS)], intents[i % len(intents)]) for i in range(requests)]
+
+    start = time.process_time()
+    for flight_id, intent in calls:
+        get_chain(flight_id, intent)
+    cpu = time.process_time() - start
+
+    tracemalloc.start()
+    for flight_id, intent in calls:
+        get_chain(flight_id, intent)
+    _, peak = tracemalloc.get_traced_memory()
+    allocated = sum(stat.size for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+
+    per_request_us = cpu / requests * 1e6
+    print(f"   {label:<22} {per_request_us:10.1f} µs CPU/request   peak {peak / 1024:8.1f} KiB   retained {allocated / 1024:8.1f} KiB")
+    return per_request_us, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    registry = ChainRegistry(chat_chain_registry.builders)
+    built = registry.warm_up()
+    print(f"🔧 Prebuilt {built} chains in {registry.get_stats()['build_seconds'] * 1000:.1f} ms")
+
+    print(f"📊 {args.requests} chat requests across {len(FLIGHTS)} flights")
+    rebuilt_cpu, rebuilt_peak = bench("rebuild per request", rebuild_per_request, args.requests)
+    cached_cpu, cached_peak = bench("ChainRegistry.get", registry.get, args.requests)
+    print(f"   ⚡ {rebuilt_cpu / cached_cpu:.0f}x less CPU, {rebuilt_peak / max(cached_peak, 1):.0f}x lower peak allocation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Load test of the chat endpoints with the stub LLM backend: no Ollama, no model.
+
+The app runs in-process behind httpx's ASGI transport, so what is measured is main.py's
+own routing, intent classification, chain lookup, validation and JSON/SSE serialization
+(plus the LLM cache, single-flight and scheduler in front of the stub). MongoDB is not
+touched by these endpoints, so it doesn't need to be running:
+
+    python benchmarks/bench_chat_endpoints.py --requests 2000 --concurrency 32
+    python benchmarks/bench_chat_endpoints.py --first-token-ms 50 --tokens-per-second 40
+
+--url http://127.0.0.1:8000 targets a running server instead (start it with LLM_BACKEND=stub).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+FLIGHTS = ["KAL801", "AAR214", "AF447", "COLGAN3407", "THY1951"]
+MESSAGES = ["What is our current status?", "Where can we divert?", "Check the engine instruments",
+            "Are we clear of terrain?", "Confirm landing gear and flaps"]
+
+
+def make_request(i, repeat):
+    # Unique messages by default, so every request misses the LLM cache and reaches the stub
+    flight_id = FLIGHTS[i % len(FLIGHTS)]
+    message = MESSAGES[i % len(MESSAGES)] + ("" if repeat else f" (#{i})")
+    kind = i % 5
+    if kind == 0:
+        return "status_update", "POST", "/chat/status_update/", {"json": {"flight_id": flight_id, "message": message}}
+    if kind == 1:
+        return "divert_airport", "POST", "/chat/divert_airport/", {"json": {"flight_id": flight_id, "message": message}}
+    if kind == 2:
+        return "system_status", "POST", "/chat/system_status/", {"json": {"flight_id": flight_id, "message": message}}
+    if kind == 3:
+        return "copilot_chat", "POST", "/copilot_chat/", {"params": {"question": message}}
+    return "status_update_stream", "POST", "/chat/status_update/stream", {"json": {"flight_id": flight_id, "message": message}}
+
+
+async def run_load(client, requests, concurrency, repeat, first=0):
+    latencies = {}
+    errors = 0
+    next_request = iter(range(first, first + requests))
+
+    async def worker():
+        nonlocal errors
+        for i in next_request:
+            name, method, path, kwargs = make_request(i, repeat)
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            await response.aread()
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(elapsed, latencies, errors, requests):
+    print(f"📊 {requests} requests in {elapsed:.2f}s = {requests / elapsed:,.0f} req/s ({errors} non-200)")
+    for name, values in sorted(latencies.items()):
+        print(f"   {name:<22} n={len(values):5d}   p50 {statistics.median(values) * 1000:7.2f} ms"
+              f"   p95 {percentile(values, 0.95) * 1000:7.2f} ms   max {max(values) * 1000:7.2f} ms")
+
+
+async def main_async(args):
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60.0)
+        app_main = None
+    else:
+        import main as app_main  # settings are read from the environment set below
+        transport = httpx.ASGITransport(app=app_main.app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0)
+
+    # The endpoints print every request; keep that out of the terminal (not out of the timing)
+    output = contextlib.redirect_stdout(io.StringIO()) if args.quiet else contextlib.nullcontext()
+    async with client:
+        with output:
+            await run_load(client, min(args.requests, 50), args.concurrency, args.repeat, first=args.requests)  # warm-up
+            elapsed, latencies, errors = await run_load(client, args.requests, args.concurrency, args.repeat)
+        report(elapsed, latencies, errors, args.requests)
+        stats = (await client.get("/stats/")).json()
+
+    scheduler = stats.get("llm_scheduler", {})
+    single_flight = stats.get("llm_single_flight") or {}
+    print(f"   🔧 LLM backend: {stats.get('llm_client', {}).get('backend')}, "
+          f"{stats.get('llm_client', {}).get('requests')} generations, "
+          f"scheduler concurrency {scheduler.get('concurrency')}, "
+          f"{single_flight.get('coalesced', 0)} calls coalesced")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--first-token-ms", type=float, default=0.0, help="stub latency before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="stub token rate (0 = all at once)")
+    parser.add_argument("--llm-concurrency", type=int, default=None,
+                        help="LLM scheduler slots (defaults to --concurrency, so the queue isn't what's measured)")
+    parser.add_argument("--repeat", action="store_true", help="repeat the same messages so the LLM cache answers")
+    parser.add_argument("--url", default=None, help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--verbose", dest="quiet", action="store_false", help="show the endpoints' request logging")
+    args = parser.parse_args()
+
+    # Settings come from the environment, so this has to happen before main is imported
+    os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:27017")
+    os.environ.setdefault("DB_NAME", "flight_safety_bench")
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["LLM_STUB_FIRST_TOKEN_SECONDS"] = str(args.first_token_ms / 1000)
+    os.environ["LLM_STUB_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["LLM_CONCURRENCY"] = str(args.llm_concurrency or args.concurrency)
+
+    print(f"🚀 {args.requests} chat requests, {args.concurrency} concurrent, stub LLM "
+          f"({args.first_token_ms:.0f} ms first token, {args.tokens_per_second or 'unlimited'} tokens/s)")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
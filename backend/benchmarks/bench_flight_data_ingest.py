@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-sample POST /flight_data/ vs batched POST /flight_data/batch.
+
+Start the backend first:  cd backend && uvicorn main:app
+Then run:                 python benchmarks/bench_flight_data_ingest.py --samples 2000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+API_BASE_URL = "http://127.0.0.1:8000"
+
+
+def make_samples(count, flight_id="BENCH_INGEST"):
+    start = datetime.utcnow()
+    return [
+        {
+            "timestamp": (start + timedelta(milliseconds=100 * i)).isoformat() + "Z",
+            "flight_id": flight_id,
+            "aircraft_type": "Boeing 747-300",
+            "pilot_id": "BENCH",
+            "location": {"latitude": 13.48, "longitude": 144.79, "altitude_ft": 3000 - i * 0.5},
+            "speed": {"airspeed_knots": 160, "vertical_speed_fpm": -900},
+            "engine": {"engine_1_rpm": 72, "engine_2_rpm": 71},
+            "aircraft_systems": {"landing_gear_status": "DOWN", "flap_setting": "30", "autopilot_engaged": False},
+            "environment": {"terrain_proximity_ft": 1200, "precipitation": "RAIN"}
+        }
+        for i in range(count)
+    ]
+
+
+async def bench_single(client, samples):
+    start = time.perf_counter()
+    for sample in samples:
+        response = await client.post(f"{API_BASE_URL}/flight_data/", json=sample)
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def bench_batch_json(client, samples, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(samples), batch_size):
+        response = await client.post(f"{API_BASE_URL}/flight_data/batch", json=samples[i:i + batch_size])
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def bench_batch_ndjson(client, samples):
+    body = "\n".join(json.dumps(sample) for sample in samples)
+    start = time.perf_counter()
+    response = await client.post(
+        f"{API_BASE_URL}/flight_data/batch",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare single vs batch telemetry ingest throughput")
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    samples = make_samples(args.samples)
+    async with httpx.AsyncClient(timeout=120.0) as client:
+        single = await bench_single(client, samples)
+        batch = await bench_batch_json(client, samples, args.batch_size)
+        ndjson = await bench_batch_ndjson(client, samples)
+
+    print("--- Telemetry Ingest Benchmark ---")
+    print(f"Samples: {args.samples}")
+    print(f"Single POST /flight_data/:        {args.samples / single:10.1f} samples/s")
+    print(f"Batch JSON (batch={args.batch_size}):         {args.samples / batch:10.1f} samples/s  ({single / batch:.1f}x)")
+    print(f"Batch NDJSON (one stream):        {args.samples / ndjson:10.1f} samples/s  ({single / ndjson:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: the old serialize_object_id + FastAPI jsonable_encoder path vs MongoJSONResponse.
+
+Runs offline on synthetic telemetry documents:
+    python benchmarks/bench_response_encoding.py --page-size 5000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from mongo_json import MongoJSONResponse
+
+START = datetime(1997, 8, 6, 15, 40)
+
+
+def make_doc(i, warnings=20):
+    return {
+        "_id": ObjectId(),
+        "timestamp": START + timedelta(milliseconds=100 * i),
+        "flight_id": "KAL801",
+        "aircraft_type": "Boeing 747-300",
+        "pilot_id": "P1",
+        "location": {"latitude": 13.48, "longitude": 144.79, "altitude_ft": 3000 - i * 0.5},
+        "speed": {"airspeed_knots": 160.0, "groundspeed_knots": 158.0, "vertical_speed_fpm": -900.0},
+        "engine": {"engine_1_rpm": 72.0, "engine_2_rpm": 71.0, "fuel_flow_gph": 1800.0},
+        "aircraft_systems": {"landing_gear_status": "DOWN", "flap_setting": "30", "autopilot_engaged": False,
+                             "warnings": [f"GPWS_{w}" for w in range(warnings)]},
+        "environment": {"wind_speed_knots": 12.0, "precipitation": "RAIN", "terrain_proximity_ft": 1200.0},
+        "pilot_actions": {"throttle_percent": 55.0, "pitch_deg": 2.5, "roll_deg": 0.0, "yaw_deg": 0.0}
+    }
+
+
+def serialize_object_id(data):
+    # The recursive pre-pass main.py used before MongoJSONResponse, kept here for comparison
+    if isinstance(data, dict):
+        if "_id" in data and isinstance(data["_id"], ObjectId):
+            data["_id"] = str(data["_id"])
+        for key, value in data.items():
+            data[key] = serialize_object_id(value)
+    elif isinstance(data, list):
+        data = [serialize_object_id(item) for item in data]
+    return data
+
+
+def legacy_render(content):
+    # serialize_object_id, then what FastAPI does with a plain dict return value
+    encoded = jsonable_encoder(serialize_object_id(content))
+    return json.dumps(encoded, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def new_render(content):
+    return MongoJSONResponse(content).body
+
+
+def bench(label, fn, make_content, runs):
+    timings = []
+    for _ in range(runs):
+        content = make_content()  # fresh copy: the legacy path mutates its input
+        start = time.perf_counter()
+        fn(content)
+        timings.append(time.perf_counter() - start)
+    best = min(timings) * 1000
+    print(f"   {label:<28} best {best:8.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = {
+        "single large document": lambda: make_doc(0, warnings=2000),
+        f"history page ({args.page_size} samples)": lambda: {
+            "flight_id": "KAL801", "samples": [make_doc(i) for i in range(args.page_size)]
+        },
+    }
+    for name, make_content in cases.items():
+        print(f"📊 {name}")
+        legacy = bench("serialize_object_id + encoder", legacy_render, make_content, args.runs)
+        new = bench("MongoJSONResponse", new_render, make_content, args.runs)
+        print(f"   ⚡ {legacy / new:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: regular flight_data collection vs its time-series copy.
+
+Compares disk footprint (collStats) and the latency of a one-flight time-range query.
+
+Migrate first:  cd backend && python migrate_flight_data_timeseries.py
+Then run:       python benchmarks/bench_timeseries.py --flight-id KAL801
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from database import db
+
+
+async def collection_size(name):
+    stats = await db.command("collStats", name)
+    return {
+        "count": stats.get("count", 0),
+        "storage_kb": round(stats.get("storageSize", 0) / 1024, 1),
+        "index_kb": round(stats.get("totalIndexSize", 0) / 1024, 1),
+    }
+
+
+async def time_range_query(collection, flight_field, flight_id, minutes, runs):
+    newest = await collection.find_one({flight_field: flight_id}, sort=[("timestamp", -1)])
+    if newest is None:
+        return None
+    query = {
+        flight_field: flight_id,
+        "timestamp": {"$gte": newest["timestamp"] - timedelta(minutes=minutes), "$lte": newest["timestamp"]}
+    }
+
+    timings, rows = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows = len(await collection.find(query).sort("timestamp", 1).to_list(length=None))
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"rows": rows, "median_ms": round(statistics.median(timings), 2), "max_ms": round(max(timings), 2)}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regular", default="flight_data")
+    parser.add_argument("--timeseries", default="flight_data_ts")
+    parser.add_argument("--flight-id", default="KAL801")
+    parser.add_argument("--minutes", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for label, name, flight_field in (
+        ("regular", args.regular, "flight_id"),
+        ("time-series", args.timeseries, "meta.flight_id"),
+    ):
+        size = await collection_size(name)
+        query = await time_range_query(db[name], flight_field, args.flight_id, args.minutes, args.runs)
+        print(f"📊 {label:<12} {name}: {size['count']} docs, storage {size['storage_kb']} KB, indexes {size['index_kb']} KB")
+        if query is None:
+            print(f"   ⚠️ no samples for {args.flight_id}")
+        else:
+            print(f"   ⏱️ last {args.minutes} min of {args.flight_id}: {query['rows']} rows, "
+                  f"median {query['median_ms']} ms, max {query['max_ms']} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
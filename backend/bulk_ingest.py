@@ -0,0 +1,200 @@
+# backend/bulk_ingest.py => Bulk crash ingest: batched encoding + unordered bulk_write upserts.
+#
+# Usage:
+#   python bulk_ingest.py crashes.jsonl
+#   python bulk_ingest.py crashes.csv --batch-size 256 --chunk-size 2000
+#
+# Each record has the same shape store_crash_flight_data() expects:
+#   flight_id, title, date, location, summary, passengers, fatalities, survivors,
+#   primary_cause, key_factors, how_ai_copilot_could_help
+# In CSV files key_factors is a single column separated by ";".
+
+import argparse
+import asyncio
+import csv
+import json
+import time
+from typing import Dict, Iterator, List
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from database import db
+from embedding_cache import encode_with_cache
+from search_utils import build_crash_summary, build_crash_document
+
+INT_FIELDS = ("passengers", "fatalities", "survivors")
+# Set on a placeholder record for a row that couldn't be parsed; encode_chunk counts it as invalid
+PARSE_ERROR_KEY = "_parse_error"
+
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"flight_id": None, PARSE_ERROR_KEY: f"line {line_number}: invalid JSON ({e.msg})"}
+                continue
+            if not isinstance(record, dict):
+                yield {"flight_id": None, PARSE_ERROR_KEY: f"line {line_number}: expected a JSON object"}
+                continue
+            yield record
+
+
+def read_csv(path: str) -> Iterator[Dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        for row_number, row in enumerate(csv.DictReader(f), 2):  # row 1 is the header
+            row["key_factors"] = [factor.strip() for factor in (row.get("key_factors") or "").split(";") if factor.strip()]
+            try:
+                for field in INT_FIELDS:
+                    if row.get(field, "") not in ("", None):
+                        row[field] = int(row[field])
+            except ValueError:
+                yield {"flight_id": row.get("flight_id"),
+                       PARSE_ERROR_KEY: f"row {row_number}: {field} is not an integer ({row[field]!r})"}
+                continue
+            yield row
+
+
+def read_records(path: str, file_format: str = None) -> Iterator[Dict]:
+    """Streams crash records from a JSONL or CSV file (format inferred from the extension)."""
+    file_format = file_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    return read_csv(path) if file_format == "csv" else read_jsonl(path)
+
+
+def chunked(records: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def encode_chunk(records: List[Dict], batch_size: int):
+    """
+    Embeds one chunk of records in batches and builds their upsert operations.
+    Summaries already in the embedding cache skip the encoder.
+
+    Returns:
+        (operations, errors, hits, misses): UpdateOne upserts, a list of {flight_id, error}
+        for bad records, and embedding cache hit/miss counts
+    """
+    valid, summaries, errors = [], [], []
+    for record in records:
+        if PARSE_ERROR_KEY in record:
+            errors.append({"flight_id": record.get("flight_id"), "error": record[PARSE_ERROR_KEY]})
+            continue
+        try:
+            summaries.append(build_crash_summary(record))
+            valid.append(record)
+        except KeyError as e:
+            errors.append({"flight_id": record.get("flight_id"), "error": f"missing field {e}"})
+
+    if not valid:
+        return [], errors, 0, 0
+
+    vectors, hits, misses = await encode_with_cache(summaries, batch_size=batch_size)
+
+    operations = []
+    for record, summary, vector in zip(valid, summaries, vectors):
+        try:
+            doc = build_crash_document(record, vector, summary)
+        except KeyError as e:
+            errors.append({"flight_id": record.get("flight_id"), "error": f"missing field {e}"})
+            continue
+        operations.append(UpdateOne({"flight_id": doc["flight_id"]}, {"$set": doc}, upsert=True))
+    return operations, errors, hits, misses
+
+
+async def write_chunk(collection, operations: List[UpdateOne]) -> Dict:
+    """Writes one chunk with a single unordered bulk_write so one bad row doesn't stop the rest."""
+    if not operations:
+        return {"upserted": 0, "modified": 0, "write_errors": 0}
+    try:
+        result = await collection.bulk_write(operations, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+    return {
+        "upserted": details.get("nUpserted", 0),
+        "modified": details.get("nModified", 0),
+        "write_errors": len(details.get("writeErrors", []))
+    }
+
+
+async def bulk_ingest(path: str, batch_size: int = 128, chunk_size: int = 1000, file_format: str = None) -> Dict:
+    """
+    Ingests crash records from a file into flight_vectors.
+
+    Encoding of the next chunk runs in a worker thread while the previous chunk's
+    bulk_write is in flight, so the encoder and MongoDB overlap. Unchanged summaries
+    are served from the embedding cache and never reach the encoder.
+
+    Returns:
+        Dict: Counters plus elapsed seconds and records per second
+    """
+    collection = db["flight_vectors"]
+    totals = {"records": 0, "upserted": 0, "modified": 0, "invalid": 0, "write_errors": 0, "cache_hits": 0, "cache_misses": 0}
+    start = time.perf_counter()
+    pending_write = None
+
+    for chunk in chunked(read_records(path, file_format), chunk_size):
+        operations, errors, hits, misses = await encode_chunk(chunk, batch_size)
+        totals["cache_hits"] += hits
+        totals["cache_misses"] += misses
+        for error in errors:
+            print(f"⚠️ Skipped {error['flight_id']}: {error['error']}")
+
+        if pending_write is not None:
+            written = await pending_write
+            for key in ("upserted", "modified", "write_errors"):
+                totals[key] += written[key]
+        pending_write = asyncio.ensure_future(write_chunk(collection, operations))
+
+        totals["records"] += len(chunk)
+        totals["invalid"] += len(errors)
+        elapsed = time.perf_counter() - start
+        print(f"🔄 {totals['records']} records encoded ({totals['records'] / elapsed:.1f} records/s)")
+
+    if pending_write is not None:
+        written = await pending_write
+        for key in ("upserted", "modified", "write_errors"):
+            totals[key] += written[key]
+
+    elapsed = time.perf_counter() - start
+    totals["seconds"] = round(elapsed, 2)
+    totals["records_per_second"] = round(totals["records"] / elapsed, 1) if elapsed else 0.0
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk ingest crash records into flight_vectors")
+    parser.add_argument("path", help="JSONL or CSV file of crash records")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None, help="Override format detection")
+    parser.add_argument("--batch-size", type=int, default=128, help="Sentences per model.encode batch")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Records per bulk_write")
+    args = parser.parse_args()
+
+    try:
+        totals = asyncio.run(bulk_ingest(args.path, args.batch_size, args.chunk_size, args.format))
+    except PyMongoError as e:
+        print(f"❌ MongoDB error during bulk ingest: {e}")
+        return
+
+    print("=" * 60)
+    print(f"✅ Ingested {totals['records']} records in {totals['seconds']}s ({totals['records_per_second']} records/s)")
+    print(f"   Upserted: {totals['upserted']}, Modified: {totals['modified']}, "
+          f"Invalid: {totals['invalid']}, Write errors: {totals['write_errors']}")
+    print(f"   Embedding cache: {totals['cache_hits']} hits, {totals['cache_misses']} misses")
+    print("   The API loads the similarity index at startup - restart it to serve the new records.")
+
+
+if __name__ == "__main__":
+    main()
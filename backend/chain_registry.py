@@ -0,0 +1,62 @@
+# backend/chain_registry.py
+import time
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from flight_profiles import flight_profiles, DEFAULT_PROFILE
+
+
+def chain_profile(flight_id: str) -> str:
+    """Maps a flight ID to the prompt profile its chains are built from (see flight_profiles.json)."""
+    return flight_profiles.profile_for(flight_id)
+
+
+class ChainRegistry:
+    """
+    Builds each (profile, intent) chain once and hands out the same runnable afterwards.
+
+    Prompts take flight_id as a template variable instead of having it baked into an
+    f-string, so one compiled chain serves every flight in a profile. Chains are built
+    lazily on first use, or all at once with warm_up().
+    """
+
+    def __init__(self, builders: Dict[str, Callable[[str], Any]]):
+        self.builders = builders  # intent -> builder(profile) returning a runnable
+        self._chains: Dict[Tuple[str, str], Any] = {}
+        self.hits = 0
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    def get(self, flight_id: str, intent: str) -> Any:
+        key = (chain_profile(flight_id), intent)
+        chain = self._chains.get(key)
+        if chain is not None:
+            self.hits += 1
+            return chain
+        return self._build(*key)
+
+    def _build(self, profile: str, intent: str) -> Any:
+        start = time.perf_counter()
+        chain = self.builders[intent](profile)
+        self.build_seconds += time.perf_counter() - start
+        self.builds += 1
+        self._chains[(profile, intent)] = chain
+        return chain
+
+    def warm_up(self, profiles: Iterable[str] = None) -> int:
+        """Builds every intent for every profile up front. Returns how many chains were built."""
+        profiles = list(profiles or [*flight_profiles.profile_names(), DEFAULT_PROFILE])
+        built = 0
+        for profile in profiles:
+            for intent in self.builders:
+                if (profile, intent) not in self._chains:
+                    self._build(profile, intent)
+                    built += 1
+        return built
+
+    def get_stats(self) -> Dict:
+        return {
+            "chains": len(self._chains),
+            "builds": self.builds,
+            "hits": self.hits,
+            "build_seconds": round(self.build_seconds, 4)
+        }
@@ -0,0 +1,74 @@
+# backend/chat_streaming.py
+import asyncio
+from typing import Any, AsyncIterator, Dict
+
+from event_bus import format_sse
+
+
+async def iter_chain_tokens(chain: Any, inputs: Dict) -> AsyncIterator[str]:
+    """
+    Yields a chain's output as it is generated.
+
+    LangChain runnables stream through astream(). The KAL801 validated chains end in a
+    RunnableLambda - their airport check needs the whole answer - so they come back as a
+    single chunk once validation has run. Plain async callables are awaited the same way.
+    """
+    if hasattr(chain, "astream"):
+        async for token in chain.astream(inputs):
+            if token:
+                yield token
+    else:
+        yield await chain(inputs)
+
+
+async def stream_chat_events(chain: Any, inputs: Dict, fallback: str, intent: str,
+                             timeout: float = 15.0) -> AsyncIterator[bytes]:
+    """
+    SSE frames for one chat answer:
+
+    - "fallback": the deterministic advice, sent before the LLM is even called
+    - "token": each chunk of LLM output as it arrives
+    - "done": {"advice", "complete", "timed_out"} - always the last frame
+
+    The timeout covers the whole generation. When it fires the LLM stream is closed and
+    "done" carries whatever was generated so far (or the fallback if nothing was).
+    """
+    flight_id = inputs.get("flight_id")
+    yield format_sse({"type": "fallback", "flight_id": flight_id, "intent": intent, "advice": fallback})
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    tokens = []
+    timed_out = False
+    error = None
+    generator = iter_chain_tokens(chain, inputs)
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            try:
+                token = await asyncio.wait_for(generator.__anext__(), remaining)
+            except StopAsyncIteration:
+                break
+            tokens.append(token)
+            yield format_sse({"type": "token", "text": token})
+    except asyncio.TimeoutError:
+        timed_out = True
+        print(f"Ollama Gemma stream timed out after {timeout:.0f} seconds for intent: {intent}")
+    except Exception as e:
+        error = str(e)
+        print(f"Error while streaming {intent} advice: {e}")
+    finally:
+        await generator.aclose()
+
+    answer = "".join(tokens)
+    yield format_sse({
+        "type": "done",
+        "flight_id": flight_id,
+        "intent": intent,
+        "advice": answer or fallback,
+        "complete": not timed_out and error is None,
+        "timed_out": timed_out,
+        "error": error
+    })
@@ -1,4 +1,6 @@
 # backend/config.py
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # 1. Class-Based Configuration, 2. Pydantic Settings Pattern
@@ -7,6 +9,116 @@ class Settings(BaseSettings): #Inheritance - Settings inherits from BaseSettings
     MONGO_URI: str  #Type Annotations - str defines expected data types for validation
     DB_NAME: str
 
+    # Telemetry storage: a regular collection, or (opt-in) a MongoDB time-series collection
+    FLIGHT_DATA_COLLECTION: str = "flight_data"
+    FLIGHT_DATA_TIMESERIES: bool = False  # timeField "timestamp", metaField "meta" = {flight_id, aircraft_type}
+    FLIGHT_DATA_TIMESERIES_GRANULARITY: str = "seconds"
+
+    # Sentence embedding model shared by similarity search and crash ingest
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    EMBEDDING_WARMUP_ON_STARTUP: bool = True
+    EMBEDDING_MODEL_VERSION: str = "1"  # bump to invalidate the embedding cache without renaming the model
+    EMBEDDING_CACHE_ENABLED: bool = True  # content-hash -> vector cache in the embedding_cache collection
+
+    # Similarity search index: "exact" (brute force), "ivf" (NumPy inverted file) or "hnsw" (needs hnswlib)
+    VECTOR_INDEX_BACKEND: str = "exact"
+    VECTOR_INDEX_DIR: str = "data/vector_index"  # ANN structure is persisted here
+    VECTOR_INDEX_ANN_MIN_SIZE: int = 1000  # smaller corpora are always brute-forced
+    VECTOR_INDEX_PERSIST_EVERY: int = 100  # upserts between saves of the ANN structure (also saved at shutdown)
+    IVF_NLIST: int = 0  # 0 = sqrt(corpus size)
+    IVF_NPROBE: int = 8  # recall/latency knob for ivf
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = 64  # recall/latency knob for hnsw
+
+    # LRU caches for similarity queries (embeddings and result lists)
+    QUERY_CACHE_SIZE: int = 512
+    QUERY_CACHE_TTL_SECONDS: float = 600.0  # 0 = no expiry
+
+    # Telemetry ingest
+    FLIGHT_DATA_BATCH_CHUNK_SIZE: int = 1000  # samples per insert_many on /flight_data/batch
+    WS_FLUSH_MAX_BATCH: int = 200  # WebSocket ingest: flush after this many frames...
+    WS_FLUSH_INTERVAL_SECONDS: float = 0.25  # ...or this long after the first buffered frame
+    WS_MAX_PENDING_FRAMES: int = 5000  # buffer bound before the socket stops being read
+
+    # Flight history range reads (GET /flight_data/{flight_id}/history)
+    FLIGHT_HISTORY_DEFAULT_LIMIT: int = 500
+    FLIGHT_HISTORY_MAX_LIMIT: int = 5000
+    FLIGHT_EXPORT_BATCH_SIZE: int = 5000  # samples per NDJSON chunk / Arrow record batch on export
+
+    # Latest sample per flight, served without a MongoDB round trip
+    LATEST_STATE_BACKEND: str = "memory"  # "memory" (per process) or "redis" (shared across workers)
+    LATEST_STATE_MAX_AGE_SECONDS: float = 0  # entries older than this fall back to MongoDB; 0 = no bound
+    LATEST_STATE_WARM_ON_STARTUP: bool = True
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Rule-based anomaly engine: skip the LLM entirely when a sample is nominal
+    ANOMALY_SHORT_CIRCUIT: bool = True
+
+    # Per-flight sliding-window trends (ring buffer of recent samples, updated on ingest)
+    TREND_WINDOW_SECONDS: float = 60.0
+    TREND_BUFFER_SIZE: int = 600  # samples kept per flight (60 s at 10 Hz)
+    TREND_EWMA_TAU_SECONDS: float = 5.0
+    TREND_MAX_FLIGHTS: int = 1000
+
+    # LLM backend: "ollama", "openai" (any OpenAI-compatible chat completions server) or "stub"
+    LLM_BACKEND: str = "ollama"
+    OPENAI_BASE_URL: str = "http://localhost:8000/v1"
+    OPENAI_MODEL: str = "gemma-2b"
+    OPENAI_API_KEY: str = ""
+    # Stub backend: canned answer, no model - for load testing the API itself (benchmarks/bench_chat_endpoints.py)
+    LLM_STUB_RESPONSE: str = "Maintain current heading and altitude. Monitor instruments and contact ATC."
+    LLM_STUB_FIRST_TOKEN_SECONDS: float = 0.0
+    LLM_STUB_TOKENS_PER_SECOND: float = 0.0  # 0 = whole answer at once
+
+    # Ollama backend: one shared client with pooled keep-alive connections
+    OLLAMA_BASE_URL: str = "http://localhost:11434"
+    OLLAMA_MODEL: str = "gemma:2b"
+    OLLAMA_MAX_CONNECTIONS: int = 8
+    OLLAMA_KEEPALIVE_EXPIRY_SECONDS: float = 120.0  # idle pooled connections are closed after this
+    OLLAMA_TIMEOUT_SECONDS: float = 120.0
+    OLLAMA_KEEP_ALIVE: str = "30m"  # how long Ollama keeps the model loaded after a request ("" = server default)
+    OLLAMA_KEEP_WARM_INTERVAL_SECONDS: float = 300.0  # ping the model when idle this long; 0 = no pings
+
+    # LLM response cache in front of every chain (exact tier + optional semantic tier)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_SIZE: int = 512  # answers per intent
+    LLM_CACHE_DEFAULT_TTL_SECONDS: float = 60.0  # 0 = no expiry
+    LLM_CACHE_TTLS: Dict[str, float] = {
+        "status_update": 30.0, "system_status": 30.0, "divert_airport": 300.0, "similar_crashes": 3600.0,
+        "risk_explanation": 30.0, "copilot_chat": 600.0
+    }
+    LLM_CACHE_BYPASS_INTENTS: List[str] = ["emergency", "emergency_advisor"]  # safety-critical, always answered fresh
+    LLM_CACHE_SEMANTIC: bool = False  # also reuse answers to near-duplicate questions (MiniLM cosine)
+    LLM_CACHE_SEMANTIC_THRESHOLD: float = 0.92
+    LLM_SINGLE_FLIGHT: bool = True  # concurrent identical LLM calls share one generation
+
+    # LLM scheduler: bounded concurrency, priority lanes by intent (lower = sooner)
+    LLM_CONCURRENCY: int = 1  # Ollama runs one gemma:2b generation at a time by default
+    LLM_PRIORITIES: Dict[str, int] = {
+        "emergency": 0, "emergency_advisor": 0, "divert_airport": 1, "risk_explanation": 1,
+        "status_update": 2, "system_status": 2, "similar_crashes": 3, "copilot_chat": 4,
+        "pushed_advice": 5  # background advice for /flights/{flight_id}/events, behind every interactive call
+    }
+    LLM_QUEUE_DEADLINE_SECONDS: float = 10.0  # must start generating by then, else the fallback is served
+    LLM_GENERATION_TIMEOUT_SECONDS: float = 30.0  # a generation (shared or not) is abandoned after this; 0 = no bound
+
+    # Streaming chat endpoints (/chat/*/stream): overall LLM deadline before the answer is cut off
+    CHAT_TIMEOUT_SECONDS: float = 15.0
+
+    # Server-Sent Events per flight (GET /flights/{flight_id}/events)
+    EVENTS_QUEUE_SIZE: int = 100  # per subscriber; a slow dashboard drops its oldest events
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    EVENTS_LLM_ADVICE: bool = True  # push LLM advice after each new alert state
+
+    # Per-flight prompt grounding, airport whitelists and fallback advice (relative to backend/)
+    FLIGHT_PROFILES_PATH: str = "flight_profiles.json"
+
+    # MongoDB index management
+    ENSURE_INDEXES_ON_STARTUP: bool = True
+    LOG_QUERY_PLANS_ON_STARTUP: bool = True
+    FLIGHT_DATA_TTL_SECONDS: int = 0  # raw telemetry retention; 0 = keep forever
+
     model_config = SettingsConfigDict(env_file="../.env", extra="ignore")
 # Configuration Dictionary - Uses SettingsConfigDict to specify behavior
 # Environment File Loading - Automatically reads from .env file
@@ -13,8 +13,43 @@ client = AsyncIOMotorClient(settings.MONGO_URI)
 db = client[settings.DB_NAME]
 
 
-# Access the flight_data collection
-flight_data_collection = db["flight_data"]
+# Access the flight_data collection (name is configurable so a migrated time-series copy can be swapped in)
+flight_data_collection = db[settings.FLIGHT_DATA_COLLECTION]
+
+# In time-series mode flight_id/aircraft_type are duplicated into the "meta" subdocument (the metaField),
+# which is what MongoDB buckets by. Queries filter on meta.flight_id so they can prune whole buckets.
+FLIGHT_ID_FIELD = "meta.flight_id" if settings.FLIGHT_DATA_TIMESERIES else "flight_id"
+
+
+def flight_filter(flight_id: str) -> dict:
+    # Query filter selecting one flight's telemetry in either storage mode
+    return {FLIGHT_ID_FIELD: flight_id}
+
+
+def add_timeseries_meta(document: dict) -> dict:
+    # Top-level fields stay, so existing readers and responses keep working unchanged
+    document["meta"] = {"flight_id": document.get("flight_id"), "aircraft_type": document.get("aircraft_type")}
+    return document
+
+
+async def ensure_flight_data_collection(name: str = None, timeseries: bool = None):
+    """
+    Creates the telemetry collection as a time-series collection when time-series mode is on.
+    Does nothing if it already exists or time-series mode is off.
+    """
+    name = name or settings.FLIGHT_DATA_COLLECTION
+    timeseries = settings.FLIGHT_DATA_TIMESERIES if timeseries is None else timeseries
+    if not timeseries or name in await db.list_collection_names():
+        return False
+    await db.create_collection(
+        name,
+        timeseries={
+            "timeField": "timestamp",
+            "metaField": "meta",
+            "granularity": settings.FLIGHT_DATA_TIMESERIES_GRANULARITY
+        }
+    )
+    return True
 
 collection = db["crash_flights"] 
 #  Think of this like a SQL table — here you're using "crash_flights" for storing fatal historical incidents.
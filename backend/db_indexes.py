@@ -0,0 +1,155 @@
+# backend/db_indexes.py => Declares the MongoDB indexes the hot queries rely on and verifies them idempotently.
+#
+# Runs at FastAPI startup (ENSURE_INDEXES_ON_STARTUP), or by hand:
+#   python db_indexes.py
+
+import asyncio
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+from config import settings
+from database import db, flight_data_collection, flight_filter, FLIGHT_ID_FIELD
+
+flight_vector_collection = db["flight_vectors"]
+
+# (collection, keys, options) - names are explicit so re-runs recognise their own indexes
+REQUIRED_INDEXES = [
+    # Latest sample per flight: find({"flight_id": ...}).sort("timestamp", -1).limit(1)
+    # (on a time-series collection the flight_id lives in the metaField: meta.flight_id)
+    (flight_data_collection, [(FLIGHT_ID_FIELD, ASCENDING), ("timestamp", DESCENDING)], {"name": f"{FLIGHT_ID_FIELD}_1_timestamp_-1"}),
+    # store_crash_flight_data / bulk_ingest upserts by flight_id
+    (flight_vector_collection, [("flight_id", ASCENDING)], {"name": "flight_id_1"}),
+]
+
+TTL_INDEX_NAME = "timestamp_ttl"
+
+
+def _key_spec(keys) -> List:
+    # index_information() may report directions as floats (1.0), REQUIRED_INDEXES uses ints
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction)
+            for field, direction in keys]
+
+
+async def ensure_index(collection, keys: List, options: Dict) -> str:
+    """
+    Creates an index unless one with the same keys already exists, under any name.
+    Never drops anything: a different index holding the wanted name is reported as a
+    "conflict" for an operator (or the migration script) to resolve.
+    Returns what happened.
+    """
+    existing = await collection.index_information()
+    wanted = _key_spec(keys)
+    for name, info in existing.items():
+        if _key_spec(info["key"]) == wanted:
+            if name != options["name"]:
+                print(f"ℹ️ {collection.name}: using existing index {name} for {options['name']}")
+            return "ok"
+    if options["name"] in existing:
+        print(f"⚠️ {collection.name}: index {options['name']} exists with keys "
+              f"{existing[options['name']]['key']}, expected {keys} - not replacing it at startup")
+        return "conflict"
+    await collection.create_index(keys, **options)
+    return "created"
+
+
+async def ensure_ttl_index(ttl_seconds: int) -> str:
+    """
+    Keeps the optional raw-telemetry retention index in line with FLIGHT_DATA_TTL_SECONDS.
+    0 disables retention and removes the index if it exists.
+    Time-series collections expire whole buckets through the collection's expireAfterSeconds instead.
+    """
+    if settings.FLIGHT_DATA_TIMESERIES:
+        await db.command("collMod", flight_data_collection.name,
+                         expireAfterSeconds=ttl_seconds if ttl_seconds > 0 else "off")
+        return "updated" if ttl_seconds > 0 else "disabled"
+
+    existing = await flight_data_collection.index_information()
+    current = existing.get(TTL_INDEX_NAME)
+
+    if ttl_seconds <= 0:
+        if current is None:
+            return "disabled"
+        await flight_data_collection.drop_index(TTL_INDEX_NAME)
+        return "dropped"
+
+    if current is None:
+        await flight_data_collection.create_index(
+            [("timestamp", ASCENDING)], name=TTL_INDEX_NAME, expireAfterSeconds=ttl_seconds
+        )
+        return "created"
+    if current.get("expireAfterSeconds") != ttl_seconds:
+        # collMod changes the expiry in place instead of rebuilding the index
+        await db.command("collMod", flight_data_collection.name,
+                         index={"name": TTL_INDEX_NAME, "expireAfterSeconds": ttl_seconds})
+        return "updated"
+    return "ok"
+
+
+def summarize_plan(explain: Dict) -> str:
+    """Turns an explain() document into e.g. 'LIMIT > FETCH > IXSCAN(flight_id_1_timestamp_-1)'."""
+    stages = []
+    plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    # Time-series and SBE plans nest the classic plan one level down
+    plan = plan.get("queryPlan", plan)
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage}({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " > ".join(stages)
+
+
+async def log_query_plans() -> Dict[str, str]:
+    """Explains the hot queries and prints their winning plans so collection scans are visible."""
+    sample = await flight_data_collection.find_one({}, {"flight_id": 1})
+    flight_id = sample["flight_id"] if sample else "KAL801"
+
+    plans = {
+        "latest_flight_sample": await flight_data_collection.find(flight_filter(flight_id))
+        .sort("timestamp", -1).limit(1).explain(),
+        "crash_by_flight_id": await flight_vector_collection.find({"flight_id": flight_id}).limit(1).explain(),
+    }
+
+    summaries = {}
+    for name, explain in plans.items():
+        summary = summarize_plan(explain)
+        summaries[name] = summary
+        marker = "⚠️" if "COLLSCAN" in summary else "✅"
+        print(f"{marker} Query plan {name}: {summary}")
+    return summaries
+
+
+async def ensure_indexes() -> Dict[str, str]:
+    """
+    Verifies every required index (and the optional TTL index), creating what's missing.
+    Safe to call on every startup.
+
+    Returns:
+        Dict: index name -> "ok" / "created" / "conflict" / "updated" / "dropped" / "disabled"
+    """
+    results = {}
+    for collection, keys, options in REQUIRED_INDEXES:
+        status = await ensure_index(collection, keys, options)
+        results[f"{collection.name}.{options['name']}"] = status
+
+    results[f"{flight_data_collection.name}.{TTL_INDEX_NAME}"] = await ensure_ttl_index(settings.FLIGHT_DATA_TTL_SECONDS)
+
+    for name, status in results.items():
+        marker = "✅" if status in ("ok", "disabled") else "⚠️" if status == "conflict" else "🔧"
+        print(f"{marker} Index {name}: {status}")
+    return results
+
+
+async def main():
+    try:
+        await ensure_indexes()
+        await log_query_plans()
+    except PyMongoError as e:
+        print(f"❌ MongoDB error while managing indexes: {e}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,7 +1,7 @@
-# backend/embed_all_crashes.py => Batch Embedding Pipeline, a standalone script to batch embed and store 5 historic crash summaries into MongoDB using your embed_and_store_flight_summary() function.
+# backend/embed_all_crashes.py => Batch Embedding Pipeline, a standalone script to batch embed and store 5 historic crash summaries into MongoDB using the batched embed_and_store_flight_summaries() function.
 
 import asyncio #Gives you access to Python's event loop system — required to run asynchronous functions like await.
-from embedding_utils import embed_and_store_flight_summary
+from embedding_utils import embed_and_store_flight_summaries
 
 crashes = [
     {
@@ -51,8 +51,8 @@ crashes = [
 ]
 
 async def embed_all():
-    for crash in crashes:
-        await embed_and_store_flight_summary(crash["flight_id"], crash["summary"])
+    # One batched encode + one bulk_write instead of a model call and insert per crash
+    await embed_and_store_flight_summaries(crashes)
 
 # ✅ After this runs, MongoDB will contain 5 documents, each with:
 # {
@@ -0,0 +1,89 @@
+# backend/embedding_cache.py
+import asyncio
+import hashlib
+from typing import Dict, List, Tuple
+
+from pymongo import UpdateOne
+
+import embedding_service
+from config import settings
+from database import db
+
+# Persistent content-hash -> vector cache, one document per (model, version, text):
+# {"_id": "<model>:<version>:<sha256>", "model": ..., "model_version": ..., "vector": [...]}
+# Changing EMBEDDING_MODEL_NAME or EMBEDDING_MODEL_VERSION makes every old entry a miss.
+embedding_cache_collection = db["embedding_cache"]
+
+_stats = {"hits": 0, "misses": 0}
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(text: str) -> str:
+    return f"{settings.EMBEDDING_MODEL_NAME}:{settings.EMBEDDING_MODEL_VERSION}:{content_hash(text)}"
+
+
+async def encode_with_cache(texts: List[str], batch_size: int = 128) -> Tuple[List[List[float]], int, int]:
+    """
+    Returns one vector per text, only running the encoder for texts not already cached.
+
+    Args:
+        texts: Strings to embed (duplicates are encoded once)
+        batch_size: Passed to model.encode for the misses
+
+    Returns:
+        (vectors, hits, misses): vectors as lists in the same order as texts
+    """
+    keys = [cache_key(text) for text in texts]
+    vectors: Dict[str, List[float]] = {}
+
+    if settings.EMBEDDING_CACHE_ENABLED:
+        cursor = embedding_cache_collection.find({"_id": {"$in": list(set(keys))}}, {"vector": 1})
+        async for doc in cursor:
+            vectors[doc["_id"]] = doc["vector"]
+
+    # Unique texts that still need the encoder
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors:
+            missing.setdefault(key, text)
+
+    if missing:
+        # Encoding is CPU bound, keep it off the event loop
+        encoded = await asyncio.to_thread(embedding_service.encode, list(missing.values()), batch_size=batch_size)
+        new_entries = {key: vector.tolist() for key, vector in zip(missing.keys(), encoded)}
+        vectors.update(new_entries)
+
+        if settings.EMBEDDING_CACHE_ENABLED:
+            await embedding_cache_collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": key},
+                        {"$set": {
+                            "model": settings.EMBEDDING_MODEL_NAME,
+                            "model_version": settings.EMBEDDING_MODEL_VERSION,
+                            "vector": vector
+                        }},
+                        upsert=True
+                    )
+                    for key, vector in new_entries.items()
+                ],
+                ordered=False
+            )
+
+    misses = sum(1 for key in keys if key in missing)
+    hits = len(keys) - misses
+    _stats["hits"] += hits
+    _stats["misses"] += misses
+    return [vectors[key] for key in keys], hits, misses
+
+
+def get_stats() -> Dict:
+    total = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": round(_stats["hits"] / total, 3) if total else None,
+        "enabled": settings.EMBEDDING_CACHE_ENABLED
+    }
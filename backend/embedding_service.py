@@ -0,0 +1,79 @@
+# backend/embedding_service.py
+import threading
+import time
+from typing import Dict, Any
+
+from config import settings
+
+# One SentenceTransformer per process, shared by search_utils, embedding_utils and the ingest scripts.
+# The model is loaded lazily on first use (or eagerly by warm_up() at FastAPI startup).
+_model = None
+_model_lock = threading.Lock()  # guards the one-time model load
+_stats_lock = threading.Lock()  # guards the counters below
+
+_stats = {
+    "model_name": settings.EMBEDDING_MODEL_NAME,
+    "loaded": False,
+    "load_time_seconds": None,
+    "encode_calls": 0,
+    "texts_encoded": 0,
+}
+
+
+def get_model():
+    """
+    Returns the shared SentenceTransformer, loading it on first call.
+
+    Uses double-checked locking so concurrent requests during startup
+    only load the model once.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                # Imported here so modules that only need search helpers don't pay the torch import cost
+                from sentence_transformers import SentenceTransformer
+
+                print(f"🔄 Loading embedding model {settings.EMBEDDING_MODEL_NAME}...")
+                start = time.perf_counter()
+                model = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
+                load_time = time.perf_counter() - start
+
+                with _stats_lock:
+                    _stats["loaded"] = True
+                    _stats["load_time_seconds"] = round(load_time, 3)
+                _model = model
+                print(f"✅ Embedding model loaded in {load_time:.2f}s")
+    return _model
+
+
+def encode(texts, **kwargs):
+    """
+    Encodes a string or a list of strings with the shared model.
+
+    Args:
+        texts: A single string or a list of strings
+        **kwargs: Passed through to SentenceTransformer.encode (batch_size, normalize_embeddings, ...)
+
+    Returns:
+        numpy.ndarray: One vector for a string, a 2D array for a list
+    """
+    model = get_model()
+    with _stats_lock:
+        _stats["encode_calls"] += 1
+        _stats["texts_encoded"] += 1 if isinstance(texts, str) else len(texts)
+    return model.encode(texts, **kwargs)
+
+
+def warm_up() -> None:
+    """
+    Loads the model and runs one throwaway encode so the first real request
+    doesn't pay for lazy initialisation. Not counted in encode_calls.
+    """
+    get_model().encode("warm-up")
+
+
+def get_stats() -> Dict[str, Any]:
+    """Returns a snapshot of model load time and encode counters."""
+    with _stats_lock:
+        return dict(_stats)
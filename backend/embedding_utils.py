@@ -1,10 +1,11 @@
-from sentence_transformers import SentenceTransformer 
+from embedding_cache import encode_with_cache
 from database import db 
+from pymongo import UpdateOne
 from pymongo.errors import PyMongoError 
 
 
-#Hugging Face model for embeddings 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+#Hugging Face model for embeddings is shared process-wide via embedding_service;
+#encode_with_cache only runs it for summaries whose content hash isn't cached yet
 flight_vector_collection = db["flight_vectors"]
 
 
@@ -15,8 +16,9 @@ async def embed_and_store_flight_summary(flight_id: str, summary: str):
     try:
         print(f"🔍 Embedding summary for {flight_id}...")
 
-        #Generate the embedding 
-        vector = model.encode(summary).tolist() 
+        #Generate the embedding (or reuse the cached one for an unchanged summary)
+        vectors, _, _ = await encode_with_cache([summary])
+        vector = vectors[0]
 
 
         #Create the document 
@@ -39,9 +41,39 @@ async def embed_and_store_flight_summary(flight_id: str, summary: str):
 
 
 
+async def embed_and_store_flight_summaries(flights: list, batch_size: int = 64):
+    """
+    Batched version of embed_and_store_flight_summary for many {flight_id, summary} items.
+    Encodes the summaries missing from the embedding cache in one model.encode call and
+    upserts them all with a single unordered bulk_write, so re-running over unchanged
+    summaries doesn't touch the model.
+    """
+    try:
+        print(f"🔍 Embedding {len(flights)} summaries...")
+        vectors, hits, misses = await encode_with_cache([flight["summary"] for flight in flights], batch_size=batch_size)
+        print(f"♻️ {hits} cached embeddings reused, {misses} encoded")
+
+        operations = [
+            UpdateOne(
+                {"flight_id": flight["flight_id"]},
+                {"$set": {"flight_id": flight["flight_id"], "summary": flight["summary"], "vector": vector}},
+                upsert=True
+            )
+            for flight, vector in zip(flights, vectors)
+        ]
+        await flight_vector_collection.bulk_write(operations, ordered=False)
+
+    except PyMongoError as e:
+        print(f"❌ MongoDB error while writing vectors: {e}")
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+
+
+
+
 #Most important Line: 
 
-# vector = model.encode(summary).tolist()
+# vector = embedding_service.encode(summary).tolist()   (inside encode_with_cache)
 # 🔍 What it does at runtime:
 # Takes a natural language summary (e.g., "The flight crashed due to bad weather").
 
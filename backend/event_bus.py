@@ -0,0 +1,177 @@
+# backend/event_bus.py
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import anomaly_engine
+from mongo_json import dumps
+
+
+class FlightEventBus:
+    """
+    In-process pub/sub keyed by flight_id.
+
+    Every subscriber gets its own bounded queue; publish() puts the same event object
+    into each of them without awaiting, so one computation fans out to any number of
+    dashboards. A subscriber that falls behind loses its oldest events rather than
+    slowing down ingest.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, flight_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(flight_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, flight_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(flight_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[flight_id]
+
+    def has_subscribers(self, flight_id: str) -> bool:
+        return bool(self._subscribers.get(flight_id))
+
+    def publish(self, flight_id: str, event: Dict) -> int:
+        """Fans `event` out to every subscriber of the flight. Returns how many received it."""
+        subscribers = self._subscribers.get(flight_id, ())
+        for queue in subscribers:
+            if queue.full():
+                queue.get_nowait()  # slow consumer: drop its oldest event
+                self.dropped += 1
+            queue.put_nowait(event)
+        self.published += 1
+        return len(subscribers)
+
+    def get_stats(self) -> Dict:
+        return {
+            "flights": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped
+        }
+
+
+def format_sse(event: Dict) -> bytes:
+    """event: <type>\\ndata: <json>\\n\\n"""
+    return b"event: " + event["type"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+
+
+AlertsFn = Callable[[str], List[Dict]]
+FallbackFn = Callable[[str, str], str]
+AdviceFn = Callable[[Dict, List[Dict]], Awaitable[str]]
+
+
+class AlertPublisher:
+    """
+    Turns ingested samples into flight events, once per flight regardless of subscriber count.
+
+    For each flight someone is watching, the newest sample of an ingest batch is run through
+    the anomaly engine plus `trend_alerts_fn`. An "alert" event (with deterministic fallback
+    advice) is published only when the set of active alerts changes, and "clear" when it
+    empties. With `advice_fn` set, LLM advice is generated in the background for each new
+    alert state - at most one generation per flight at a time - and published as "advice".
+    An alert change arriving mid-generation is remembered (newest only) and generated next,
+    so the last advice always describes the latest alert state.
+    """
+
+    def __init__(self, bus: FlightEventBus, trend_alerts_fn: Optional[AlertsFn] = None):
+        self.bus = bus
+        self.trend_alerts_fn = trend_alerts_fn
+        self.fallback_fn: Optional[FallbackFn] = None  # e.g. router_utils.get_fallback_message
+        self.advice_fn: Optional[AdviceFn] = None
+        self._last_signature: Dict[str, tuple] = {}
+        self._advice_tasks: Dict[str, asyncio.Task] = {}
+        self._pending_advice: Dict[str, tuple] = {}  # flight_id -> (document, anomalies) waiting for the running generation
+
+    def current_alerts(self, document: Dict) -> List[Dict]:
+        anomalies = anomaly_engine.detect(document)
+        if self.trend_alerts_fn is not None:
+            anomalies += self.trend_alerts_fn(document["flight_id"])
+        return anomalies
+
+    def alert_event(self, document: Dict, anomalies: List[Dict]) -> Dict:
+        flight_id = document["flight_id"]
+        critical = any(anomaly["severity"] == "critical" for anomaly in anomalies)
+        fallback = self.fallback_fn(flight_id, "emergency" if critical else "status_update") if self.fallback_fn else None
+        return {
+            "type": "alert" if anomalies else "clear",
+            "flight_id": flight_id,
+            "timestamp": document.get("timestamp"),
+            "anomalies": anomalies,
+            "summary": anomaly_engine.describe_anomalies(anomalies),
+            "fallback_advice": fallback if anomalies else None
+        }
+
+    def initial_event(self, document: Dict) -> Dict:
+        """
+        The first event for a new subscriber. Its alert state is recorded as published, so the
+        next ingest only produces an event if that state actually changes.
+        """
+        anomalies = self.current_alerts(document)
+        self._last_signature[document["flight_id"]] = self._signature(anomalies)
+        return self.alert_event(document, anomalies)
+
+    @staticmethod
+    def _signature(anomalies: List[Dict]) -> tuple:
+        return tuple(sorted((anomaly["code"], anomaly["severity"]) for anomaly in anomalies))
+
+    def process(self, documents: List[Dict]) -> None:
+        """Called from the ingest hook with freshly persisted samples. Never blocks."""
+        newest: Dict[str, Dict] = {}
+        for document in documents:
+            flight_id = document.get("flight_id")
+            if flight_id is None or not self.bus.has_subscribers(flight_id):
+                continue
+            current = newest.get(flight_id)
+            if current is None or document["timestamp"] >= current["timestamp"]:
+                newest[flight_id] = document
+
+        for flight_id, document in newest.items():
+            anomalies = self.current_alerts(document)
+            signature = self._signature(anomalies)
+            if signature == self._last_signature.get(flight_id, ()):
+                continue
+            self._last_signature[flight_id] = signature
+            self.bus.publish(flight_id, self.alert_event(document, anomalies))
+            if not anomalies:
+                self._pending_advice.pop(flight_id, None)  # cleared: nothing left to advise on
+            elif self.advice_fn is not None:
+                self._start_advice(flight_id, document, anomalies)
+
+    def _start_advice(self, flight_id: str, document: Dict, anomalies: List[Dict]) -> None:
+        running = self._advice_tasks.get(flight_id)
+        if running is not None and not running.done():
+            # Generated as soon as the running one finishes; a newer state replaces an older one
+            self._pending_advice[flight_id] = (document, anomalies)
+            return
+        self._advice_tasks[flight_id] = asyncio.create_task(self._publish_advice(flight_id, document, anomalies))
+
+    async def _publish_advice(self, flight_id: str, document: Dict, anomalies: List[Dict]) -> None:
+        try:
+            advice = await self.advice_fn(document, anomalies)
+        except Exception as e:
+            print(f"⚠️ Event advice generation failed for {flight_id}: {e}")
+        else:
+            self.bus.publish(flight_id, {
+                "type": "advice",
+                "flight_id": flight_id,
+                "timestamp": document.get("timestamp"),
+                "advice": advice
+            })
+        finally:
+            pending = self._pending_advice.pop(flight_id, None)
+            if pending is not None and self.bus.has_subscribers(flight_id):
+                self._advice_tasks[flight_id] = asyncio.create_task(self._publish_advice(flight_id, *pending))
+
+    def forget(self, flight_id: str) -> None:
+        """Drops remembered alert state once the last subscriber leaves, so the next one gets a fresh alert."""
+        if not self.bus.has_subscribers(flight_id):
+            self._last_signature.pop(flight_id, None)
+            self._pending_advice.pop(flight_id, None)
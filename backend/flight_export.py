@@ -0,0 +1,186 @@
+# backend/flight_export.py => Streams a flight's telemetry out as NDJSON, Arrow IPC or Parquet.
+#
+# Used by GET /flight_data/{flight_id}/export, or by hand:
+#   python flight_export.py KAL801 --format parquet --out kal801.parquet
+#
+# Documents are read and converted one batch at a time, so memory stays bounded
+# by FLIGHT_EXPORT_BATCH_SIZE no matter how long the flight is.
+
+import argparse
+import asyncio
+import io
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, get_args
+
+from bson import ObjectId
+from pydantic import BaseModel
+
+from flight_history import build_history_query, flatten_document
+from models import FlightData
+from mongo_json import dumps
+
+try:
+    import pyarrow as pa  # Optional: pip install pyarrow (Arrow / Parquet exports)
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+async def iter_flight_batches(collection, flight_query: Dict, start: Optional[datetime] = None,
+                              end: Optional[datetime] = None, batch_size: int = 5000) -> AsyncIterator[List[Dict]]:
+    """
+    Yields a flight's samples in timestamp order, `batch_size` documents at a time.
+    The Mongo cursor fetches the same batch size, so only one batch is ever held in memory.
+    """
+    query = build_history_query(flight_query, start, end)
+    cursor = collection.find(query, {"meta": 0}).sort("timestamp", 1).batch_size(batch_size)
+    batch = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def stream_ndjson(batches: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    """One JSON object per line; each batch becomes a single chunk of the response."""
+    async for batch in batches:
+        yield b"".join(dumps(document) + b"\n" for document in batch)
+
+
+def _arrow_type(annotation):
+    # Optional[float] -> float64, List[str] -> list<string>, ...
+    args = [arg for arg in get_args(annotation) if arg is not type(None)]
+    if args and getattr(annotation, "__origin__", None) is not list:
+        return _arrow_type(args[0])
+    if getattr(annotation, "__origin__", None) is list:
+        return pa.list_(_arrow_type(args[0]))
+    return {float: pa.float64(), int: pa.int64(), bool: pa.bool_(), str: pa.string(),
+            datetime: pa.timestamp("us")}[annotation]
+
+
+def _schema_fields(model, prefix: str = "") -> List:
+    fields = []
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        nested = [arg for arg in (annotation, *get_args(annotation))
+                  if isinstance(arg, type) and issubclass(arg, BaseModel)]
+        if nested:
+            fields.extend(_schema_fields(nested[0], f"{prefix}{name}."))
+        else:
+            fields.append(pa.field(f"{prefix}{name}", _arrow_type(annotation)))
+    return fields
+
+
+def arrow_schema():
+    """
+    Flat Arrow schema derived from FlightData ("location.altitude_ft": float64, ...).
+    Fixed up front so every record batch matches, even when a batch has only nulls in a column.
+    """
+    return pa.schema([pa.field("_id", pa.string()), *_schema_fields(FlightData)])
+
+
+def to_record_batch(documents: List[Dict], schema):
+    rows = []
+    for document in documents:
+        row = flatten_document(document)
+        if isinstance(row.get("_id"), ObjectId):
+            row["_id"] = str(row["_id"])
+        rows.append(row)
+    # Columns outside the schema (e.g. ad-hoc fields) are dropped, missing ones become null
+    return pa.RecordBatch.from_pylist(rows, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain()."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def stream_arrow(batches: AsyncIterator[List[Dict]], file_format: str = "arrow") -> AsyncIterator[bytes]:
+    """
+    Arrow IPC stream ("arrow") or Parquet file ("parquet"), one record batch / row group per batch.
+    Parquet's footer is only written on close, so its last chunk arrives after the final batch.
+    """
+    if pa is None:
+        raise ImportError("pyarrow is not installed - pip install pyarrow or export as ndjson")
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+        write = writer.write_batch
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+
+    try:
+        async for batch in batches:
+            write(to_record_batch(batch, schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def stream_export(batches: AsyncIterator[List[Dict]], file_format: str) -> AsyncIterator[bytes]:
+    """Picks the encoder for "ndjson", "arrow" or "parquet"."""
+    if file_format == "ndjson":
+        return stream_ndjson(batches)
+    if file_format in ("arrow", "parquet"):
+        return stream_arrow(batches, file_format)
+    raise ValueError(f"Unknown export format: {file_format}")
+
+
+async def main():
+    from config import settings
+    from database import flight_data_collection, flight_filter
+
+    parser = argparse.ArgumentParser(description="Export one flight's telemetry")
+    parser.add_argument("flight_id")
+    parser.add_argument("--format", choices=sorted(EXPORT_MEDIA_TYPES), default="ndjson")
+    parser.add_argument("--out", help="output file (default: <flight_id>.<format>)")
+    parser.add_argument("--start", type=datetime.fromisoformat)
+    parser.add_argument("--end", type=datetime.fromisoformat)
+    parser.add_argument("--batch-size", type=int, default=settings.FLIGHT_EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    out = args.out or f"{args.flight_id}.{args.format}"
+    batches = iter_flight_batches(flight_data_collection, flight_filter(args.flight_id),
+                                  args.start, args.end, args.batch_size)
+    written = 0
+    with open(out, "wb") as f:
+        async for chunk in stream_export(batches, args.format):
+            f.write(chunk)
+            written += len(chunk)
+    print(f"✅ Exported {args.flight_id} to {out} ({written / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
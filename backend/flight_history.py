@@ -0,0 +1,174 @@
+# backend/flight_history.py
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, get_args
+
+from pydantic import BaseModel
+
+from models import FlightData
+
+
+def _model_paths(model, prefix: str = "") -> List[str]:
+    # Every dotted path in a pydantic model, e.g. "location", "location.altitude_ft"
+    paths = []
+    for name, field in model.model_fields.items():
+        path = f"{prefix}{name}"
+        paths.append(path)
+        nested = [arg for arg in (field.annotation, *get_args(field.annotation))
+                  if isinstance(arg, type) and issubclass(arg, BaseModel)]
+        if nested:
+            paths.extend(_model_paths(nested[0], f"{path}."))
+    return paths
+
+
+# Fields a client may ask for in ?fields= (only known paths reach the Mongo projection)
+HISTORY_FIELDS = set(_model_paths(FlightData))
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parses ?fields=location.altitude_ft,speed into a list of paths.
+    Returns None when no fields were requested (whole samples).
+    Raises ValueError on unknown fields.
+    """
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def build_projection(fields: Optional[List[str]]) -> Dict:
+    """
+    Mongo projection for a history read. timestamp is always returned since it orders the
+    samples and drives the cursor; _id and the time-series "meta" copy never are.
+    """
+    if fields is None:
+        return {"_id": 0, "meta": 0}
+    projection = {"_id": 0, "timestamp": 1}
+    for field in fields:
+        # Asking for "location" and "location.altitude_ft" is a path collision in Mongo
+        if not any(field.startswith(f"{other}.") for other in fields):
+            projection[field] = 1
+    return projection
+
+
+def encode_cursor(timestamp: datetime, skip: int) -> str:
+    raw = json.dumps({"t": timestamp.isoformat(), "n": skip})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError on anything that isn't a cursor this module produced."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(raw["t"]), int(raw["n"])
+    except (KeyError, TypeError, json.JSONDecodeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def next_cursor(page: List[Dict], cursor_timestamp: Optional[datetime], cursor_skip: int) -> str:
+    """
+    Keyset cursor pointing just past the last sample of `page`.
+
+    The next page re-reads from the last timestamp (timestamp >= t) and skips the samples
+    at exactly t that were already returned, so samples sharing a timestamp across a
+    page boundary are neither lost nor repeated.
+    """
+    last = page[-1]["timestamp"]
+    tied = 0
+    for document in reversed(page):
+        if document["timestamp"] != last:
+            break
+        tied += 1
+    if tied == len(page) and last == cursor_timestamp:
+        # The whole page sat on the cursor's timestamp - keep counting from the previous skip
+        tied += cursor_skip
+    return encode_cursor(last, tied)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Query params may carry an offset while MongoDB hands back naive UTC datetimes
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def build_history_query(flight_query: Dict, start: Optional[datetime], end: Optional[datetime],
+                        cursor_timestamp: Optional[datetime] = None) -> Dict:
+    """Flight filter plus the inclusive time window, narrowed to start at the cursor."""
+    start, end = _naive_utc(start), _naive_utc(end)
+    lower = max((value for value in (start, cursor_timestamp) if value is not None), default=None)
+
+    time_range = {}
+    if lower is not None:
+        time_range["$gte"] = lower
+    if end is not None:
+        time_range["$lte"] = end
+    return {**flight_query, "timestamp": time_range} if time_range else dict(flight_query)
+
+
+def flatten_document(document: Dict, prefix: str = "") -> Dict:
+    """{"location": {"altitude_ft": 900}} -> {"location.altitude_ft": 900}"""
+    flat = {}
+    for key, value in document.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_document(value, f"{path}."))
+        else:
+            flat[path] = value
+    return flat
+
+
+def to_columnar(documents: List[Dict]) -> Dict[str, List]:
+    """
+    Reshapes samples into one array per leaf field, so long windows don't repeat every
+    nested key per sample. Fields missing from a sample are None in that position.
+    """
+    rows = [flatten_document(document) for document in documents]
+    columns: Dict[str, List] = {}
+    for position, row in enumerate(rows):
+        for path in row:
+            if path not in columns:
+                columns[path] = [None] * len(rows)
+        for path, value in row.items():
+            columns[path][position] = value
+    return columns
+
+
+async def fetch_flight_history(collection, flight_query: Dict, start: Optional[datetime] = None,
+                               end: Optional[datetime] = None, fields: Optional[List[str]] = None,
+                               limit: int = 500, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Reads one page of a flight's samples in timestamp order.
+
+    Args:
+        collection: flight_data_collection
+        flight_query: Filter selecting the flight (database.flight_filter)
+        start, end: Inclusive time window; either may be omitted
+        fields: Projected paths (parse_fields), None for whole samples
+        limit: Page size
+        cursor: next_cursor from the previous page
+
+    Returns:
+        (samples, next_cursor): next_cursor is None on the last page
+    """
+    cursor_timestamp, cursor_skip = decode_cursor(cursor) if cursor else (None, 0)
+    if cursor_timestamp is not None and start is not None and _naive_utc(start) > cursor_timestamp:
+        # The window was moved past the cursor, so there's nothing at the cursor timestamp to skip
+        cursor_skip = 0
+    query = build_history_query(flight_query, start, end, cursor_timestamp)
+
+    # Uses the (flight_id, timestamp) index; one extra row tells us whether another page exists
+    mongo_cursor = (collection.find(query, build_projection(fields))
+                    .sort("timestamp", 1).skip(cursor_skip).limit(limit + 1))
+    documents = await mongo_cursor.to_list(length=limit + 1)
+
+    page = documents[:limit]
+    if len(documents) <= limit or not page:
+        return page, None
+    return page, next_cursor(page, cursor_timestamp, cursor_skip)
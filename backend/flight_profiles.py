@@ -0,0 +1,150 @@
+# backend/flight_profiles.py
+import json
+import os
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from config import settings
+
+DEFAULT_PROFILE = "default"
+
+
+def escape_template(text: str) -> str:
+    """Profile text goes into ChatPromptTemplate strings, where braces are variables."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _airport_line(airport: Dict) -> str:
+    line = f"{airport['name']} - {airport['distance']}, Ceiling: {airport['ceiling']}, Visibility: {airport['visibility']}"
+    if airport.get("approach"):
+        line += f", Approach: {airport['approach']} (minimums {airport.get('minimums', 'n/a')})"
+    return line
+
+
+class FlightProfileStore:
+    """
+    Flight-specific knowledge (grounding context, per-intent briefings, airport whitelists,
+    fallback advice), loaded once from flight_profiles.json.
+
+    Two tables, both plain dicts so every lookup is O(1):
+    - "profiles": prompt profiles (e.g. "KAL801"), shared by several flight IDs
+    - "flights": one row per flight ID with its optional "profile" and "fallback"
+
+    Adding a flight is a new row in the JSON file; the chains, validators and fallbacks
+    pick it up without a code change. Everything rendered from a profile is built at
+    load time, not per request.
+    """
+
+    def __init__(self, profiles: Dict[str, Dict], flights: Dict[str, Dict], default_fallback: str,
+                 default_briefing: str = ""):
+        for flight_id, flight in flights.items():
+            profile = flight.get("profile")
+            if profile is not None and profile not in profiles:
+                raise ValueError(f"Flight {flight_id} references unknown profile {profile!r}")
+        self.profiles = profiles
+        self.flights = flights
+        self.default_fallback = default_fallback
+        self.default_briefing = default_briefing
+        self._briefing = {
+            (name, intent): self._render_briefing(name, lines)
+            for name, profile in profiles.items()
+            for intent, lines in profile.get("briefing", {}).items()
+        }
+        self._context = {name: self._render_context(name, profile) for name, profile in profiles.items()}
+        self._conflict = {name: self._render_conflict(profile) for name, profile in profiles.items()}
+        self._blocked = {
+            name: tuple(airport.lower() for airport in profile.get("blocked_airports", []))
+            for name, profile in profiles.items()
+        }
+
+    @classmethod
+    def load(cls, path: str) -> "FlightProfileStore":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("profiles", {}), data.get("flights", {}),
+                   data.get("default_fallback", "⚠️ AI Copilot temporarily unavailable. Refer to emergency checklist."),
+                   data.get("default_briefing", "No flight-specific context on file for this flight."))
+
+    @staticmethod
+    def _render_context(name: str, profile: Dict) -> str:
+        lines = [f"CRITICAL FLIGHT CONTEXT - {name}:"]
+        lines += [f"{key}: {value}" for key, value in profile.get("facts", {}).items()]
+        if profile.get("restriction"):
+            lines.append(f"⚠️ RESTRICTION: {profile['restriction']}")
+        if profile.get("airports"):
+            lines.append(f"✅ VALID AIRPORTS ({profile.get('region', name)} only):")
+            lines += [f"- {_airport_line(airport)}" for airport in profile["airports"]]
+        if profile.get("blocked_rule"):
+            lines.append(f"🚫 BLOCKED: {profile['blocked_rule']}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _render_briefing(name: str, lines: List[str]) -> str:
+        return "\n".join([f"{name}:", *(f"- {line}" for line in lines)])
+
+    @staticmethod
+    def _render_conflict(profile: Dict) -> str:
+        options = "\n".join(f"• {_airport_line(airport)}" for airport in profile.get("airports", []))
+        return (
+            "⚠️ UNABLE TO RECOMMEND ALTERNATE AIRPORT DUE TO LOCATION CONFLICT\n\n"
+            f"{profile.get('location_conflict', '')}\n\n"
+            f"VALID {profile.get('region', '').upper()} OPTIONS:\n{options}\n\n"
+            f"{profile.get('atc_contact', '')}"
+        )
+
+    def profile_for(self, flight_id: str) -> str:
+        """Prompt profile a flight's chains are built from ("default" if it has none)."""
+        return (self.flights.get(flight_id) or {}).get("profile") or DEFAULT_PROFILE
+
+    def profile_names(self) -> List[str]:
+        return list(self.profiles)
+
+    def fallback(self, flight_id: str) -> str:
+        return (self.flights.get(flight_id) or {}).get("fallback") or self.default_fallback
+
+    def context(self, profile: str) -> Optional[str]:
+        return self._context.get(profile)
+
+    def briefing(self, profile: str, intent: str) -> str:
+        """
+        Flight-specific lines for an intent's prompt, filled into its {context} variable.
+        Template variable values aren't parsed, so unlike grounding() this isn't escaped.
+        """
+        return self._briefing.get((profile, intent), self.default_briefing)
+
+    def grounding(self, profile: str, intent: str) -> Optional[str]:
+        """
+        System prompt text grounding `intent` chains in the profile, escaped for ChatPromptTemplate.
+        None when the profile has no focus for this intent, i.e. the standard chain is used.
+        """
+        focus = self.profiles.get(profile, {}).get("focus", {}).get(intent)
+        if focus is None:
+            return None
+        return escape_template(f"{self._context[profile]}\n\nCRITICAL FOR {profile}: {focus}")
+
+    def validate_airports(self, profile: str, response: str) -> str:
+        """
+        🛑 Replaces a response that suggests a blocked airport with the profile's valid options.
+        Only responses that mention the profile's flight are checked.
+        """
+        if profile not in response:
+            return response
+        response_lower = response.lower()
+        for blocked_airport in self._blocked.get(profile, ()):
+            if blocked_airport in response_lower:
+                return self._conflict[profile]
+        return response
+
+    def airport_validator(self, profile: str) -> Callable[[str], str]:
+        return partial(self.validate_airports, profile)
+
+    def get_stats(self) -> Dict:
+        return {"profiles": len(self.profiles), "flights": len(self.flights)}
+
+
+def _profiles_path() -> str:
+    # Relative paths are resolved next to this module, where the default file ships
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), settings.FLIGHT_PROFILES_PATH)
+
+
+flight_profiles = FlightProfileStore.load(_profiles_path())
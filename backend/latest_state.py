@@ -0,0 +1,175 @@
+# backend/latest_state.py
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from models import to_naive_utc, utc_timestamp
+
+try:
+    import redis.asyncio as redis_asyncio  # Optional: pip install redis
+except ImportError:
+    redis_asyncio = None
+
+
+def _response_document(document: Dict) -> Dict:
+    # Time-series storage adds a "meta" copy of flight_id/aircraft_type; reads never return it
+    if "meta" not in document:
+        return document
+    return {key: value for key, value in document.items() if key != "meta"}
+
+
+class LatestStateCache:
+    """
+    In-process map of flight_id -> newest FlightData document.
+
+    Updated on every ingest and warmed from MongoDB at startup, so the
+    "latest sample" reads in get_flight_data_by_flight_id and advise_pilot
+    don't need a round trip. With `max_age_seconds` set, an entry that hasn't
+    been refreshed within that window is treated as a miss (useful when other
+    processes write to flight_data without going through this cache).
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_age_seconds: Optional[float] = None):
+        self.max_age_seconds = max_age_seconds or None
+        self._entries: Dict[str, tuple] = {}  # flight_id -> (cached_at, document)
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, cached_at: float) -> bool:
+        return self.max_age_seconds is None or time.time() - cached_at <= self.max_age_seconds
+
+    async def get(self, flight_id: str) -> Optional[Dict]:
+        entry = self._entries.get(flight_id)
+        if entry is None or not self._is_fresh(entry[0]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Shallow copy so response serialization can't mutate the cached document
+        return dict(entry[1])
+
+    async def update_many(self, documents: List[Dict]) -> None:
+        """Keeps each flight's newest document; older or equal-age samples never overwrite newer ones."""
+        now = time.time()
+        for document in documents:
+            flight_id = document.get("flight_id")
+            if flight_id is None:
+                continue
+            current = self._entries.get(flight_id)
+            # Naive UTC on both sides: a document that skipped flight_data_to_document may be aware
+            if current is None or to_naive_utc(document["timestamp"]) >= to_naive_utc(current[1]["timestamp"]):
+                self._entries[flight_id] = (now, _response_document(document))
+
+    async def update(self, document: Dict) -> None:
+        await self.update_many([document])
+
+    async def warm(self, collection, flight_id_field: str = "flight_id") -> int:
+        """
+        Loads the newest sample of every flight from MongoDB.
+        flight_id_field is "meta.flight_id" for time-series collections.
+
+        Returns:
+            int: Number of flights cached
+        """
+        pipeline = [
+            {"$sort": {flight_id_field: 1, "timestamp": -1}},
+            {"$group": {"_id": f"${flight_id_field}", "doc": {"$first": "$$ROOT"}}},
+            {"$project": {"doc.meta": 0}}
+        ]
+        documents = [row["doc"] async for row in collection.aggregate(pipeline, allowDiskUse=True)]
+        await self.update_many(documents)
+        return len(documents)
+
+    def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "flights": len(self._entries),
+            "max_age_seconds": self.max_age_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None
+        }
+
+
+def _encode_document(document: Dict) -> str:
+    def default(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, ObjectId):
+            return str(value)
+        raise TypeError(f"Cannot serialize {type(value).__name__}")
+    return json.dumps(document, default=default)
+
+
+def _decode_document(raw) -> Dict:
+    document = json.loads(raw)
+    document["timestamp"] = datetime.fromisoformat(document["timestamp"])
+    return document
+
+
+class RedisLatestStateCache(LatestStateCache):
+    """
+    Same interface, shared through Redis so every worker process sees every ingest.
+
+    Each flight is a sorted set scored by sample timestamp and trimmed to its top
+    member, so concurrent writers from different workers can't regress the state.
+    Works with any client exposing the redis.asyncio API (including fakeredis).
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, max_age_seconds: Optional[float] = None, key_prefix: str = "latest_state:"):
+        super().__init__(max_age_seconds)
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def _key(self, flight_id: str) -> str:
+        return f"{self.key_prefix}{flight_id}"
+
+    async def get(self, flight_id: str) -> Optional[Dict]:
+        members = await self.client.zrange(self._key(flight_id), -1, -1)
+        if not members:
+            self.misses += 1
+            return None
+        entry = json.loads(members[0])
+        if not self._is_fresh(entry["cached_at"]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _decode_document(entry["doc"])
+
+    async def update_many(self, documents: List[Dict]) -> None:
+        now = time.time()
+        pipe = self.client.pipeline(transaction=True)
+        for document in documents:
+            flight_id = document.get("flight_id")
+            if flight_id is None:
+                continue
+            key = self._key(flight_id)
+            member = json.dumps({"cached_at": now, "doc": _encode_document(_response_document(document))})
+            pipe.zadd(key, {member: utc_timestamp(document["timestamp"])})
+            pipe.zremrangebyrank(key, 0, -2)  # keep only the newest sample
+        await pipe.execute()
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats["flights"] = None  # not tracked locally
+        return stats
+
+
+def create_latest_state_cache(backend: str, max_age_seconds: float = 0, redis_url: str = None) -> LatestStateCache:
+    """
+    Builds the cache selected by settings.LATEST_STATE_BACKEND ("memory" or "redis").
+    """
+    if backend == "memory":
+        return LatestStateCache(max_age_seconds)
+    if backend == "redis":
+        if redis_asyncio is None:
+            raise ImportError("redis is not installed - pip install redis or use LATEST_STATE_BACKEND=memory")
+        return RedisLatestStateCache(redis_asyncio.from_url(redis_url), max_age_seconds)
+    raise ValueError(f"Unknown latest state backend: {backend}")
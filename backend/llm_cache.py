@@ -0,0 +1,267 @@
+# backend/llm_cache.py
+import asyncio
+import time
+from contextlib import nullcontext
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+import numpy as np
+from langchain_core.runnables import Runnable
+
+import embedding_service
+from config import settings
+from lru_cache import LRUCache
+from single_flight import SingleFlight
+from llm_scheduler import LLMScheduler, llm_scheduler
+
+# Inputs holding the free-text question; the semantic tier matches on these
+SEMANTIC_FIELDS = ("message", "question")
+
+
+def normalize_text(text: str) -> str:
+    # Case and whitespace don't change what the pilot asked
+    return " ".join(text.lower().split())
+
+
+def _normalize(value: Any) -> Any:
+    return normalize_text(value) if isinstance(value, str) else value
+
+
+class LLMResponseCache:
+    """
+    Response cache in front of the LLM chains, with two tiers per intent:
+
+    - exact: (chain id, normalized inputs) -> answer, an LRUCache per intent
+    - semantic (optional): the question is embedded with the shared MiniLM encoder and
+      compared to cached questions asked under the same chain and other inputs; an
+      answer is reused when the cosine similarity reaches `semantic_threshold`
+
+    Each intent has its own TTL (`ttls`, falling back to `default_ttl`). Intents in
+    `bypass_intents` (emergency and emergency_advisor by default) are never read from or written to the cache.
+    Only complete answers are stored - a failed, cancelled or timed-out generation isn't.
+
+    With `single_flight`, concurrent misses for the same key (bypassed intents included)
+    share one generation instead of each queueing their own behind the local model.
+    With `scheduler`, every generation waits for an LLM slot in its intent's priority lane.
+    """
+
+    def __init__(self, maxsize: int = 512, default_ttl: float = 60.0, ttls: Optional[Dict[str, float]] = None,
+                 bypass_intents: Iterable[str] = ("emergency", "emergency_advisor"), semantic: bool = False,
+                 semantic_threshold: float = 0.92, semantic_max_entries: int = 64,
+                 encode_fn: Optional[Callable] = None, enabled: bool = True,
+                 single_flight: Optional[SingleFlight] = None, scheduler: Optional[LLMScheduler] = None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.bypass_intents = set(bypass_intents)
+        self.semantic = semantic
+        self.semantic_threshold = semantic_threshold
+        self.semantic_max_entries = semantic_max_entries  # cached questions per (chain, other inputs) group
+        self.encode_fn = encode_fn or embedding_service.encode
+        self.enabled = enabled
+        self.single_flight = single_flight
+        self.scheduler = scheduler
+        self._exact: Dict[str, LRUCache] = {}
+        self._semantic: Dict[str, LRUCache] = {}  # intent -> group key -> list of [expires_at, vector, answer]
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def ttl_for(self, intent: str) -> float:
+        return self.ttls.get(intent, self.default_ttl)
+
+    def bypasses(self, intent: str) -> bool:
+        return not self.enabled or intent in self.bypass_intents
+
+    def record(self, intent: str, counter: str) -> None:
+        stats = self._stats.setdefault(intent, {"exact_hits": 0, "semantic_hits": 0, "misses": 0,
+                                                "bypassed": 0, "stored": 0})
+        stats[counter] += 1
+
+    def _tier(self, tiers: Dict[str, LRUCache], intent: str) -> LRUCache:
+        cache = tiers.get(intent)
+        if cache is None:
+            cache = LRUCache(self.maxsize, self.ttl_for(intent))
+            tiers[intent] = cache
+        return cache
+
+    @staticmethod
+    def exact_key(chain_id: str, inputs: Dict) -> tuple:
+        return (chain_id,) + tuple(sorted((key, _normalize(value)) for key, value in inputs.items()))
+
+    @staticmethod
+    def _semantic_split(chain_id: str, inputs: Dict):
+        """(group key of everything but the question, question text) - or (None, None) without a question."""
+        field = next((f for f in SEMANTIC_FIELDS if isinstance(inputs.get(f), str)), None)
+        if field is None:
+            return None, None
+        others = {key: value for key, value in inputs.items() if key != field}
+        return LLMResponseCache.exact_key(chain_id, others), normalize_text(inputs[field])
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            # Encoding is CPU-bound; keep it off the event loop like the startup warm-up does
+            vector = await asyncio.to_thread(self.encode_fn, text)
+        except Exception as e:
+            print(f"⚠️ LLM cache could not embed the question, semantic tier skipped: {e}")
+            return None
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    async def lookup(self, chain_id: str, intent: str, inputs: Dict) -> tuple:
+        """
+        Returns (answer or None, state). `state` is handed back to store() on a miss so the
+        question isn't embedded twice.
+        """
+        key = self.exact_key(chain_id, inputs)
+        answer = self._tier(self._exact, intent).get(key)
+        if answer is not None:
+            self.record(intent, "exact_hits")
+            return answer, None
+
+        state = {"key": key, "group": None, "vector": None}
+        if self.semantic:
+            group_key, question = self._semantic_split(chain_id, inputs)
+            if group_key is not None:
+                state["group"] = group_key
+                state["vector"] = await self._embed(question)
+                answer = self._semantic_match(intent, group_key, state["vector"])
+                if answer is not None:
+                    self.record(intent, "semantic_hits")
+                    return answer, None
+
+        self.record(intent, "misses")
+        return None, state
+
+    def _semantic_match(self, intent: str, group_key: tuple, vector: Optional[np.ndarray]) -> Optional[str]:
+        if vector is None:
+            return None
+        entries = self._tier(self._semantic, intent).get(group_key)
+        if not entries:
+            return None
+        now = time.monotonic()
+        entries[:] = [entry for entry in entries if entry[0] is None or entry[0] > now]
+        if not entries:
+            return None
+        similarities = np.stack([entry[1] for entry in entries]) @ vector
+        best = int(np.argmax(similarities))
+        return entries[best][2] if similarities[best] >= self.semantic_threshold else None
+
+    def store(self, intent: str, state: Dict, answer: str) -> None:
+        if state is None or not answer:
+            return
+        self._tier(self._exact, intent).set(state["key"], answer)
+        if state["group"] is not None and state["vector"] is not None:
+            groups = self._tier(self._semantic, intent)
+            entries = groups.get(state["group"]) or []
+            groups.set(state["group"], entries)  # re-set so the group outlives its newest entry
+            ttl = self.ttl_for(intent)
+            expires_at = time.monotonic() + ttl if ttl else None
+            entries.append([expires_at, state["vector"], answer])
+            del entries[:-self.semantic_max_entries]
+        self.record(intent, "stored")
+
+    async def generate(self, key: tuple, intent: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs a cache miss: coalesced with identical concurrent misses when single-flight is on,
+        then scheduled in the intent's lane (one slot per coalesced generation, not per caller).
+        """
+        if self.scheduler is not None:
+            fn = partial(self.scheduler.run, intent, fn)
+            # Background and interactive calls for the same key don't share a lane's generation
+            key = (self.scheduler.lane_for(intent),) + key
+        if self.single_flight is None:
+            return await fn()
+        return await self.single_flight.do(key, fn)
+
+    def slot(self, intent: str):
+        """LLM slot for a streamed generation (no-op without a scheduler)."""
+        return self.scheduler.slot(intent) if self.scheduler is not None else nullcontext()
+
+    def wrap(self, chain: Runnable, chain_id: str, intent: str) -> "CachedChain":
+        return CachedChain(chain, self, chain_id, intent)
+
+    def clear(self) -> None:
+        self._exact.clear()
+        self._semantic.clear()
+
+    def get_stats(self) -> Dict:
+        intents = {}
+        for intent, stats in self._stats.items():
+            hits = stats["exact_hits"] + stats["semantic_hits"]
+            lookups = hits + stats["misses"]
+            intents[intent] = dict(stats, ttl_seconds=self.ttl_for(intent),
+                                   hit_rate=round(hits / lookups, 3) if lookups else None)
+        return {
+            "enabled": self.enabled,
+            "semantic": self.semantic,
+            "entries": sum(len(cache) for cache in self._exact.values()),
+            "intents": intents
+        }
+
+
+class CachedChain(Runnable):
+    """
+    A chain with the response cache in front of it. Behaves like the wrapped runnable:
+    ainvoke() returns the cached answer on a hit, astream() yields it as one chunk.
+    Concurrent identical ainvoke() misses share one generation (see SingleFlight).
+    """
+
+    def __init__(self, chain: Runnable, cache: LLMResponseCache, chain_id: str, intent: str):
+        self.chain = chain
+        self.cache = cache
+        self.chain_id = chain_id
+        self.intent = intent
+
+    def invoke(self, input: Dict, config=None, **kwargs) -> Any:
+        # Sync callers (scripts) skip the cache - lookups need the event loop for the semantic tier
+        return self.chain.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Dict, config=None, **kwargs) -> Any:
+        state = None
+        if self.cache.bypasses(self.intent):
+            self.cache.record(self.intent, "bypassed")
+        else:
+            answer, state = await self.cache.lookup(self.chain_id, self.intent, input)
+            if answer is not None:
+                return answer
+        key = state["key"] if state else self.cache.exact_key(self.chain_id, input)
+
+        async def generate():
+            # Runs once per key however many requests are waiting on it; stored even if they all left
+            answer = await self.chain.ainvoke(input, config, **kwargs)
+            self.cache.store(self.intent, state, answer)
+            return answer
+
+        return await self.cache.generate(key, self.intent, generate)
+
+    async def astream(self, input: Dict, config=None, **kwargs) -> AsyncIterator[Any]:
+        if self.cache.bypasses(self.intent):
+            self.cache.record(self.intent, "bypassed")
+            async with self.cache.slot(self.intent):
+                async for chunk in self.chain.astream(input, config, **kwargs):
+                    yield chunk
+            return
+        answer, state = await self.cache.lookup(self.chain_id, self.intent, input)
+        if answer is not None:
+            yield answer
+            return
+        chunks = []
+        async with self.cache.slot(self.intent):
+            async for chunk in self.chain.astream(input, config, **kwargs):
+                chunks.append(chunk)
+                yield chunk
+        # Only reached when the stream ran to the end (not on timeout / client disconnect)
+        self.cache.store(self.intent, state, "".join(chunks))
+
+
+llm_response_cache = LLMResponseCache(
+    maxsize=settings.LLM_CACHE_SIZE,
+    default_ttl=settings.LLM_CACHE_DEFAULT_TTL_SECONDS,
+    ttls=settings.LLM_CACHE_TTLS,
+    bypass_intents=settings.LLM_CACHE_BYPASS_INTENTS,
+    semantic=settings.LLM_CACHE_SEMANTIC,
+    semantic_threshold=settings.LLM_CACHE_SEMANTIC_THRESHOLD,
+    enabled=settings.LLM_CACHE_ENABLED,
+    single_flight=SingleFlight() if settings.LLM_SINGLE_FLIGHT else None,
+    scheduler=llm_scheduler
+)
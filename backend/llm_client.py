@@ -0,0 +1,359 @@
+# backend/llm_client.py
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from langchain_community.llms import Ollama
+from langchain_community.llms.ollama import OllamaEndpointNotFoundError
+
+from config import settings
+
+# One pooled HTTP client per event loop (async) plus one for sync callers. Ollama keeps the
+# connection alive between generations, so requests skip TCP setup after the first one.
+_async_clients: Dict[int, tuple] = {}  # id(loop) -> (loop, httpx.AsyncClient)
+_sync_client: Optional[httpx.Client] = None
+_llms: Dict[tuple, LLM] = {}  # (backend, model) -> shared instance
+
+_stats = {"requests": 0, "errors": 0, "keep_warm_pings": 0, "keep_warm_failures": 0, "last_request_at": None}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                        keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY_SECONDS)
+
+
+def _timeout() -> httpx.Timeout:
+    # Generations can be slow; only connecting is expected to be quick
+    return httpx.Timeout(settings.OLLAMA_TIMEOUT_SECONDS, connect=5.0)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """The pooled AsyncClient for the running event loop (a client can't be shared across loops)."""
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(id(loop))
+    if entry is None or entry[0] is not loop:
+        for other_loop, client in list(_async_clients.values()):
+            if other_loop.is_closed():  # e.g. a finished asyncio.run() in a script or test
+                _async_clients.pop(id(other_loop), None)
+        entry = (loop, httpx.AsyncClient(base_url=settings.OLLAMA_BASE_URL, limits=_limits(), timeout=_timeout()))
+        _async_clients[id(loop)] = entry
+    return entry[1]
+
+
+def get_sync_client() -> httpx.Client:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = httpx.Client(base_url=settings.OLLAMA_BASE_URL, limits=_limits(), timeout=_timeout())
+    return _sync_client
+
+
+async def aclose_clients() -> None:
+    """Closes the pooled connections (FastAPI shutdown)."""
+    global _sync_client
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.pop(id(loop), None)
+    if entry is not None:
+        await entry[1].aclose()
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+def _raise_for_status(status_code: int, detail: str, model: str) -> None:
+    # Same errors the stock Ollama class raises, so callers' handling doesn't change
+    if status_code == 404:
+        raise OllamaEndpointNotFoundError(
+            "Ollama call failed with status code 404. "
+            f"Maybe your model is not found and you should pull the model with `ollama pull {model}`."
+        )
+    raise ValueError(f"Ollama call failed with status code {status_code}. Details: {detail}")
+
+
+class PooledOllama(Ollama):
+    """
+    The LangChain Ollama LLM, sending its requests through the shared pooled clients.
+
+    The stock class opens a new aiohttp session (and TCP connection) for every async
+    generation and a new requests connection for every sync one. Prompt building,
+    streaming and parsing are inherited unchanged; only the HTTP transport differs.
+    """
+
+    def _request_payload(self, payload: Any, stop: Optional[List[str]], kwargs: Dict) -> Dict:
+        # Mirrors Ollama._create_stream / _acreate_stream
+        if self.stop is not None and stop is not None:
+            raise ValueError("`stop` found in both the input and default params.")
+        elif self.stop is not None:
+            stop = self.stop
+
+        params = self._default_params
+        for key in self._default_params:
+            if key in kwargs:
+                params[key] = kwargs[key]
+        if "options" in kwargs:
+            params["options"] = kwargs["options"]
+        else:
+            params["options"] = {
+                **params["options"],
+                "stop": stop,
+                **{k: v for k, v in kwargs.items() if k not in self._default_params},
+            }
+
+        if payload.get("messages"):
+            return {"messages": payload.get("messages", []), **params}
+        return {"prompt": payload.get("prompt"), "images": payload.get("images", []), **params}
+
+    def _headers(self) -> Dict:
+        return {"Content-Type": "application/json", **(self.headers if isinstance(self.headers, dict) else {})}
+
+    def _create_stream(self, api_url: str, payload: Any, stop: Optional[List[str]] = None,
+                       **kwargs: Any) -> Iterator[str]:
+        request_payload = self._request_payload(payload, stop, kwargs)
+        _stats["requests"] += 1
+        _stats["last_request_at"] = time.time()
+        with get_sync_client().stream("POST", api_url, headers=self._headers(), auth=self.auth,
+                                      json=request_payload) as response:
+            if response.status_code != 200:
+                _stats["errors"] += 1
+                _raise_for_status(response.status_code, response.read().decode("utf-8", "replace"), self.model)
+            yield from response.iter_lines()
+
+    async def _acreate_stream(self, api_url: str, payload: Any, stop: Optional[List[str]] = None,
+                              **kwargs: Any) -> AsyncIterator[str]:
+        request_payload = self._request_payload(payload, stop, kwargs)
+        _stats["requests"] += 1
+        _stats["last_request_at"] = time.time()
+        async with get_async_client().stream("POST", api_url, headers=self._headers(), auth=self.auth,
+                                             json=request_payload) as response:
+            if response.status_code != 200:
+                _stats["errors"] += 1
+                _raise_for_status(response.status_code, (await response.aread()).decode("utf-8", "replace"), self.model)
+            async for line in response.aiter_lines():
+                yield line
+
+
+class OpenAICompatibleLLM(LLM):
+    """
+    Any server speaking the OpenAI chat completions API (vLLM, llama.cpp server, LM Studio,
+    Ollama's own /v1 endpoint...). The rendered prompt is sent as one user message and the
+    answer is streamed back over server-sent events, through the same pooled clients.
+    """
+
+    base_url: str = "http://localhost:8000/v1"
+    model: str = "gemma-2b"
+    api_key: str = ""
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "openai-compatible"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"base_url": self.base_url, "model": self.model}
+
+    def _request(self, prompt: str, stop: Optional[List[str]]) -> Dict:
+        body = {"model": self.model, "messages": [{"role": "user", "content": prompt}], "stream": True}
+        if stop:
+            body["stop"] = stop
+        if self.temperature is not None:
+            body["temperature"] = self.temperature
+        if self.max_tokens is not None:
+            body["max_tokens"] = self.max_tokens
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        return {"url": f"{self.base_url.rstrip('/')}/chat/completions", "json": body, "headers": headers}
+
+    @staticmethod
+    def _parse_event(line: str) -> Optional[str]:
+        """Token text from one SSE line; None for keep-alives, comments and the final [DONE]."""
+        if not line.startswith("data:"):
+            return None
+        data = line[len("data:"):].strip()
+        if not data or data == "[DONE]":
+            return None
+        choices = json.loads(data).get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content")
+
+    def _error(self, status_code: int, detail: str) -> None:
+        _stats["errors"] += 1
+        raise ValueError(f"OpenAI-compatible call to {self.base_url} failed with status code {status_code}. Details: {detail}")
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        _stats["requests"] += 1
+        _stats["last_request_at"] = time.time()
+        with get_sync_client().stream("POST", **self._request(prompt, stop)) as response:
+            if response.status_code != 200:
+                self._error(response.status_code, response.read().decode("utf-8", "replace"))
+            for line in response.iter_lines():
+                text = self._parse_event(line)
+                if text:
+                    chunk = GenerationChunk(text=text)
+                    if run_manager:
+                        run_manager.on_llm_new_token(text, chunk=chunk)
+                    yield chunk
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        _stats["requests"] += 1
+        _stats["last_request_at"] = time.time()
+        async with get_async_client().stream("POST", **self._request(prompt, stop)) as response:
+            if response.status_code != 200:
+                self._error(response.status_code, (await response.aread()).decode("utf-8", "replace"))
+            async for line in response.aiter_lines():
+                text = self._parse_event(line)
+                if text:
+                    chunk = GenerationChunk(text=text)
+                    if run_manager:
+                        await run_manager.on_llm_new_token(text, chunk=chunk)
+                    yield chunk
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        return "".join([chunk.text async for chunk in self._astream(prompt, stop, run_manager, **kwargs)])
+
+
+class StubLLM(LLM):
+    """
+    No model at all: streams a canned answer word by word, after `first_token_seconds` and
+    then at `tokens_per_second` (0 = everything at once). The answer never depends on the
+    prompt, so load tests of the API measure routing, validation and serialization only.
+    """
+
+    response: str = "Maintain current heading and altitude. Monitor instruments and contact ATC."
+    first_token_seconds: float = 0.0
+    tokens_per_second: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _tokens(self) -> List[str]:
+        words = self.response.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def _delay(self, index: int) -> float:
+        if index == 0:
+            return self.first_token_seconds
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        _stats["requests"] += 1
+        _stats["last_request_at"] = time.time()
+        for index, token in enumerate(self._tokens()):
+            delay = self._delay(index)
+            if delay:
+                time.sleep(delay)
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        _stats["requests"] += 1
+        _stats["last_request_at"] = time.time()
+        for index, token in enumerate(self._tokens()):
+            delay = self._delay(index)
+            if delay:
+                await asyncio.sleep(delay)
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        return "".join([chunk.text async for chunk in self._astream(prompt, stop, run_manager, **kwargs)])
+
+
+LLM_BACKENDS = ("ollama", "openai", "stub")
+
+
+def create_llm(backend: str, model: Optional[str] = None) -> LLM:
+    """A new LLM for `backend`, configured from settings (get_llm() shares them)."""
+    if backend == "ollama":
+        return PooledOllama(model=model or settings.OLLAMA_MODEL, base_url=settings.OLLAMA_BASE_URL,
+                            keep_alive=settings.OLLAMA_KEEP_ALIVE or None)
+    if backend == "openai":
+        return OpenAICompatibleLLM(base_url=settings.OPENAI_BASE_URL, model=model or settings.OPENAI_MODEL,
+                                   api_key=settings.OPENAI_API_KEY)
+    if backend == "stub":
+        return StubLLM(response=settings.LLM_STUB_RESPONSE,
+                       first_token_seconds=settings.LLM_STUB_FIRST_TOKEN_SECONDS,
+                       tokens_per_second=settings.LLM_STUB_TOKENS_PER_SECOND)
+    raise ValueError(f"Unknown LLM_BACKEND '{backend}', expected one of {', '.join(LLM_BACKENDS)}")
+
+
+def get_llm(model: Optional[str] = None, backend: Optional[str] = None) -> LLM:
+    """
+    Shared LLM instance per backend and model - langchain_utils and router_utils use the same one.
+    The backend comes from settings.LLM_BACKEND unless given.
+
+    For Ollama, keep_alive is sent with every request, so the model stays in memory for that
+    long after each generation instead of Ollama's 5 minute default.
+    """
+    backend = backend or settings.LLM_BACKEND
+    key = (backend, model)
+    llm = _llms.get(key)
+    if llm is None:
+        llm = create_llm(backend, model)
+        _llms[key] = llm
+    return llm
+
+
+async def ping_model(model: Optional[str] = None) -> bool:
+    """
+    Loads the model (or refreshes its keep_alive) without generating anything:
+    Ollama treats a generate request with no prompt as a load.
+    """
+    model = model or settings.OLLAMA_MODEL
+    try:
+        response = await get_async_client().post("/api/generate", json={"model": model, "keep_alive": settings.OLLAMA_KEEP_ALIVE})
+        response.raise_for_status()
+        _stats["keep_warm_pings"] += 1
+        return True
+    except httpx.HTTPError as e:
+        _stats["keep_warm_failures"] += 1
+        print(f"⚠️ Ollama keep-warm ping for {model} failed: {e}")
+        return False
+
+
+async def keep_warm_loop(interval_seconds: float) -> None:
+    """
+    Pings the model whenever it has been idle for `interval_seconds`, so the first request
+    after a quiet spell doesn't pay for a cold model load. Runs until cancelled.
+    """
+    while True:
+        last_request_at = _stats["last_request_at"]
+        if last_request_at is None or time.time() - last_request_at >= interval_seconds:
+            await ping_model()
+        await asyncio.sleep(interval_seconds)
+
+
+def get_stats() -> Dict:
+    return {
+        "backend": settings.LLM_BACKEND,
+        "base_url": settings.OPENAI_BASE_URL if settings.LLM_BACKEND == "openai" else settings.OLLAMA_BASE_URL,
+        "models": [getattr(llm, "model", llm._llm_type) for llm in _llms.values()],
+        "keep_alive": settings.OLLAMA_KEEP_ALIVE,
+        "max_connections": settings.OLLAMA_MAX_CONNECTIONS,
+        **_stats
+    }
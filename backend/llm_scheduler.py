@@ -0,0 +1,200 @@
+# backend/llm_scheduler.py
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from config import settings
+
+# Lane override for everything awaited inside LLMScheduler.lane() - tasks started there
+# (e.g. a single-flight generation) inherit it with the rest of the context
+_lane_override: ContextVar[Optional[str]] = ContextVar("llm_lane", default=None)
+
+
+class LLMDeadlineExceeded(asyncio.TimeoutError):
+    """
+    The request could not start generating before its deadline, or its generation ran past
+    `generation_timeout_seconds`. Subclasses TimeoutError so the chat endpoints' existing
+    timeout branch serves the fallback message for it.
+    """
+
+
+class LLMScheduler:
+    """
+    Bounded, prioritized access to the LLM.
+
+    At most `concurrency` generations run at once (a local gemma:2b serializes them
+    anyway). Waiting requests sit in one heap ordered by lane priority (lower number
+    first - emergency before status before copilot), then arrival. A request is
+    rejected at admission when the expected wait - queued work ahead of it times the
+    average generation time - already runs past its deadline, and dropped from the
+    queue if the deadline passes while waiting. Either way it raises LLMDeadlineExceeded
+    straight away instead of holding the caller for the full timeout.
+
+    Generations started through run() are cancelled after `generation_timeout_seconds`, so
+    a shared generation its callers have all given up on can't hold a slot indefinitely.
+    Background work runs in its own lane inside `with scheduler.lane("pushed_advice"):`.
+    """
+
+    def __init__(self, concurrency: int = 1, priorities: Optional[Dict[str, int]] = None,
+                 default_priority: int = 5, deadline_seconds: float = 15.0,
+                 generation_timeout_seconds: Optional[float] = None):
+        self.concurrency = concurrency
+        self.priorities = dict(priorities or {})
+        self.default_priority = default_priority
+        self.deadline_seconds = deadline_seconds
+        self.generation_timeout_seconds = generation_timeout_seconds or None
+        self.running = 0
+        self._waiters = []  # heap of [priority, seq, future, intent]
+        self._seq = itertools.count()
+        self.avg_generation_seconds: Optional[float] = None  # EWMA of slot hold time
+        self._lanes: Dict[str, Dict] = {}
+
+    @staticmethod
+    @contextmanager
+    def lane(name: str):
+        """Schedules every LLM call made inside the block in lane `name` instead of its intent's."""
+        token = _lane_override.set(name)
+        try:
+            yield
+        finally:
+            _lane_override.reset(token)
+
+    @staticmethod
+    def lane_for(intent: str) -> str:
+        return _lane_override.get() or intent
+
+    def priority_for(self, intent: str) -> int:
+        return self.priorities.get(intent, self.default_priority)
+
+    def _lane(self, intent: str) -> Dict:
+        lane = self._lanes.get(intent)
+        if lane is None:
+            lane = {"queued": 0, "max_queued": 0, "admitted": 0, "rejected": 0, "expired": 0,
+                    "timed_out": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+            self._lanes[intent] = lane
+        return lane
+
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter[2].done())
+
+    def estimated_wait(self, priority: int) -> float:
+        """Seconds until a new request at `priority` would start, from the work queued at or above it."""
+        if self.running < self.concurrency and not self.queue_depth():
+            return 0.0
+        if self.avg_generation_seconds is None:
+            return 0.0  # no history yet, admit and learn
+        ahead = sum(1 for p, _, future, _ in self._waiters if p <= priority and not future.done())
+        # Work queued at or above this priority drains `concurrency` generations at a time
+        rounds = (ahead + 1) / self.concurrency
+        return rounds * self.avg_generation_seconds
+
+    def _record_generation(self, seconds: float) -> None:
+        if self.avg_generation_seconds is None:
+            self.avg_generation_seconds = seconds
+        else:
+            self.avg_generation_seconds = 0.8 * self.avg_generation_seconds + 0.2 * seconds
+
+    def _wake_next(self) -> None:
+        while self._waiters and self.running < self.concurrency:
+            _, _, future, _ = heapq.heappop(self._waiters)
+            if not future.done():  # skip waiters that expired or were cancelled
+                self.running += 1
+                future.set_result(None)
+
+    async def _acquire(self, intent: str, deadline_seconds: float) -> None:
+        lane = self._lane(intent)
+        priority = self.priority_for(intent)
+        if self.estimated_wait(priority) > deadline_seconds:
+            lane["rejected"] += 1
+            raise LLMDeadlineExceeded(f"LLM queue too long for {intent} to start within {deadline_seconds:.0f}s")
+
+        enqueued = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._seq), future, intent])
+        self._wake_next()  # takes a free slot straight away when nothing more urgent is queued
+        if not future.done():
+            lane["queued"] += 1
+            lane["max_queued"] = max(lane["max_queued"], lane["queued"])
+            try:
+                await asyncio.wait_for(asyncio.shield(future), deadline_seconds)
+            except asyncio.TimeoutError:
+                if not future.done():
+                    future.cancel()  # _wake_next skips it
+                    lane["expired"] += 1
+                    raise LLMDeadlineExceeded(f"{intent} waited {deadline_seconds:.0f}s without reaching the LLM")
+                # woken just as the deadline hit: the slot is ours, use it
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.running -= 1  # hand the slot we were given to the next waiter
+                    self._wake_next()
+                else:
+                    future.cancel()
+                raise
+            finally:
+                lane["queued"] -= 1
+
+        waited = time.monotonic() - enqueued
+        lane["admitted"] += 1
+        lane["wait_seconds_total"] += waited
+        lane["wait_seconds_max"] = max(lane["wait_seconds_max"], waited)
+
+    def _release(self, started: float) -> None:
+        self._record_generation(time.monotonic() - started)
+        self.running -= 1
+        self._wake_next()
+
+    @asynccontextmanager
+    async def slot(self, intent: str, deadline_seconds: Optional[float] = None) -> AsyncIterator[None]:
+        """Holds one LLM slot for the body (e.g. a whole token stream)."""
+        intent = self.lane_for(intent)
+        await self._acquire(intent, self.deadline_seconds if deadline_seconds is None else deadline_seconds)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(started)
+
+    async def run(self, intent: str, fn: Callable[[], Awaitable[Any]], deadline_seconds: Optional[float] = None) -> Any:
+        async with self.slot(intent, deadline_seconds):
+            if self.generation_timeout_seconds is None:
+                return await fn()
+            try:
+                return await asyncio.wait_for(fn(), self.generation_timeout_seconds)
+            except asyncio.TimeoutError:
+                self._lane(self.lane_for(intent))["timed_out"] += 1
+                raise LLMDeadlineExceeded(
+                    f"{intent} generation took over {self.generation_timeout_seconds:.0f}s and was abandoned") from None
+
+    def get_stats(self) -> Dict:
+        lanes = {}
+        for intent, lane in self._lanes.items():
+            lanes[intent] = {
+                "priority": self.priority_for(intent),
+                "queued": lane["queued"],
+                "max_queued": lane["max_queued"],
+                "admitted": lane["admitted"],
+                "rejected": lane["rejected"],
+                "expired": lane["expired"],
+                "timed_out": lane["timed_out"],
+                "avg_wait_ms": round(lane["wait_seconds_total"] / lane["admitted"] * 1000, 1) if lane["admitted"] else None,
+                "max_wait_ms": round(lane["wait_seconds_max"] * 1000, 1)
+            }
+        return {
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "queue_depth": self.queue_depth(),
+            "avg_generation_seconds": round(self.avg_generation_seconds, 3) if self.avg_generation_seconds else None,
+            "lanes": lanes
+        }
+
+
+llm_scheduler = LLMScheduler(
+    concurrency=settings.LLM_CONCURRENCY,
+    priorities=settings.LLM_PRIORITIES,
+    deadline_seconds=settings.LLM_QUEUE_DEADLINE_SECONDS,
+    generation_timeout_seconds=settings.LLM_GENERATION_TIMEOUT_SECONDS
+)
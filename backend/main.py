@@ -1,18 +1,40 @@
 # backend/main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from database import flight_data_collection
+from fastapi.responses import StreamingResponse
+from mongo_json import MongoJSONResponse
+from database import flight_data_collection, ensure_flight_data_collection, flight_filter, FLIGHT_ID_FIELD
 from models import FlightData
 from pymongo.errors import PyMongoError
-from bson import ObjectId
+from pydantic import ValidationError
 
-from langchain_utils import emergency_advisor_chain, risk_explanation_chain, copilot_chat_chain, format_flight_data_for_llm, status_update_chain, get_emergency_advisor_chain_with_validation, get_risk_explanation_chain_with_validation
+from flight_profiles import flight_profiles
+from llm_cache import llm_response_cache
+from llm_scheduler import llm_scheduler, LLMDeadlineExceeded
+from langchain_utils import copilot_chat_chain, format_flight_data_for_llm, get_emergency_advisor_chain_with_validation, get_risk_explanation_chain_with_validation, advisor_chains
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
-
-from search_utils import search_similar_flights, store_crash_flight_data
-from router_utils import classify_intent, get_flight_specific_chain, get_fallback_message
+import asyncio
+
+from config import settings
+import embedding_service
+import anomaly_engine
+import llm_client
+import embedding_cache
+from db_indexes import ensure_indexes, log_query_plans
+
+from search_utils import search_similar_flights, store_crash_flight_data, load_flight_vector_index, get_query_cache_stats
+from vector_index import flight_vector_index
+from ws_ingest import TelemetryCoalescer
+from telemetry_utils import latest_state_cache, trend_detector, on_samples_persisted, get_latest_flight_document
+from telemetry_utils import flight_event_bus, alert_publisher
+from event_bus import format_sse
+from chat_streaming import stream_chat_events
+from telemetry_utils import flight_data_to_document, insert_flight_documents, iter_batch_items, validate_flight_data, format_validation_error
+from flight_history import fetch_flight_history, parse_fields, to_columnar
+import flight_export
+from router_utils import classify_intent, get_flight_specific_chain, get_fallback_message, chat_chain_registry
 
 app = FastAPI()
 
@@ -30,23 +52,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-#data =  {"_id" : ObjectId("64f5d0a6e234f1463be9ab12") }
-# Helper to convert ObjectId to str for JSON serialization
-def serialize_object_id(data):
-    if isinstance(data, dict):
+# Warm up shared resources once per process so the first request doesn't pay for them
+@app.on_event("startup")
+async def startup_event():
+    # Indexes first - the warm-up queries below depend on them
+    if settings.ENSURE_INDEXES_ON_STARTUP:
+        try:
+            if await ensure_flight_data_collection():
+                print(f"✅ Created time-series collection {settings.FLIGHT_DATA_COLLECTION}")
+            await ensure_indexes()
+            if settings.LOG_QUERY_PLANS_ON_STARTUP:
+                await log_query_plans()
+        except PyMongoError as e:
+            print(f"❌ Could not verify MongoDB indexes: {e}")
+
+    if settings.EMBEDDING_WARMUP_ON_STARTUP:
+        # Model load is blocking (torch), run it off the event loop
+        await asyncio.to_thread(embedding_service.warm_up)
+
+    # Compile every prompt chain once, so no request pays for building one
+    built = chat_chain_registry.warm_up() + advisor_chains.warm_up()
+    print(f"✅ Prebuilt {built} LLM chains")
+
+    # Keep the Ollama model loaded: first ping loads it, later pings run whenever it sits idle
+    if settings.LLM_BACKEND == "ollama" and settings.OLLAMA_KEEP_WARM_INTERVAL_SECONDS > 0:
+        app.state.keep_warm_task = asyncio.create_task(llm_client.keep_warm_loop(settings.OLLAMA_KEEP_WARM_INTERVAL_SECONDS))
+
+    # Load crash embeddings into the resident similarity index
+    try:
+        await load_flight_vector_index()
+    except PyMongoError as e:
+        # Search retries the load lazily, so a cold database shouldn't block startup
+        print(f"❌ Could not load flight vector index at startup: {e}")
 
-        if "_id" in data and isinstance(data["_id"], ObjectId):
-            data["_id"] = str(data["_id"])
-            # {"_id": ObjectId("64f5...")} → {"_id": "64f5..."}
+    # Warm the latest-sample-per-flight cache
+    if settings.LATEST_STATE_WARM_ON_STARTUP:
+        try:
+            flights = await latest_state_cache.warm(flight_data_collection, FLIGHT_ID_FIELD)
+            print(f"✅ Warmed latest flight state for {flights} flights")
+        except Exception as e:
+            print(f"❌ Could not warm latest flight state: {e}")
 
-        #for nested dictionaries
-        for key, value in data.items():
-            data[key] = serialize_object_id(value)
 
-    #for dictionaries inside a list
-    elif isinstance(data, list):
-        data = [serialize_object_id(item) for item in data]
-    return data
+@app.on_event("shutdown")
+async def shutdown_event():
+    keep_warm_task = getattr(app.state, "keep_warm_task", None)
+    if keep_warm_task is not None:
+        keep_warm_task.cancel()
+    await llm_client.aclose_clients()
+    # Upserts since the last periodic save
+    flight_vector_index.persist()
 
 
 #Routes with End Points. 
@@ -54,20 +109,36 @@ def serialize_object_id(data):
 async def root():
     return {"message": "Welcome to the AI Aircraft Crash Prevention API!"}
 
+# Runtime metrics for shared in-process services
+@app.get("/stats/")
+async def get_stats():
+    return {
+        "embedding": embedding_service.get_stats(),
+        "embedding_cache": embedding_cache.get_stats(),
+        "vector_index": flight_vector_index.get_stats(),
+        "query_cache": get_query_cache_stats(),
+        "latest_state": latest_state_cache.get_stats(),
+        "anomaly_engine": anomaly_engine.get_stats(),
+        "trends": trend_detector.get_stats(),
+        "events": flight_event_bus.get_stats(),
+        "chains": {"chat": chat_chain_registry.get_stats(), "advisor": advisor_chains.get_stats()},
+        "flight_profiles": flight_profiles.get_stats(),
+        "llm_cache": llm_response_cache.get_stats(),
+        "llm_single_flight": llm_response_cache.single_flight.get_stats() if llm_response_cache.single_flight else None,
+        "llm_scheduler": llm_scheduler.get_stats(),
+        "llm_client": llm_client.get_stats()
+    }
+
 @app.post("/flight_data/")
 #flight_data is a json received from the simulated front end, that is validated/converted to a pydantic object of schema FlightData
 async def create_flight_data(flight_data: FlightData):
     try:
-        #convert the Pydantic object to python dictionary, to make some changes in the data. 
-        flight_data_dict = flight_data.model_dump()
-
-        # Ensure timestamp is stored as datetime object for MongoDB
-        if isinstance(flight_data_dict.get("timestamp"), str):
-            flight_data_dict["timestamp"] = datetime.fromisoformat(flight_data_dict["timestamp"].replace('Z', '+00:00'))
-
+        #convert the Pydantic object to the document stored in MongoDB
+        flight_data_dict = flight_data_to_document(flight_data)
 
         #flight_data_collection is the database accessed in database.py. Here, we are inserting the flight data dictionary directly into the MongoDB collection. 
         result = await flight_data_collection.insert_one(flight_data_dict)
+        await on_samples_persisted([flight_data_dict])
 
         # result.inserted_id is the ObjectId MongoDB generates.
         return {"id": str(result.inserted_id), "message": "Flight data recorded successfully"}
@@ -82,18 +153,266 @@ async def create_flight_data(flight_data: FlightData):
 
 
 
+@app.post("/flight_data/batch")
+async def create_flight_data_batch(request: Request):
+    """
+    Records many FlightData samples in one request.
+
+    Accepts a JSON array body, or an NDJSON stream (one sample per line) with
+    Content-Type application/x-ndjson. Every row is validated on its own and valid
+    rows are written with unordered insert_many in chunks, so bad rows are reported
+    back without failing the rest of the batch.
+    """
+    chunk_size = settings.FLIGHT_DATA_BATCH_CHUNK_SIZE
+    received = 0
+    inserted = 0
+    errors = []
+    chunk, chunk_rows = [], []
+
+    async def flush():
+        nonlocal inserted, chunk, chunk_rows
+        count, write_errors = await insert_flight_documents(chunk)
+        inserted += count
+        errors.extend({"row": chunk_rows[position], "error": message} for position, message in write_errors)
+        chunk, chunk_rows = [], []
+
+    try:
+        async for row, item in iter_batch_items(request):
+            received += 1
+            try:
+                flight_data = validate_flight_data(item)
+            except ValidationError as e:
+                errors.append({"row": row, "error": format_validation_error(e)})
+                continue
+
+            chunk.append(flight_data_to_document(flight_data))
+            chunk_rows.append(row)
+            if len(chunk) >= chunk_size:
+                await flush()
+
+        if chunk:
+            await flush()
+
+    except PyMongoError as e:
+        raise HTTPException(status_code=500, detail=f"Database error after {inserted} samples: {e}")
+    except ValueError as e:
+        # Body wasn't a JSON array (json.JSONDecodeError is a ValueError too)
+        raise HTTPException(status_code=400, detail=f"Invalid batch: {e}")
+
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "received": received,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors
+    }
+
+
+@app.websocket("/ws/flight_data/{flight_id}")
+async def flight_data_websocket(websocket: WebSocket, flight_id: str):
+    """
+    Persistent telemetry channel for one aircraft.
+
+    Each text frame is a FlightData JSON object. Frames are buffered and written in
+    time- or size-bounded batches; after every write the server sends
+    {"type": "ack", "last_persisted_timestamp": ..., ...}. Invalid frames get
+    {"type": "error", ...} and the connection stays open.
+    """
+    await websocket.accept()
+    send_lock = asyncio.Lock()  # acks come from the flusher task, errors from the receive loop
+
+    async def send(message: Dict[str, Any]):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    coalescer = TelemetryCoalescer(
+        insert_flight_documents,
+        on_flush=send,
+        max_batch=settings.WS_FLUSH_MAX_BATCH,
+        max_delay=settings.WS_FLUSH_INTERVAL_SECONDS,
+        max_pending=settings.WS_MAX_PENDING_FRAMES
+    )
+    coalescer.start()
+
+    frame = 0
+    try:
+        while True:
+            received = await websocket.receive()
+            if received["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(received.get("code", 1000))
+            # Text frames normally; binary frames are accepted when they hold UTF-8 JSON
+            message = received.get("text")
+            if message is None:
+                message = received.get("bytes") or b""
+            try:
+                flight_data = validate_flight_data(message)
+            except ValidationError as e:
+                await send({"type": "error", "frame": frame, "error": format_validation_error(e)})
+                frame += 1
+                continue
+
+            if flight_data.flight_id != flight_id:
+                await send({"type": "error", "frame": frame, "error": f"flight_id {flight_data.flight_id} does not match channel {flight_id}"})
+            else:
+                # Blocks while the buffer is full, which stops reading from the socket (backpressure)
+                await coalescer.put(flight_data_to_document(flight_data))
+            frame += 1
+
+    except WebSocketDisconnect:
+        print(f"Telemetry channel closed for {flight_id} after {frame} frames")
+    finally:
+        # Persist whatever is still buffered even if the client has gone away
+        await coalescer.close()
+
+
 @app.get("/flight_data/{flight_id}")
 async def get_flight_data_by_flight_id(flight_id: str):
-    cursor = flight_data_collection.find({"flight_id": flight_id}).sort("timestamp", -1).limit(1) # Get only the latest data point
+    # Served from the latest-state cache, falling back to MongoDB on a miss
+    doc = await get_latest_flight_document(flight_id)
 
-    data_list = []
-    async for doc in cursor:
-        data_list.append(serialize_object_id(doc))
-
-    if not data_list:
+    if doc is None:
         raise HTTPException(status_code=404, detail="Flight data not found")
 
-    return data_list[0] # Return just the latest data point
+    # ObjectId/datetime are converted while encoding, no pre-pass over the document
+    return MongoJSONResponse(doc) # Return just the latest data point
+
+
+@app.get("/flight_data/{flight_id}/history")
+async def get_flight_history(flight_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             fields: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None,
+                             shape: str = "rows"):
+    """
+    Returns a flight's samples in timestamp order, one page at a time.
+
+    - start / end: inclusive ISO-8601 time window
+    - fields: comma-separated paths (e.g. location.altitude_ft,speed); projected in MongoDB
+    - cursor: next_cursor from the previous page; keep requesting until it comes back null
+    - shape: "rows" (one object per sample) or "columnar" (one array per field)
+    """
+    if limit is None:
+        limit = settings.FLIGHT_HISTORY_DEFAULT_LIMIT
+    if not 0 < limit <= settings.FLIGHT_HISTORY_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {settings.FLIGHT_HISTORY_MAX_LIMIT}")
+    if shape not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail="shape must be 'rows' or 'columnar'")
+
+    try:
+        samples, next_cursor = await fetch_flight_history(
+            flight_data_collection, flight_filter(flight_id),
+            start=start, end=end, fields=parse_fields(fields), limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        # Unknown field or malformed cursor
+        raise HTTPException(status_code=400, detail=str(e))
+    except PyMongoError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+    response = {"flight_id": flight_id, "count": len(samples), "next_cursor": next_cursor}
+    if shape == "columnar":
+        response["columns"] = to_columnar(samples)
+    else:
+        response["samples"] = samples
+    return MongoJSONResponse(response)
+
+
+@app.get("/flight_data/{flight_id}/trends")
+async def get_flight_trends(flight_id: str):
+    """Rolling slopes, EWMAs and trend alerts over the flight's last few seconds of ingested samples."""
+    trends = trend_detector.get_trends(flight_id)
+    if trends is None:
+        raise HTTPException(status_code=404, detail=f"No recent samples ingested for flight ID: {flight_id}")
+    return {"flight_id": flight_id, **trends}
+
+
+@app.get("/flights/{flight_id}/events")
+async def flight_events(flight_id: str, request: Request):
+    """
+    Server-Sent Events stream for one aircraft, replacing client-side polling.
+
+    Events: "alert" / "clear" when the set of active anomalies changes (with deterministic
+    fallback advice), then "advice" once the LLM answer for that alert is ready. The first
+    event describes the flight's current state. Every subscriber shares the same computation.
+    """
+    queue = flight_event_bus.subscribe(flight_id)
+
+    async def stream():
+        try:
+            try:
+                latest = await get_latest_flight_document(flight_id)
+            except PyMongoError as e:
+                print(f"⚠️ No initial state for {flight_id} events: {e}")
+                latest = None
+            if latest is not None:
+                yield format_sse(alert_publisher.initial_event(latest))
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keepalive\n\n"  # SSE comment keeps proxies from closing an idle stream
+                    continue
+                yield format_sse(event)
+        finally:
+            flight_event_bus.unsubscribe(flight_id, queue)
+            alert_publisher.forget(flight_id)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/flight_data/{flight_id}/export")
+async def export_flight_data(flight_id: str, format: str = "ndjson",
+                             start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    Streams a whole flight (or a start/end window) for offline analysis.
+    format: "ndjson", "arrow" (Arrow IPC stream) or "parquet". Arrow and Parquet need pyarrow.
+    """
+    if format not in flight_export.EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(flight_export.EXPORT_MEDIA_TYPES)}")
+    if format != "ndjson" and flight_export.pa is None:
+        raise HTTPException(status_code=501, detail="pyarrow is not installed on the server - use format=ndjson")
+
+    batches = flight_export.iter_flight_batches(
+        flight_data_collection, flight_filter(flight_id), start, end, settings.FLIGHT_EXPORT_BATCH_SIZE
+    )
+    return StreamingResponse(
+        flight_export.stream_export(batches, format),
+        media_type=flight_export.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{flight_id}.{format}"'}
+    )
+
+
+async def generate_pilot_advice(flight_data_dict: Dict[str, Any], anomalies: list, flight_id: str = None) -> str:
+    """
+    Runs the emergency advisor chain for one sample, with detected anomalies added to its warnings.
+    Shared by /advise_pilot/ and the advice pushed on /flights/{flight_id}/events.
+    """
+    # Format the nested data for the LLM prompt
+    formatted_input = format_flight_data_for_llm(flight_data_dict)
+    if anomalies:
+        # Detected anomalies ride along with the aircraft's own warnings
+        detected = anomaly_engine.describe_anomalies(anomalies)
+        formatted_input["warnings"] = detected if formatted_input["warnings"] == "None" else f"{formatted_input['warnings']}; {detected}"
+
+    # 🛑 KAL801 flights get the grounded, validated chain; everyone else the standard advisor (both prebuilt)
+    flight_id_for_chain = flight_data_dict.get("flight_id", flight_id)
+    emergency_chain = get_emergency_advisor_chain_with_validation(flight_id_for_chain)
+    return await emergency_chain.ainvoke(formatted_input)
+
+
+async def generate_pushed_advice(flight_data_dict: Dict[str, Any], anomalies: list) -> str:
+    # Background advice waits behind every interactive call (its own lowest-priority lane),
+    # so a pilot's /advise_pilot/ is never refused because of work nobody asked for
+    with llm_scheduler.lane("pushed_advice"):
+        return await generate_pilot_advice(flight_data_dict, anomalies)
+
+
+# Ingest-triggered flight events: deterministic fallback text right away, LLM advice when it completes
+alert_publisher.fallback_fn = get_fallback_message
+if settings.EVENTS_LLM_ADVICE:
+    alert_publisher.advice_fn = generate_pushed_advice
 
 
 # NEW ENDPOINT: Emergency Advisor Chain
@@ -108,33 +427,27 @@ async def advise_pilot(flight_data: FlightData = None, flight_id: str = None):
             # Use provided flight data
             flight_data_dict = flight_data.model_dump()
         elif flight_id:
-            # Fetch latest flight data from MongoDB for the given flight ID
-            cursor = flight_data_collection.find({"flight_id": flight_id}).sort("timestamp", -1).limit(1)
-            data_list = []
-            async for doc in cursor:
-                data_list.append(doc)
+            # Fetch latest flight data for the given flight ID (latest-state cache, then MongoDB)
+            flight_data_dict = await get_latest_flight_document(flight_id)
             
-            if not data_list:
+            if flight_data_dict is None:
                 raise HTTPException(status_code=404, detail=f"No flight data found for flight ID: {flight_id}")
-            
-            flight_data_dict = data_list[0]
         else:
             raise HTTPException(status_code=400, detail="Either flight_data or flight_id must be provided")
 
-        # Format the nested data for the LLM prompt
-        formatted_input = format_flight_data_for_llm(flight_data_dict)
+        # Deterministic rules first - a nominal sample never reaches the LLM.
+        # Trend alerts come from the ingest-side ring buffers, no history read needed.
+        anomalies = anomaly_engine.detect(flight_data_dict)
+        anomalies += trend_detector.get_alerts(flight_data_dict.get("flight_id", flight_id))
+        if not anomaly_engine.should_call_llm(anomalies, settings.ANOMALY_SHORT_CIRCUIT):
+            return {"advice": anomaly_engine.NOMINAL_MESSAGE, "anomalies": []}
 
-        # 🛑 Use KAL801-specific chain with validation if flight_id is KAL801
-        flight_id_for_chain = flight_data_dict.get("flight_id", flight_id)
-        if flight_id_for_chain == "KAL801":
-            # Use KAL801-specific emergency advisor with grounded context
-            emergency_chain = get_emergency_advisor_chain_with_validation("KAL801")
-            advice = await emergency_chain(formatted_input)
-        else:
-            # Use standard emergency advisor chain
-            advice = await emergency_advisor_chain.ainvoke(formatted_input)
-
-        return {"advice": advice}
+        try:
+            advice = await generate_pilot_advice(flight_data_dict, anomalies, flight_id)
+        except LLMDeadlineExceeded:
+            # LLM queue can't start this in time: deterministic advice now beats LLM advice later
+            advice = get_fallback_message(flight_data_dict.get("flight_id", flight_id), "emergency")
+        return {"advice": advice, "anomalies": anomalies}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating advice: {e}")
 
@@ -196,29 +509,33 @@ async def chat_status_update(request: Dict[str, str]):
 
 # NEW ENDPOINT: Risk Explanation Chain
 @app.post("/explain_risk/")
-async def explain_risk(flight_data: FlightData, anomaly_description: str):
+async def explain_risk(flight_data: FlightData, anomaly_description: Optional[str] = None):
     """
     Explains why a flight situation is unsafe, given flight data and a detected anomaly.
+    anomaly_description is optional - by default the anomaly engine describes what it detected.
     """
     try:
         flight_data_dict = flight_data.model_dump()
+
+        anomalies = anomaly_engine.detect(flight_data_dict) + trend_detector.get_alerts(flight_data_dict["flight_id"])
+        if not anomaly_description and not anomaly_engine.should_call_llm(anomalies, settings.ANOMALY_SHORT_CIRCUIT):
+            return {"explanation": anomaly_engine.NOMINAL_MESSAGE, "anomalies": []}
+
         formatted_input = format_flight_data_for_llm(flight_data_dict)
         # Format function converts the dictionary to flat, having single key value pairs. This is needed because the LangChain prompt expects a flat input, not deeply nested structures.
 
         # Add the anomaly description to the input for the risk explanation chain
-        formatted_input["anomaly_description"] = anomaly_description
+        formatted_input["anomaly_description"] = anomaly_description or anomaly_engine.describe_anomalies(anomalies) or "None detected"
 
-        # 🛑 Use KAL801-specific chain with validation if flight_id is KAL801
+        # 🛑 KAL801 flights get the grounded, validated chain; everyone else the standard one (both prebuilt)
         flight_id_for_chain = formatted_input.get("flight_id", "Unknown")
-        if flight_id_for_chain == "KAL801":
-            # Use KAL801-specific risk explanation with grounded context
-            risk_chain = get_risk_explanation_chain_with_validation("KAL801")
-            explanation = await risk_chain(formatted_input)
-        else:
-            # Use standard risk explanation chain
-            explanation = await risk_explanation_chain.ainvoke(formatted_input)
+        risk_chain = get_risk_explanation_chain_with_validation(flight_id_for_chain)
+        try:
+            explanation = await risk_chain.ainvoke(formatted_input)
+        except LLMDeadlineExceeded:
+            explanation = f"{get_fallback_message(flight_id_for_chain)}\nDetected: {formatted_input['anomaly_description']}"
 
-        return {"explanation": explanation}
+        return {"explanation": explanation, "anomalies": anomalies}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error explaining risk: {e}")
 
@@ -229,7 +546,11 @@ async def copilot_chat(question: str):
     Allows pilots to ask natural language questions to an AI copilot.
     """
     try:
-        answer = await copilot_chat_chain.ainvoke({"question": question})
+        try:
+            answer = await copilot_chat_chain.ainvoke({"question": question})
+        except LLMDeadlineExceeded:
+            # Lowest-priority lane: shed load rather than queue behind emergencies
+            answer = get_fallback_message("Unknown")
         return {"answer": answer}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in copilot chat: {e}")
@@ -237,9 +558,10 @@ async def copilot_chat(question: str):
 
 # LESSON 6: Search Similar Crashes
 @app.get("/similar_crashes/")
-async def similar_crashes(query: str, top_k: int = 3):
+async def similar_crashes(query: str, top_k: int = 3, exact: bool = False):
+    # exact=true bypasses the ANN backend so its recall can be measured against brute force
     try:
-        results = await search_similar_flights(query_summary=query, top_k=top_k)
+        results = await search_similar_flights(query_summary=query, top_k=top_k, exact=exact)
         return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error finding similar crashes: {e}")
@@ -354,45 +676,43 @@ async def chat_system_status(request: Dict[str, str]):
         }
         return fallback_response
 
-fallback_messages = {
-    "KAL801": (
-        "CRITICAL TERRAIN ALERT\n"
-        "Flight KAL801 is descending below glide slope near Guam. "
-        "Initiate an immediate go-around. Monitor altitude closely and cross-check terrain avoidance systems."
-    ),
-    "CRASH_KAL801": (
-        "HISTORICAL KAL801 REFERENCE\n"
-        "This flight pattern matches Korean Air Flight 801 (1997 Guam crash). "
-        "Immediate terrain pull-up required. Verify glideslope status and initiate missed approach procedures."
-    ),
-    "CRASH_THY1951": (
-        "STALL ALERT: Faulty altitude reading detected. Add thrust immediately and prepare for go-around! "
-        "Cross-check radio altimeters and monitor airspeed closely."
-    ),
-    "CRASH_AAR214": (
-        "LOW SPEED APPROACH WARNING\n"
-        "Flight 214 is approaching SFO at dangerously low speed. Check autothrottle status and increase thrust immediately. "
-        "Visual approach monitoring required."
-    ),
-    "CRASH_COLGAN3407": (
-        "STALL WARNING: Airspeed monitoring critical! "
-        "Flight 3407 pattern matches Colgan Air crash (2009 Buffalo). "
-        "Monitor airspeed during approach, maintain sterile cockpit, and be prepared for immediate stall recovery procedures."
-    ),
-    "CRASH_AF447": (
-        "PITOT TUBE WARNING: Unreliable airspeed detected! "
-        "Flight 447 pattern matches Air France crash (2009 Atlantic). "
-        "Follow unreliable airspeed procedures, maintain pitch and thrust, and be alert for high-altitude stall conditions."
-    ),
-    "TURKISH1951": (
-        "AUTOPILOT MALFUNCTION\n"
-        "Flight 1951 shows radio altimeter discrepancies. Disengage autopilot, manually stabilize descent, and confirm altitude using backup instruments."
-    ),
-    "ASIANA214": (
-        "LOW SPEED APPROACH WARNING\n"
-        "Flight 214 is approaching SFO at dangerously low speed. Increase thrust and adjust pitch angle immediately. Visual confirmation advised."
+# Streaming variants of the chat endpoints: the deterministic fallback is the first SSE frame,
+# then LLM tokens as they arrive, then a final "done" frame (see chat_streaming.stream_chat_events)
+def stream_chat_response(request: Dict[str, str], intent: str = None) -> StreamingResponse:
+    flight_id = request.get("flight_id", "Unknown")
+    message = request.get("message", "")
+    if intent is None:
+        intent = classify_intent(message)
+    print(f"Streaming {intent} response for flight_id: {flight_id}, message: {message}")
+
+    chain = get_flight_specific_chain(flight_id, intent)
+    events = stream_chat_events(
+        chain,
+        {"flight_id": flight_id, "message": message},
+        fallback=get_fallback_message(flight_id, intent),
+        intent=intent,
+        timeout=settings.CHAT_TIMEOUT_SECONDS
     )
-}
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/chat/status_update/stream")
+async def chat_status_update_stream(request: Dict[str, str]):
+    """Streaming /chat/status_update/ - intent is classified from the message as usual."""
+    return stream_chat_response(request)
+
+
+@app.post("/chat/divert_airport/stream")
+async def chat_divert_airport_stream(request: Dict[str, str]):
+    """Streaming /chat/divert_airport/."""
+    return stream_chat_response(request, "divert_airport")
+
+
+@app.post("/chat/system_status/stream")
+async def chat_system_status_stream(request: Dict[str, str]):
+    """Streaming /chat/system_status/."""
+    return stream_chat_response(request, "system_status")
 
 if __name__ == "__main__":
     import uvicorn
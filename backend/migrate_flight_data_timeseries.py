@@ -0,0 +1,122 @@
+# backend/migrate_flight_data_timeseries.py => Copies flight_data into a MongoDB time-series collection.
+#
+# Usage:
+#   python migrate_flight_data_timeseries.py
+#   python migrate_flight_data_timeseries.py --source flight_data --target flight_data_ts --batch-size 5000
+#
+# MongoDB can't convert or rename a collection into a time-series one, so the samples are
+# copied into a new collection. Once the copy finishes, point the backend at it:
+#   FLIGHT_DATA_COLLECTION=flight_data_ts
+#   FLIGHT_DATA_TIMESERIES=true
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from database import db, add_timeseries_meta, ensure_flight_data_collection
+
+
+def resume_query(newest: dict) -> dict:
+    """
+    Everything after `newest` in (timestamp, _id) order. Resuming on the timestamp alone
+    would skip samples that share the newest copied timestamp (other flights at the same
+    instant, or a batch boundary that fell between tied samples).
+    """
+    if not newest:
+        return {}
+    return {"$or": [
+        {"timestamp": {"$gt": newest["timestamp"]}},
+        {"timestamp": newest["timestamp"], "_id": {"$gt": newest["_id"]}}
+    ]}
+
+
+async def copy_documents(source_collection, target_collection, batch_size: int) -> dict:
+    """
+    Copies `source_collection` into `target_collection` in (timestamp, _id) order.
+    Batches are inserted in order, so what is already in the target is always a prefix of
+    that order and a re-run resumes right after its newest (timestamp, _id).
+
+    Returns:
+        dict: copied / skipped counts
+    """
+    copied = skipped = 0
+    batch = []
+
+    newest = await target_collection.find_one({}, sort=[("timestamp", -1), ("_id", -1)])
+    if newest:
+        print(f"↪️ Resuming after {newest['timestamp'].isoformat()} / {newest['_id']}")
+
+    async def flush():
+        nonlocal copied, skipped
+        pending = list(batch)
+        while pending:
+            try:
+                result = await target_collection.insert_many(pending, ordered=True)
+                copied += len(result.inserted_ids)
+                break
+            except BulkWriteError as e:
+                # Ordered: everything before the failing document went in, nothing after it
+                copied += e.details.get("nInserted", 0)
+                write_errors = e.details.get("writeErrors", [])
+                if not write_errors:
+                    raise
+                skipped += 1
+                pending = pending[write_errors[0]["index"] + 1:]
+        batch.clear()
+        print(f"📦 {copied} copied, {skipped} skipped...")
+
+    cursor = source_collection.find(resume_query(newest)).sort([("timestamp", 1), ("_id", 1)])
+    async for document in cursor:
+        # Time-series collections reject documents without a BSON date timeField
+        if not isinstance(document.get("timestamp"), datetime):
+            skipped += 1
+            continue
+        batch.append(add_timeseries_meta(document))
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    return {"copied": copied, "skipped": skipped}
+
+
+async def migrate(source: str, target: str, batch_size: int) -> dict:
+    """
+    Streams every document from `source` into the time-series collection `target`.
+    Time-series collections don't enforce unique _ids, so a re-run resumes after the newest
+    sample already in `target` instead of relying on duplicate-key errors.
+
+    Returns:
+        dict: copied / skipped counts and elapsed seconds
+    """
+    if await ensure_flight_data_collection(target, timeseries=True):
+        print(f"✅ Created time-series collection {target}")
+
+    start = time.perf_counter()
+    result = await copy_documents(db[source], db[target], batch_size)
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Copy flight_data into a time-series collection")
+    parser.add_argument("--source", default="flight_data")
+    parser.add_argument("--target", default="flight_data_ts")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    try:
+        result = await migrate(args.source, args.target, args.batch_size)
+    except PyMongoError as e:
+        print(f"❌ Migration failed: {e}")
+        return
+
+    print(f"🎉 Copied {result['copied']} samples ({result['skipped']} skipped) in {result['seconds']}s")
+    print(f"👉 Now set FLIGHT_DATA_COLLECTION={args.target} and FLIGHT_DATA_TIMESERIES=true")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
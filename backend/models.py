@@ -1,7 +1,24 @@
 # backend/models.py
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timezone
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """
+    Aware datetimes (e.g. the frontend's toISOString() "Z" suffix) converted to naive UTC,
+    the form MongoDB hands back - so stored and freshly ingested timestamps compare.
+    """
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def utc_timestamp(value: datetime) -> float:
+    """Epoch seconds, reading a naive datetime as UTC (datetime.timestamp() would use local time)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
 
 class Location(BaseModel):
     latitude: float
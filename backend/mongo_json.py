@@ -0,0 +1,36 @@
+# backend/mongo_json.py
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def json_default(value: Any):
+    """
+    Called by the encoder only for values it can't handle natively, so ObjectId is
+    converted during the single encoding pass instead of in a copy of the document beforehand.
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encodes MongoDB documents (ObjectId, datetime, nested dicts/lists) to JSON bytes."""
+    # orjson encodes datetime natively (same ISO-8601 form as isoformat()), NumPy values
+    # with OPT_SERIALIZE_NUMPY, and NaN/inf as null - only ObjectId reaches json_default
+    return orjson.dumps(content, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class MongoJSONResponse(JSONResponse):
+    """
+    JSON response that accepts raw MongoDB documents.
+
+    Return it directly from endpoints that hand back Mongo documents
+    (return MongoJSONResponse(doc)); FastAPI then skips jsonable_encoder's
+    recursive walk and the document is encoded exactly once.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -2,11 +2,15 @@
 from typing import Dict, Any, Optional
 import re
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_community.llms import Ollama
+from llm_client import get_llm
 from langchain_core.output_parsers import StrOutputParser
 
+from chain_registry import ChainRegistry
+from langchain_utils import compile_chain
+from flight_profiles import flight_profiles
+
 # Load the LLM model
-llm = Ollama(model="gemma:2b")
+llm = get_llm()  # same pooled instance as langchain_utils.llm
 
 def classify_intent(message: str) -> str:
     """
@@ -60,41 +64,30 @@ def classify_intent(message: str) -> str:
 def get_flight_specific_chain(flight_id: str, intent: str = "status_update") -> Any:
     """
     Returns the appropriate LangChain chain based on flight ID and intent.
+    Chains are built once per (profile, intent) and reused - see chat_chain_registry below.
+    Flights with a profile in flight_profiles.json get grounded, airport-validated chains.
     
     Args:
         flight_id: The flight identifier
         intent: The classified intent
         
     Returns:
-        LangChain chain for the specific flight and intent
+        LangChain chain for the specific flight and intent (flight_id is passed when invoking it)
     """
-    
-    # Flight-specific emergency chains
-    if intent == "emergency":
-        return get_emergency_chain(flight_id)
-    elif intent == "divert_airport":
-        return get_divert_airport_chain(flight_id)
-    elif intent == "similar_crashes":
-        return get_similar_crashes_chain(flight_id)
-    elif intent == "system_status":
-        return get_system_status_chain(flight_id)
-    else:
-        return get_status_update_chain(flight_id)
+    if intent not in chat_chain_registry.builders:
+        intent = "status_update"
+    return chat_chain_registry.get(flight_id, intent)
 
-def get_emergency_chain(flight_id: str) -> Any:
+def build_emergency_chain(profile: str) -> Any:
     """Emergency-specific chain with highest priority responses."""
     
     emergency_prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""
+        ("system", """
 You are an AI copilot in a CRITICAL EMERGENCY situation for flight {flight_id}.
 Respond with URGENT, IMMEDIATE actions only. Use CAPS for critical warnings.
 
 ## Flight-Specific Emergency Context:
-- **KAL801/CRASH_KAL801**: Terrain proximity, glide slope failure, Guam approach
-- **CRASH_THY1951**: Turkish Airlines Flight 1951 (2009) - Faulty radio altimeter triggered autothrottle to cut engine power to idle, resulting in aerodynamic stall on approach to Amsterdam. 9 fatalities, 126 survivors.
-- **CRASH_AAR214**: Asiana Airlines Flight 214 (2013) - Low-speed approach due to autothrottle disengagement and inadequate pilot monitoring during visual approach to San Francisco. 3 fatalities, 304 survivors.
-- **TURKISH1951**: Radio altimeter failure, autopilot mismanagement, approach speed issues
-- **ASIANA214**: Low-speed manual approach failure, poor pilot monitoring, landing gear issues
+{context}
 
 ## Emergency Response Format:
 CRITICAL EMERGENCY
@@ -111,67 +104,18 @@ CONTACT ATC IMMEDIATELY
         ("human", "Flight ID: {flight_id}\nEmergency Message: {message}")
     ])
     
-    return emergency_prompt | llm | StrOutputParser()
+    return compile_chain(emergency_prompt, profile, "emergency", llm)
 
-def get_divert_airport_chain(flight_id: str) -> Any:
+def build_divert_airport_chain(profile: str) -> Any:
     """Divert airport chain for landing/approach scenarios."""
     
-    # 🛑 KAL801-specific divert airport chain with Mariana Islands context
-    if flight_id in ["KAL801", "CRASH_KAL801"]:
-        kal801_divert_prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""
-You are an AI copilot assisting with airport diversion for flight {flight_id}.
-Provide specific airport recommendations and approach procedures.
-
-CRITICAL FLIGHT CONTEXT - KAL801:
-Flight ID: KAL801
-Location: Guam, Mariana Islands, Pacific Ocean
-Airport: Guam International Airport (GUM)
-⚠️ RESTRICTION: Only suggest airports within Mariana Islands region. Do not hallucinate airports like San Francisco, Los Angeles, Oakland, San Jose, Sacramento, or any mainland US airports.
-
-MARIANA ISLANDS DIVERSION AIRPORTS:
-• Andersen AFB (PGUA) - 8 NM from GUM, Ceiling: 800ft, Visibility: 2 miles
-• Rota International (ROP) - 45 NM from GUM, Ceiling: 1200ft, Visibility: 3 miles  
-• Saipan International (SPN) - 120 NM from GUM, Ceiling: 1500ft, Visibility: 4 miles
-
-## Response Format:
-DIVERSION RECOMMENDATION:
-[Recommended Mariana Islands airport with distance and approach type]
-
-APPROACH PROCEDURES:
-- Runway: [specific runway]
-- Approach: [ILS/VOR/Visual]
-- Minimums: [ceiling/visibility from data above]
-
-ALTERNATIVES:
-[List of backup Mariana Islands airports only]
-"""),
-            ("human", "Flight ID: {flight_id}\nDiversion Request: {message}")
-        ])
-        
-        # Create chain with validation
-        chain = kal801_divert_prompt | llm | StrOutputParser()
-        
-        # Add validation wrapper for KAL801
-        async def validated_chain(input_data):
-            response = await chain.ainvoke(input_data)
-            # Import validation function
-            from langchain_utils import validate_kal801_airport_suggestion
-            return validate_kal801_airport_suggestion(response)
-        
-        return validated_chain
-    else:
-        # Standard divert airport chain for other flights
-        divert_prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""
+    divert_prompt = ChatPromptTemplate.from_messages([
+        ("system", """
 You are an AI copilot assisting with airport diversion for flight {flight_id}.
 Provide specific airport recommendations and approach procedures.
 
 ## Flight-Specific Diversion Context:
-- **KAL801/CRASH_KAL801**: Guam area - consider Andersen AFB, Saipan International
-- **CRASH_AAR214**: San Francisco area - consider Oakland, San Jose, Sacramento
-- **TURKISH1951**: Amsterdam area - consider Rotterdam, Eindhoven, Brussels
-- **ASIANA214**: San Francisco area - consider Oakland, San Jose, Sacramento
+{context}
 
 ## Response Format:
 DIVERSION RECOMMENDATION:
@@ -185,75 +129,21 @@ APPROACH PROCEDURES:
 ALTERNATIVES:
 [List of backup airports]
 """),
-            ("human", "Flight ID: {flight_id}\nDiversion Request: {message}")
-        ])
-        
-        return divert_prompt | llm | StrOutputParser()
+        ("human", "Flight ID: {flight_id}\nDiversion Request: {message}")
+    ])
 
-def get_similar_crashes_chain(flight_id: str) -> Any:
+    return compile_chain(divert_prompt, profile, "divert_airport", llm)
+
+def build_similar_crashes_chain(profile: str) -> Any:
     """Similar crashes chain for historical reference."""
     
-    # 🛑 KAL801-specific grounded context for similar crashes
-    if flight_id in ["KAL801", "CRASH_KAL801"]:
-        kal801_system_prompt = f"""
+    similar_prompt = ChatPromptTemplate.from_messages([
+        ("system", """
 You are an AI copilot providing historical crash analysis for flight {flight_id}.
 Reference relevant past incidents and lessons learned.
 
-CRITICAL FLIGHT CONTEXT - KAL801:
-Flight ID: KAL801
-Location: Guam, Pacific Ocean
-Airport: Guam International Airport (GUM)
-Date: August 6, 1997
-Situation: Night approach with non-functional ILS glideslope
-Critical Warnings: Terrain alert near Nimitz Hill, descent below minimum safe altitude
-⚠️ RESTRICTION: Only reference Guam-related incidents. Do not hallucinate airports like San Francisco, Los Angeles, or any mainland US airports.
-
 ## Flight-Specific Historical Context:
-- **KAL801/CRASH_KAL801**: 1997 Guam crash - terrain proximity, glide slope failure, non-functional ILS, night approach
-- **CRASH_AAR214**: 2013 San Francisco crash - low-speed approach, autothrottle disengagement
-- **CRASH_THY1951**: 2009 Amsterdam crash - radio altimeter, autopilot issues
-- **ASIANA214**: 2013 San Francisco crash - low-speed approach, crew monitoring
-
-## Response Format:
-HISTORICAL REFERENCE:
-[Relevant past incident with key factors - FOCUS ON GUAM/TERRAIN PROXIMITY]
-
-LESSONS LEARNED:
-- [Lesson 1]
-- [Lesson 2]
-- [Lesson 3]
-
-APPLICABLE PROCEDURES:
-[Specific procedures from historical incident]
-"""
-        similar_prompt = ChatPromptTemplate.from_messages([
-            ("system", kal801_system_prompt),
-            ("human", "Flight ID: {flight_id}\nHistorical Query: {message}")
-        ])
-        
-        # Create chain with validation
-        chain = similar_prompt | llm | StrOutputParser()
-        
-        # Add validation wrapper for KAL801
-        async def validated_chain(input_data):
-            response = await chain.ainvoke(input_data)
-            # Import validation function
-            from langchain_utils import validate_kal801_airport_suggestion
-            return validate_kal801_airport_suggestion(response)
-        
-        return validated_chain
-    else:
-        # Standard similar crashes chain for other flights
-        similar_prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""
-You are an AI copilot providing historical crash analysis for flight {flight_id}.
-Reference relevant past incidents and lessons learned.
-
-## Flight-Specific Historical Context:
-- **KAL801/CRASH_KAL801**: 1997 Guam crash - terrain proximity, glide slope failure
-- **CRASH_AAR214**: 2013 San Francisco crash - low-speed approach, autothrottle disengagement
-- **TURKISH1951**: 2009 Amsterdam crash - radio altimeter, autopilot issues
-- **ASIANA214**: 2013 San Francisco crash - low-speed approach, crew monitoring
+{context}
 
 ## Response Format:
 HISTORICAL REFERENCE:
@@ -267,24 +157,21 @@ LESSONS LEARNED:
 APPLICABLE PROCEDURES:
 [Specific procedures from historical incident]
 """),
-            ("human", "Flight ID: {flight_id}\nHistorical Query: {message}")
-        ])
-        
-        return similar_prompt | llm | StrOutputParser()
+        ("human", "Flight ID: {flight_id}\nHistorical Query: {message}")
+    ])
+
+    return compile_chain(similar_prompt, profile, "similar_crashes", llm)
 
-def get_system_status_chain(flight_id: str) -> Any:
+def build_system_status_chain(profile: str) -> Any:
     """System status chain for instrument/system checks."""
     
     system_prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""
+        ("system", """
 You are an AI copilot providing system status analysis for flight {flight_id}.
 Focus on instrument readings, system health, and operational status.
 
 ## Flight-Specific System Context:
-- **KAL801/CRASH_KAL801**: Monitor glide slope, altimeter, terrain warning systems
-- **CRASH_AAR214**: Check autothrottle status, airspeed indicators, approach configuration
-- **TURKISH1951**: Check radio altimeter, autopilot, approach systems
-- **ASIANA214**: Verify speed indicators, landing gear, auto-throttle
+{context}
 
 ## Response Format:
 SYSTEM STATUS:
@@ -305,37 +192,18 @@ RECOMMENDATIONS:
         ("human", "Flight ID: {flight_id}\nSystem Query: {message}")
     ])
     
-    return system_prompt | llm | StrOutputParser()
+    return compile_chain(system_prompt, profile, "system_status", llm)
 
-def get_status_update_chain(flight_id: str) -> Any:
+def build_status_update_chain(profile: str) -> Any:
     """Default status update chain for general queries."""
     
     status_prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""
+        ("system", """
 You are an AI copilot trained for aviation emergency support. 
 Respond to pilot queries with clear, urgent, and structured advice when risks are detected. 
 
-## Flight-Specific Emergency Context:
-- **KAL801**: Known terrain proximity issues, descent below glide slope, mountainous approach
-- **CRASH_KAL801**: Korean Air Flight 801 (1997) - Controlled flight into terrain on Guam approach due to descent below minimum safe altitude, non-functional glideslope, and poor crew resource management. 229 fatalities, 25 survivors.
-- **CRASH_THY1951**: Turkish Airlines Flight 1951 (2009) - Faulty radio altimeter triggered autothrottle to cut engine power to idle, resulting in aerodynamic stall on approach to Amsterdam. 9 fatalities, 126 survivors.
-- **CRASH_AAR214**: Asiana Airlines Flight 214 (2013) - Low-speed approach due to autothrottle disengagement and inadequate pilot monitoring during visual approach to San Francisco. 3 fatalities, 304 survivors.
-- **TURKISH1951**: Radio altimeter failure, autopilot mismanagement, approach speed issues
-- **ASIANA214**: Low-speed manual approach failure, poor pilot monitoring, landing gear issues
-
-## Historical Crash Reference - KAL801:
-- **Date**: August 6, 1997
-- **Location**: Guam International Airport
-- **Primary Cause**: Pilot error and navigational aid failure
-- **Key Factors**: Non-precision approach with out-of-service glideslope, descent below minimum safe altitude, captain fatigue, pilot misinterpretation of navigation signals
-- **AI Copilot Solution**: Detect descent below safe altitude, issue immediate terrain pull-up alert, prompt for missed approach when glideslope signal weak/absent, enforce crew cross-checks
-
-## Historical Crash Reference - THY1951:
-- **Date**: February 25, 2009
-- **Location**: Near Amsterdam Schiphol Airport, Netherlands
-- **Primary Cause**: Faulty radio altimeter and pilot error
-- **Key Factors**: Faulty left radio altimeter, autothrottle reduced thrust to idle, high pilot workload, improper stall recovery
-- **AI Copilot Solution**: Cross-check multiple sensor inputs, detect altimeter anomalies, monitor airspeed and flight path, alert to impending stall, take corrective action if pilots fail to respond
+## Flight-Specific Context:
+{context}
 
 ## Emergency Keyword Detection:
 Monitor for these keywords in pilot messages: "warning", "alert", "system failure", "low speed", "terrain", "altimeter", "autopilot", "approach", "landing gear", "glideslope", "minimum altitude", "terrain pull-up"
@@ -347,32 +215,24 @@ Monitor for these keywords in pilot messages: "warning", "alert", "system failur
 - Prioritize crew safety. Do NOT sound passive or unsure.
 - Use CAPS for critical warnings and immediate actions
 - Structure response with: System Status → Urgent Recommendation → Next Steps
-- Reference historical incidents when relevant (e.g., "Similar to KAL801 Guam crash - immediate terrain pull-up required")
+- Reference the historical incidents in the flight-specific context when relevant
 - Avoid using ** or * markdown formatting - use plain text instead
 
-## Flight-Specific Recommendations:
-- **KAL801/CRASH_KAL801**: Emphasize terrain proximity, immediate go-around, altitude management, glideslope verification, crew cross-checks
-- **CRASH_THY1951**: Focus on radio altimeter cross-checking, autothrottle monitoring, airspeed awareness, stall recovery procedures, immediate thrust application
-- **CRASH_AAR214**: Highlight approach speed monitoring, landing gear verification, manual landing procedures
-- **TURKISH1951**: Focus on radio altimeter backup procedures, manual approach, speed control
-- **ASIANA214**: Highlight approach speed monitoring, landing gear verification, manual landing procedures
-
 Respond based on this flight ID and query.
 """),
         ("human", "Flight ID: {flight_id}\nPilot Message: {message}")
     ])
     
-    return status_prompt | llm | StrOutputParser()
-
-# Flight-specific fallback messages
-FLIGHT_FALLBACKS = {
-    "KAL801": "CRITICAL TERRAIN ALERT\nFlight KAL801 is descending below glide slope near Guam. Initiate an immediate go-around. Monitor altitude closely and cross-check terrain avoidance systems.",
-    "CRASH_KAL801": "HISTORICAL KAL801 REFERENCE\nThis flight pattern matches Korean Air Flight 801 (1997 Guam crash). Immediate terrain pull-up required. Verify glideslope status and initiate missed approach procedures.",
-    "CRASH_THY1951": "STALL ALERT: Faulty altitude reading detected. Add thrust immediately and prepare for go-around! Cross-check radio altimeters and monitor airspeed closely.",
-    "CRASH_AAR214": "LOW SPEED APPROACH WARNING\nFlight 214 is approaching SFO at dangerously low speed. Check autothrottle status and increase thrust immediately. Visual approach monitoring required.",
-    "TURKISH1951": "AUTOPILOT MALFUNCTION\nFlight 1951 shows radio altimeter discrepancies. Disengage autopilot, manually stabilize descent, and confirm altitude using backup instruments.",
-    "ASIANA214": "LOW SPEED APPROACH WARNING\nFlight 214 is approaching SFO at dangerously low speed. Increase thrust and adjust pitch angle immediately. Visual confirmation advised."
-}
+    return compile_chain(status_prompt, profile, "status_update", llm)
+
+# One compiled chain per (profile, intent); flight_id is a prompt variable
+chat_chain_registry = ChainRegistry({
+    "emergency": build_emergency_chain,
+    "divert_airport": build_divert_airport_chain,
+    "similar_crashes": build_similar_crashes_chain,
+    "system_status": build_system_status_chain,
+    "status_update": build_status_update_chain
+})
 
 def get_fallback_message(flight_id: str, intent: str = "status_update") -> str:
     """
@@ -385,7 +245,8 @@ def get_fallback_message(flight_id: str, intent: str = "status_update") -> str:
     Returns:
         str: Fallback message
     """
-    base_fallback = FLIGHT_FALLBACKS.get(flight_id, "⚠️ AI Copilot temporarily unavailable. Refer to emergency checklist.")
+    # Flight-specific fallback text comes from flight_profiles.json
+    base_fallback = flight_profiles.fallback(flight_id)
     
     if intent == "emergency":
         return f"🚨 EMERGENCY FALLBACK: {base_fallback}"
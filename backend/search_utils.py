@@ -1,10 +1,59 @@
-import numpy as np
-from sentence_transformers import SentenceTransformer
+import asyncio
+import embedding_service
+from embedding_cache import encode_with_cache
+from config import settings
 from database import db
+from vector_index import flight_vector_index
+from ann_index import create_ann_backend
+from lru_cache import LRUCache
 from pymongo.errors import PyMongoError
 from typing import List, Dict
 
 
+def _ann_params() -> Dict:
+    if settings.VECTOR_INDEX_BACKEND == "ivf":
+        return {"nlist": settings.IVF_NLIST, "nprobe": settings.IVF_NPROBE}
+    if settings.VECTOR_INDEX_BACKEND == "hnsw":
+        return {"m": settings.HNSW_M, "ef_construction": settings.HNSW_EF_CONSTRUCTION, "ef_search": settings.HNSW_EF_SEARCH}
+    return {}
+
+
+# Attach the configured ANN backend before the index is first built
+flight_vector_index.set_ann_backend(
+    create_ann_backend(settings.VECTOR_INDEX_BACKEND, **_ann_params()),
+    persist_dir=settings.VECTOR_INDEX_DIR,
+    min_size=settings.VECTOR_INDEX_ANN_MIN_SIZE,
+    persist_every=settings.VECTOR_INDEX_PERSIST_EVERY
+)
+
+
+def build_crash_summary(crash_data: Dict) -> str:
+    """Builds the text that gets embedded for a crash record."""
+    return f"{crash_data['title']} - {crash_data['summary']} - Primary cause: {crash_data['primary_cause']}"
+
+
+def build_crash_document(crash_data: Dict, vector: List[float], summary: str) -> Dict:
+    """
+    Builds the flight_vectors document for a crash record.
+    Raises KeyError if a required crash_data field is missing.
+    """
+    return {
+        "flight_id": crash_data["flight_id"],
+        "title": crash_data["title"],
+        "date": crash_data["date"],
+        "location": crash_data["location"],
+        "summary": crash_data["summary"],
+        "passengers": crash_data["passengers"],
+        "fatalities": crash_data["fatalities"],
+        "survivors": crash_data["survivors"],
+        "primary_cause": crash_data["primary_cause"],
+        "key_factors": crash_data["key_factors"],
+        "how_ai_copilot_could_help": crash_data["how_ai_copilot_could_help"],
+        "vector": vector,
+        "embedding_summary": summary
+    }
+
+
 async def store_crash_flight_data(crash_data: Dict) -> bool:
     """
     Stores crash flight data with vector embedding for similarity search.
@@ -17,45 +66,34 @@ async def store_crash_flight_data(crash_data: Dict) -> bool:
     """
     try:
         # Create summary for embedding
-        summary = f"{crash_data['title']} - {crash_data['summary']} - Primary cause: {crash_data['primary_cause']}"
+        summary = build_crash_summary(crash_data)
         
-        # Generate embedding
-        model = SentenceTransformer("all-MiniLM-L6-v2")
-        vector = model.encode(summary).tolist()
+        # Generate embedding with the shared model, skipping the encoder if this exact summary was embedded before
+        vectors, hits, _ = await encode_with_cache([summary])
+        vector = vectors[0]
+        if hits:
+            print(f"♻️ Reused cached embedding for {crash_data['flight_id']}")
         
         # Prepare document for storage
-        flight_doc = {
-            "flight_id": crash_data["flight_id"],
-            "title": crash_data["title"],
-            "date": crash_data["date"],
-            "location": crash_data["location"],
-            "summary": crash_data["summary"],
-            "passengers": crash_data["passengers"],
-            "fatalities": crash_data["fatalities"],
-            "survivors": crash_data["survivors"],
-            "primary_cause": crash_data["primary_cause"],
-            "key_factors": crash_data["key_factors"],
-            "how_ai_copilot_could_help": crash_data["how_ai_copilot_could_help"],
-            "vector": vector,
-            "embedding_summary": summary
-        }
+        flight_doc = build_crash_document(crash_data, vector, summary)
         
         # Store in flight_vectors collection
         flight_vector_collection = db["flight_vectors"]
         
-        # Check if flight already exists
-        existing = await flight_vector_collection.find_one({"flight_id": crash_data["flight_id"]})
-        if existing:
-            # Update existing record
-            await flight_vector_collection.update_one(
-                {"flight_id": crash_data["flight_id"]},
-                {"$set": flight_doc}
-            )
+        # Upsert in a single round trip instead of find_one + update_one/insert_one
+        result = await flight_vector_collection.update_one(
+            {"flight_id": crash_data["flight_id"]},
+            {"$set": flight_doc},
+            upsert=True
+        )
+        if result.upserted_id is None:
             print(f"✅ Updated existing crash data for {crash_data['flight_id']}")
         else:
-            # Insert new record
-            await flight_vector_collection.insert_one(flight_doc)
             print(f"✅ Stored new crash data for {crash_data['flight_id']}")
+
+        # Keep the in-memory search index in step with the collection
+        if flight_vector_index.loaded:
+            flight_vector_index.upsert(crash_data["flight_id"], crash_data["summary"], vector)
         
         return True
         
@@ -67,49 +105,87 @@ async def store_crash_flight_data(crash_data: Dict) -> bool:
         return False
 
 
-async def search_similar_flights(query_summary: str, top_k: int = 3) -> List[Dict]:
+# Query-side caches for /similar_crashes/ and chat-driven lookups
+query_embedding_cache = LRUCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL_SECONDS)  # normalized query -> vector
+search_results_cache = LRUCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL_SECONDS)  # (query, top_k, exact, index version) -> results
+_cached_index_version = None
+
+
+def normalize_query(query: str) -> str:
+    # MiniLM is uncased, so case and whitespace differences don't change the embedding
+    return " ".join(query.lower().split())
+
+
+def _sync_query_caches() -> None:
+    """Drops both query caches whenever the vector index has changed since they were filled."""
+    global _cached_index_version
+    if _cached_index_version != flight_vector_index.version:
+        query_embedding_cache.clear()
+        search_results_cache.clear()
+        _cached_index_version = flight_vector_index.version
+
+
+def get_query_cache_stats() -> Dict:
+    return {
+        "query_embeddings": query_embedding_cache.get_stats(),
+        "search_results": search_results_cache.get_stats()
+    }
+
+
+async def load_flight_vector_index() -> int:
+    """
+    Loads every flight_vectors embedding into the resident in-memory index.
+    Called at FastAPI startup, and lazily by search_similar_flights if needed.
+
+    Returns:
+        int: Number of vectors in the index
+    """
+    flight_vector_collection = db["flight_vectors"]
+    # Only pull the fields the index needs
+    cursor = flight_vector_collection.find({}, {"flight_id": 1, "summary": 1, "vector": 1})
+    flights = await cursor.to_list(length=None)
+    flight_vector_index.build(flights)
+    print(f"✅ Loaded {len(flight_vector_index)} flight vectors into the in-memory index")
+    return len(flight_vector_index)
+
+
+async def search_similar_flights(query_summary: str, top_k: int = 3, exact: bool = False) -> List[Dict]:
     """
     Finds the top-K most similar flight summaries based on vector similarity.
     
     Args:
         query_summary: Input crash summary string to search for similar flights
         top_k: Optional input - how many most similar results to return (default: 3)
+        exact: Optional input - bypass the ANN backend and brute-force every vector (default: False)
     
     Returns:
         List[Dict]: A list of dictionaries like {flight_id, summary, similarity}
     """
     try:
-        # Step 1: Embed the new input summary
-        model = SentenceTransformer("all-MiniLM-L6-v2")
-        query_vector = model.encode(query_summary)
-        
-        # Step 2: Fetch all stored flight vectors
-        flight_vector_collection = db["flight_vectors"]
-        cursor = flight_vector_collection.find({}) #.find method returns a cursor
-        #cursor is an object that points to documents outlined by query 
-        flights = await cursor.to_list(length=None)
-
-        # Step 3: Compute cosine similarity
-        def cosine_similarity(v1, v2):
-            # Converts both vectors to NumPy arrays, Uses the formula for dot product which measures how aligned the vectors are
-            # Returns a number from -1 to 1, where: 1.0 = identical meaning 0.0 = no relation < 0 = opposite meaning
-            v1 = np.array(v1)
-            v2 = np.array(v2)
-            return np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)) #formula for cosine similarity.
-
-        scored_flights = []
-        for flight in flights:
-            similarity = cosine_similarity(query_vector, flight["vector"]) #calculating cosine similary between any vector and a vector in our flight array 
-
-            scored_flights.append({
-                "flight_id": flight["flight_id"],
-                "summary": flight["summary"],
-                "similarity": similarity
-            })
-
-        # Step 4: Sort by similarity (descending) and return top K
-        scored_flights.sort(key=lambda x: x["similarity"], reverse=True)
-        return scored_flights[:top_k]
+        # Step 1: Make sure the resident index is populated (scripts may call us without FastAPI startup)
+        if not flight_vector_index.loaded:
+            await load_flight_vector_index()
+        _sync_query_caches()
+
+        # Step 2: Identical questions (e.g. the dashboard's default query) are answered from cache
+        normalized_query = normalize_query(query_summary)
+        results_key = (normalized_query, top_k, exact, flight_vector_index.version)
+        cached_results = search_results_cache.get(results_key)
+        if cached_results is not None:
+            # Hand out fresh dicts so a caller that edits its results can't corrupt the cache
+            return [dict(result) for result in cached_results]
+
+        # Step 3: Embed the input summary with the shared model, unless we've seen it recently
+        query_vector = query_embedding_cache.get(normalized_query)
+        if query_vector is None:
+            # Model inference is CPU bound, keep it off the event loop
+            query_vector = await asyncio.to_thread(embedding_service.encode, normalized_query)
+            query_embedding_cache.set(normalized_query, query_vector)
+
+        # Step 4: Cosine similarity via the ANN backend, or against every stored vector when exact / small corpus
+        results = flight_vector_index.search(query_vector, top_k, exact=exact)
+        search_results_cache.set(results_key, tuple(dict(result) for result in results))
+        return results
 
     except PyMongoError as e:
         print(f"❌ MongoDB error during search: {e}")
@@ -121,7 +197,6 @@ async def search_similar_flights(query_summary: str, top_k: int = 3) -> List[Dic
 #testing search_utils.py to get similarity 
 
 if __name__ == "__main__":
-    import asyncio
     test_query = "The aircraft descended below glide slope and terrain warnings were ignored."
     results = asyncio.run(search_similar_flights(test_query))
 
@@ -0,0 +1,179 @@
+# backend/telemetry_utils.py
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from config import settings
+from database import flight_data_collection, flight_filter, add_timeseries_meta
+from latest_state import create_latest_state_cache
+from models import FlightData, to_naive_utc
+from trend_detector import TrendDetector
+from event_bus import FlightEventBus, AlertPublisher
+
+# Newest sample per flight, kept current by every ingest path
+latest_state_cache = create_latest_state_cache(
+    settings.LATEST_STATE_BACKEND,
+    max_age_seconds=settings.LATEST_STATE_MAX_AGE_SECONDS,
+    redis_url=settings.REDIS_URL
+)
+
+# Rolling per-flight trends (slopes, EWMA, time-to-threshold) over the last few seconds of samples
+trend_detector = TrendDetector(
+    capacity=settings.TREND_BUFFER_SIZE,
+    window_seconds=settings.TREND_WINDOW_SECONDS,
+    ewma_tau_seconds=settings.TREND_EWMA_TAU_SECONDS,
+    max_flights=settings.TREND_MAX_FLIGHTS
+)
+
+# Per-flight pub/sub behind GET /flights/{flight_id}/events; alerts are computed once per ingest batch
+flight_event_bus = FlightEventBus(queue_size=settings.EVENTS_QUEUE_SIZE)
+alert_publisher = AlertPublisher(flight_event_bus, trend_alerts_fn=trend_detector.get_alerts)
+
+
+def flight_data_to_document(flight_data: FlightData) -> Dict:
+    """
+    Converts a validated FlightData sample into the dict stored in flight_data_collection.
+    """
+    #convert the Pydantic object to python dictionary, to make some changes in the data.
+    flight_data_dict = flight_data.model_dump()
+
+    # Ensure timestamp is stored as datetime object for MongoDB
+    if isinstance(flight_data_dict.get("timestamp"), str):
+        flight_data_dict["timestamp"] = datetime.fromisoformat(flight_data_dict["timestamp"].replace('Z', '+00:00'))
+    # ...as naive UTC, like the documents MongoDB returns, so ingest and read paths compare
+    flight_data_dict["timestamp"] = to_naive_utc(flight_data_dict["timestamp"])
+
+    # Time-series collections bucket by the metaField
+    if settings.FLIGHT_DATA_TIMESERIES:
+        add_timeseries_meta(flight_data_dict)
+
+    return flight_data_dict
+
+
+async def insert_flight_documents(documents: List[Dict]) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Inserts many telemetry documents with one unordered insert_many.
+
+    A failing document doesn't stop the rest of the batch.
+
+    Args:
+        documents: Documents built by flight_data_to_document
+
+    Returns:
+        (inserted_count, errors): errors are (position in `documents`, message) pairs
+    """
+    if not documents:
+        return 0, []
+    try:
+        result = await flight_data_collection.insert_many(documents, ordered=False)
+        await on_samples_persisted(documents)
+        return len(result.inserted_ids), []
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+        errors = [(error["index"], error.get("errmsg", "write error")) for error in write_errors]
+        failed = {position for position, _ in errors}
+        await on_samples_persisted([doc for position, doc in enumerate(documents) if position not in failed])
+        return e.details.get("nInserted", len(documents) - len(errors)), errors
+
+
+async def on_samples_persisted(documents: List[Dict]) -> None:
+    """
+    Called by every ingest path after samples are safely in MongoDB.
+    Keeps in-process derived state (latest sample and trends per flight) current
+    and publishes alert events to anyone watching the flight.
+    """
+    if not documents:
+        return
+    try:
+        trend_detector.update_many(documents)
+        alert_publisher.process(documents)
+    except Exception as e:
+        print(f"⚠️ Trend / alert update failed: {e}")
+    try:
+        await latest_state_cache.update_many(documents)
+    except Exception as e:
+        # A cache outage must never fail ingest - reads fall back to MongoDB
+        print(f"⚠️ Latest state cache update failed: {e}")
+
+
+async def get_latest_flight_document(flight_id: str) -> Optional[Dict]:
+    """
+    Returns the newest sample for a flight, from the latest-state cache when possible.
+    Falls back to MongoDB on a miss (or cache error) and fills the cache with the result.
+    Only the cache: a read isn't an ingest, so trends, alerts and pushed advice aren't touched.
+    """
+    try:
+        cached = await latest_state_cache.get(flight_id)
+        if cached is not None:
+            return cached
+    except Exception as e:
+        print(f"⚠️ Latest state cache read failed: {e}")
+
+    # Get only the latest data point, without the time-series "meta" copy so both storage modes return the same shape
+    cursor = flight_data_collection.find(flight_filter(flight_id), {"meta": 0}).sort("timestamp", -1).limit(1)
+    async for doc in cursor:
+        try:
+            await latest_state_cache.update(doc)
+        except Exception as e:
+            print(f"⚠️ Latest state cache update failed: {e}")
+        return doc
+    return None
+
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def iter_ndjson_lines(byte_stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Splits a streamed request body into lines without buffering the whole body.
+    Blank lines are skipped.
+    """
+    buffer = b""
+    async for chunk in byte_stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def iter_batch_items(request) -> AsyncIterator[Tuple[int, Union[bytes, Dict]]]:
+    """
+    Yields (row, item) pairs from a batch request body.
+
+    NDJSON bodies are streamed and yield raw lines; anything else is parsed
+    as a JSON array and yields the decoded objects.
+    Raises ValueError if a non-NDJSON body isn't a JSON array.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        row = 0
+        async for line in iter_ndjson_lines(request.stream()):
+            yield row, line
+            row += 1
+        return
+
+    items = json.loads(await request.body())
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array of flight data samples")
+    for row, item in enumerate(items):
+        yield row, item
+
+
+def validate_flight_data(item: Union[bytes, str, Dict]) -> FlightData:
+    """Validates one raw NDJSON line or decoded JSON object against FlightData."""
+    if isinstance(item, (bytes, str)):
+        return FlightData.model_validate_json(item)
+    return FlightData.model_validate(item)
+
+
+def format_validation_error(error: ValidationError) -> str:
+    # "speed.airspeed_knots: Field required; engine: Input should be an object"
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'sample'}: {err['msg']}" for err in error.errors()
+    )
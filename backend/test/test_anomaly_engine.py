@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for the rule-based anomaly engine that gates the LLM chains.
+"""
+
+import sys
+import os
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import anomaly_engine
+from anomaly_engine import detect, detect_batch, describe_anomalies, should_call_llm
+
+
+def make_sample(altitude=30000, airspeed=480, vertical_speed=0, engines=(90, 90), gear="UP",
+                autopilot=True, warnings=None, terrain=None, aircraft_type="Boeing 747-300"):
+    return {
+        "flight_id": "KAL801",
+        "aircraft_type": aircraft_type,
+        "location": {"latitude": 13.4, "longitude": 144.7, "altitude_ft": altitude},
+        "speed": {"airspeed_knots": airspeed, "vertical_speed_fpm": vertical_speed},
+        "engine": {"engine_1_rpm": engines[0], "engine_2_rpm": engines[1]},
+        "aircraft_systems": {"landing_gear_status": gear, "flap_setting": "30",
+                             "autopilot_engaged": autopilot, "warnings": warnings or []},
+        "environment": {"terrain_proximity_ft": terrain}
+    }
+
+
+def codes(anomalies):
+    return {anomaly["code"] for anomaly in anomalies}
+
+
+def test_nominal_cruise():
+    """A stable cruise sample has no anomalies and skips the LLM."""
+    print("🔍 Testing nominal sample...")
+    anomalies = detect(make_sample())
+    assert anomalies == []
+    skipped = anomaly_engine.get_stats()["llm_calls_skipped"]
+    assert should_call_llm(anomalies) is False
+    assert anomaly_engine.get_stats()["llm_calls_skipped"] == skipped + 1
+    assert should_call_llm(anomalies, short_circuit=False) is True
+    print("✅ Nominal sample test PASSED")
+
+
+def test_kal801_style_approach():
+    """Low, fast-sinking, gear-up approach into terrain trips the CFIT rules."""
+    print("\n🔍 Testing KAL801-style approach...")
+    anomalies = detect(make_sample(altitude=1500, airspeed=160, vertical_speed=-1800, gear="UP", terrain=400))
+    assert {"excessive_sink_rate", "terrain_proximity", "gear_up_low_altitude", "autopilot_engaged_in_anomaly"} <= codes(anomalies)
+    assert all(a["severity"] == "critical" for a in anomalies if a["code"] != "autopilot_engaged_in_anomaly")
+    assert describe_anomalies(anomalies).startswith("CRITICAL:")
+    print("✅ KAL801-style approach test PASSED")
+
+
+def test_individual_rules():
+    """Each rule fires on its own condition."""
+    print("\n🔍 Testing individual rules...")
+    assert codes(detect(make_sample(altitude=1200, airspeed=130, gear="DOWN", autopilot=False))) == {"airspeed_below_vref"}
+    # Vref depends on the aircraft type
+    assert codes(detect(make_sample(altitude=1200, airspeed=130, gear="DOWN", autopilot=False, aircraft_type="Q400"))) == set()
+    assert codes(detect(make_sample(engines=(90, 60)))) == {"engine_rpm_asymmetry"}
+    assert codes(detect(make_sample(warnings=["RADIO ALTIMETER FAULT"]))) == {"radio_altimeter_disagreement"}
+    assert codes(detect(make_sample(altitude=800, terrain=1500, gear="DOWN"))) == {"radio_altimeter_disagreement"}
+    print("✅ Individual rules test PASSED")
+
+
+def test_ground_samples_raise_no_alert():
+    """Parked, taxiing and rolled-out samples never trip the airborne rules."""
+    print("\n🔍 Testing ground samples...")
+    parked = make_sample(altitude=256, airspeed=0, engines=(20, 20), gear="DOWN", autopilot=False, terrain=0)
+    taxi = make_sample(altitude=256, airspeed=15, engines=(35, 35), gear="DOWN", autopilot=False)
+    sea_level_ramp = make_sample(altitude=13, airspeed=0, engines=(0, 0), gear="DOWN", autopilot=False)
+    for sample in (parked, taxi, sea_level_ramp):
+        assert detect(sample) == []
+    # Still airborne: short final at 100 ft, slow
+    assert "airspeed_below_vref" in codes(detect(make_sample(altitude=356, airspeed=130, gear="DOWN",
+                                                             autopilot=False, terrain=100)))
+    print("✅ Ground samples test PASSED")
+
+
+def test_aircraft_warnings_are_never_nominal():
+    """The aircraft's own warnings always reach the LLM, even at cruise with nominal parameters."""
+    print("\n🔍 Testing aircraft warnings...")
+    assert codes(detect(make_sample(warnings=["STALL_WARNING"]))) == {"stall_warning", "autopilot_engaged_in_anomaly"}
+    assert codes(detect(make_sample(warnings=["Pitot heat fault"], autopilot=False))) == {"unreliable_airspeed"}
+    assert codes(detect(make_sample(warnings=["TCAS TRAFFIC"]))) == {"aircraft_warning"}
+    print("✅ Aircraft warnings test PASSED")
+
+
+def test_af447_sample():
+    """The AF447 sample (cruise altitude, only warnings) is anomalous and doesn't skip the LLM."""
+    print("\n🔍 Testing AF447 sample...")
+    sample = {
+        "flight_id": "CRASH_AF447",
+        "aircraft_type": "Airbus A330-203",
+        "location": {"altitude_ft": 35000, "latitude": -3.0, "longitude": -30.0},
+        "speed": {"airspeed_knots": 275, "vertical_speed_fpm": -1000},
+        "engine": {"engine_1_rpm": 95, "engine_2_rpm": 95},
+        "aircraft_systems": {"landing_gear_status": "Retracted", "flap_setting": "0", "autopilot_engaged": False,
+                             "warnings": ["Unreliable Airspeed", "Autopilot Disconnect", "Stall Warning"]},
+        "environment": {"terrain_proximity_ft": 35000}
+    }
+    anomalies = detect(sample)
+    assert codes(anomalies) == {"stall_warning", "unreliable_airspeed", "aircraft_warning"}
+    assert "Autopilot Disconnect" in next(a["message"] for a in anomalies if a["code"] == "aircraft_warning")
+    assert should_call_llm(anomalies) is True
+    assert describe_anomalies(anomalies).startswith("CRITICAL:")
+    print("✅ AF447 sample test PASSED")
+
+
+def test_batch_matches_single_and_is_fast():
+    """A vectorized batch gives the same answers as one-by-one evaluation."""
+    print("\n🔍 Testing batch evaluation...")
+    samples = [make_sample(), make_sample(engines=(90, 60)), make_sample(altitude=900, vertical_speed=-2000, gear="DOWN")] * 1000
+    start = time.perf_counter()
+    batch = detect_batch(samples)
+    per_sample_us = (time.perf_counter() - start) / len(samples) * 1e6
+    assert [codes(a) for a in batch[:3]] == [codes(detect(s)) for s in samples[:3]]
+    print(f"   ⏱️ {per_sample_us:.1f} µs per sample")
+    assert per_sample_us < 1000
+    print("✅ Batch evaluation test PASSED")
+
+
+def main():
+    """Run all anomaly engine tests."""
+    print("🚁 Anomaly Engine Test Suite")
+    print("=" * 60)
+    test_nominal_cruise()
+    test_kal801_style_approach()
+    test_individual_rules()
+    test_ground_samples_raise_no_alert()
+    test_aircraft_warnings_are_never_nominal()
+    test_af447_sample()
+    test_batch_matches_single_and_is_fast()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk crash ingest: a malformed row is rejected on its own
+instead of aborting the whole file. Only parsing and validation are exercised
+(no encoder, no MongoDB).
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bulk_ingest import PARSE_ERROR_KEY, chunked, encode_chunk, read_records
+
+CRASH = {
+    "flight_id": "CRASH_KAL801", "title": "Korean Air 801", "date": "1997-08-06", "location": "Guam",
+    "summary": "CFIT on approach", "passengers": 254, "fatalities": 229, "survivors": 25,
+    "primary_cause": "Descent below minimum altitude", "key_factors": ["Glideslope out"],
+    "how_ai_copilot_could_help": "Altitude callouts"
+}
+
+
+def write_file(suffix, text):
+    handle = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8")
+    handle.write(text)
+    handle.close()
+    return handle.name
+
+
+def test_malformed_jsonl_line():
+    """A line that isn't a JSON object becomes a rejected record; the lines around it still parse."""
+    print("🔍 Testing malformed JSONL lines...")
+    path = write_file(".jsonl", "\n".join([json.dumps(CRASH), '{"flight_id": "CRASH_X", ', "[1, 2]",
+                                           json.dumps(dict(CRASH, flight_id="CRASH_AF447"))]))
+    try:
+        records = list(read_records(path))
+    finally:
+        os.remove(path)
+    assert [record.get("flight_id") for record in records] == ["CRASH_KAL801", None, None, "CRASH_AF447"]
+    assert records[1][PARSE_ERROR_KEY].startswith("line 2: invalid JSON")
+    assert records[2][PARSE_ERROR_KEY] == "line 3: expected a JSON object"
+    print("✅ Malformed JSONL test PASSED")
+
+
+def test_non_integer_csv_field():
+    """A non-integer count rejects its row only."""
+    print("\n🔍 Testing non-integer CSV fields...")
+    header = "flight_id,title,date,location,summary,passengers,fatalities,survivors,primary_cause,key_factors,how_ai_copilot_could_help"
+    path = write_file(".csv", "\n".join([
+        header,
+        "CRASH_KAL801,Korean Air 801,1997-08-06,Guam,CFIT,254,229,25,Descent,Glideslope out; Fatigue,Callouts",
+        "CRASH_BAD,Bad row,2000-01-01,Nowhere,Bad,many,1,0,Unknown,,None",
+    ]) + "\n")
+    try:
+        records = list(read_records(path))
+    finally:
+        os.remove(path)
+    assert records[0]["passengers"] == 254 and records[0]["key_factors"] == ["Glideslope out", "Fatigue"]
+    assert records[1]["flight_id"] == "CRASH_BAD"
+    assert records[1][PARSE_ERROR_KEY] == "row 3: passengers is not an integer ('many')"
+    print("✅ Non-integer CSV field test PASSED")
+
+
+def test_rejected_rows_counted_invalid():
+    """encode_chunk reports parse errors and missing fields per record without encoding anything."""
+    print("\n🔍 Testing per-record rejection...")
+    chunk = [{"flight_id": None, PARSE_ERROR_KEY: "line 2: invalid JSON"}, {"flight_id": "CRASH_EMPTY"}]
+    operations, errors, hits, misses = asyncio.run(encode_chunk(chunk, batch_size=8))
+    assert operations == [] and (hits, misses) == (0, 0)
+    assert errors == [{"flight_id": None, "error": "line 2: invalid JSON"},
+                      {"flight_id": "CRASH_EMPTY", "error": "missing field 'title'"}]
+    assert [len(c) for c in chunked(iter(range(5)), 2)] == [2, 2, 1]
+    print("✅ Per-record rejection test PASSED")
+
+
+def main():
+    """Run all bulk ingest tests."""
+    print("🚁 Bulk Crash Ingest Test Suite")
+    print("=" * 60)
+    test_malformed_jsonl_line()
+    test_non_integer_csv_field()
+    test_rejected_rows_counted_invalid()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
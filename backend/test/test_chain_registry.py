@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the precompiled chain registry (one chain per profile and intent).
+Builders are plain functions here, so no Ollama or MongoDB is needed.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from chain_registry import ChainRegistry, chain_profile, DEFAULT_PROFILE
+from flight_profiles import flight_profiles
+
+
+def make_registry():
+    built = []
+
+    def build_status(profile):
+        built.append(profile)
+        return ChatPromptTemplate.from_messages([
+            ("system", "Status copilot for flight {flight_id} (" + profile + ")"),
+            ("human", "{message}")
+        ])
+
+    return ChainRegistry({"status_update": build_status}), built
+
+
+def test_profiles():
+    """KAL801 and its crash replay share a profile, every other flight uses the default"""
+    print("🔍 Testing flight -> profile mapping...")
+    assert chain_profile("KAL801") == "KAL801"
+    assert chain_profile("CRASH_KAL801") == "KAL801"
+    assert chain_profile("AF447") == DEFAULT_PROFILE
+    print("✅ Profiles map correctly")
+
+
+def test_memoization():
+    """Chains are built once per profile and reused for every flight in it"""
+    print("🔍 Testing chain memoization...")
+    registry, built = make_registry()
+
+    first = registry.get("AF447", "status_update")
+    assert registry.get("THY1951", "status_update") is first
+    assert registry.get("KAL801", "status_update") is not first
+    assert registry.get("CRASH_KAL801", "status_update") is registry.get("KAL801", "status_update")
+    assert built == [DEFAULT_PROFILE, "KAL801"]
+
+    stats = registry.get_stats()
+    assert stats["chains"] == 2 and stats["builds"] == 2 and stats["hits"] == 3
+    print("✅ Each profile built exactly once")
+
+
+def test_warm_up():
+    """warm_up builds every profile/intent pair, and only once"""
+    print("🔍 Testing warm-up...")
+    registry, built = make_registry()
+    profiles = len(flight_profiles.profile_names()) + 1  # plus the default profile
+    assert registry.warm_up() == profiles
+    assert registry.warm_up() == 0
+    registry.get("AAR214", "status_update")
+    assert len(built) == profiles
+    print("✅ Warm-up prebuilt all chains")
+
+
+def test_flight_id_is_a_variable():
+    """flight_id is filled in per request instead of baked into the prompt"""
+    print("🔍 Testing flight_id as a prompt variable...")
+    registry, _ = make_registry()
+    prompt = registry.get("AF447", "status_update")
+    assert "flight_id" in prompt.input_variables
+
+    messages = prompt.format_messages(flight_id="COLGAN3407", message="status?")
+    assert "COLGAN3407" in messages[0].content
+    print("✅ One prompt serves every flight")
+
+
+def main():
+    """Run all chain registry tests"""
+    print("🚀 Starting Chain Registry Tests")
+    print("=" * 50)
+    test_profiles()
+    test_memoization()
+    test_warm_up()
+    test_flight_id_is_a_variable()
+    print("=" * 50)
+    print("🎉 All chain registry tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming chat answers (fallback first, tokens, clean timeout).
+Uses fake chains instead of Ollama.
+"""
+
+import sys
+import os
+import json
+import asyncio
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from chat_streaming import stream_chat_events
+
+
+class FakeStreamingChain:
+    """Stands in for prompt | llm | StrOutputParser(); yields tokens with a delay between them."""
+
+    def __init__(self, tokens, delay=0.0):
+        self.tokens = tokens
+        self.delay = delay
+
+    async def astream(self, inputs):
+        for token in self.tokens:
+            await asyncio.sleep(self.delay)
+            yield token
+
+
+def parse(frames):
+    events = []
+    for frame in frames:
+        lines = frame.decode().strip().split("\n")
+        events.append(json.loads(lines[1][len("data: "):]))
+    return events
+
+
+async def collect(chain, timeout=15.0):
+    frames, first_frame_at = [], None
+    start = time.perf_counter()
+    async for frame in stream_chat_events(chain, {"flight_id": "KAL801", "message": "status?"},
+                                          fallback="GO AROUND", intent="status_update", timeout=timeout):
+        if first_frame_at is None:
+            first_frame_at = time.perf_counter() - start
+        frames.append(frame)
+    return parse(frames), first_frame_at
+
+
+def test_fallback_first_then_tokens():
+    """The fallback frame arrives before the LLM produces anything."""
+    print("🔍 Testing streamed answer...")
+    events, first_frame_at = asyncio.run(collect(FakeStreamingChain(["PULL ", "UP ", "NOW"], delay=0.05)))
+    assert first_frame_at < 0.05
+    assert [event["type"] for event in events] == ["fallback", "token", "token", "token", "done"]
+    assert events[0]["advice"] == "GO AROUND"
+    assert events[-1]["advice"] == "PULL UP NOW"
+    assert events[-1]["complete"] is True
+    print("✅ Streamed answer test PASSED")
+
+
+def test_timeout_keeps_partial_answer():
+    """The deadline ends the stream with the partial answer instead of dropping it."""
+    print("\n🔍 Testing stream timeout...")
+    events, _ = asyncio.run(collect(FakeStreamingChain(["PULL ", "UP ", "NOW"], delay=0.1), timeout=0.25))
+    done = events[-1]
+    assert done["type"] == "done"
+    assert done["timed_out"] is True and done["complete"] is False
+    assert done["advice"] == "PULL UP "
+
+    events, _ = asyncio.run(collect(FakeStreamingChain(["late"], delay=0.2), timeout=0.05))
+    assert events[-1]["advice"] == "GO AROUND"  # nothing generated in time - fallback stands
+    print("✅ Stream timeout test PASSED")
+
+
+def test_validated_chain_sent_whole():
+    """KAL801 validated chains (plain async functions) arrive as one validated chunk."""
+    print("\n🔍 Testing validated chain...")
+
+    async def validated_chain(inputs):
+        return "Divert to Andersen AFB (PGUA)"
+
+    events, _ = asyncio.run(collect(validated_chain))
+    assert [event["type"] for event in events] == ["fallback", "token", "done"]
+    assert events[-1]["advice"] == "Divert to Andersen AFB (PGUA)"
+    print("✅ Validated chain test PASSED")
+
+
+def main():
+    """Run all chat streaming tests."""
+    print("🚁 Chat Streaming Test Suite")
+    print("=" * 60)
+    test_fallback_first_then_tokens()
+    test_timeout_keeps_partial_answer()
+    test_validated_chain_sent_whole()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the startup index check (db_indexes.ensure_index).
+Uses an in-memory collection instead of MongoDB.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from pymongo import ASCENDING, DESCENDING
+
+from db_indexes import ensure_index
+
+KEYS = [("flight_id", ASCENDING), ("timestamp", DESCENDING)]
+OPTIONS = {"name": "flight_id_1_timestamp_-1"}
+
+
+class IndexCollection:
+    """Records index DDL; index_information() mirrors MongoDB's shape (directions as floats)."""
+
+    name = "flight_data"
+
+    def __init__(self, indexes=None):
+        self.indexes = {"_id_": {"key": [("_id", 1)]}, **(indexes or {})}
+        self.created = []
+        self.dropped = []
+
+    async def index_information(self):
+        return {name: dict(info) for name, info in self.indexes.items()}
+
+    async def create_index(self, keys, name):
+        self.created.append(name)
+        self.indexes[name] = {"key": list(keys)}
+
+    async def drop_index(self, name):
+        self.dropped.append(name)
+        del self.indexes[name]
+
+
+def test_missing_index_is_created():
+    print("🔍 Testing missing index...")
+    collection = IndexCollection()
+    assert asyncio.run(ensure_index(collection, KEYS, OPTIONS)) == "created"
+    assert asyncio.run(ensure_index(collection, KEYS, OPTIONS)) == "ok"
+    assert collection.created == [OPTIONS["name"]]
+    print("✅ Missing index created once")
+
+
+def test_equivalent_index_under_another_name_is_reused():
+    """An index with the same keys satisfies the requirement whatever it is called"""
+    print("\n🔍 Testing equivalent index with a different name...")
+    collection = IndexCollection({"by_flight_and_time": {"key": [("flight_id", 1.0), ("timestamp", -1.0)]}})
+    assert asyncio.run(ensure_index(collection, KEYS, OPTIONS)) == "ok"
+    assert collection.created == [] and collection.dropped == []
+    print("✅ Existing index reused")
+
+
+def test_name_conflict_is_never_dropped():
+    """A different index holding the wanted name is reported, not dropped at startup"""
+    print("\n🔍 Testing same name, different keys...")
+    collection = IndexCollection({OPTIONS["name"]: {"key": [("flight_id", 1)]}})
+    assert asyncio.run(ensure_index(collection, KEYS, OPTIONS)) == "conflict"
+    assert collection.created == [] and collection.dropped == []
+    assert OPTIONS["name"] in collection.indexes
+    print("✅ Conflicting index left in place")
+
+
+def main():
+    """Run all index tests."""
+    print("🚁 Index Check Test Suite")
+    print("=" * 60)
+    test_missing_index_is_created()
+    test_equivalent_index_under_another_name_is_reused()
+    test_name_conflict_is_never_dropped()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-hash embedding cache behind the crash summary re-embed path.
+Uses in-memory collections and a counting encoder instead of MongoDB and the model.
+"""
+
+import sys
+import os
+import asyncio
+
+import numpy as np
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import embedding_cache
+import embedding_service
+import embedding_utils
+from config import settings
+
+CRASHES = [
+    {"flight_id": "CRASH_KAL801", "summary": "Descent below glide slope on the Guam approach."},
+    {"flight_id": "CRASH_AAR214", "summary": "Low-speed visual approach into San Francisco."},
+]
+
+
+class MemoryCursor:
+    def __init__(self, documents):
+        self._iter = iter(documents)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class MemoryCollection:
+    """Just enough of a motor collection for the cache and the flight_vectors writes."""
+
+    def __init__(self, key):
+        self.key = key
+        self.documents = {}
+
+    def find(self, query, projection=None):
+        wanted = query[self.key]["$in"]
+        return MemoryCursor([self.documents[key] for key in wanted if key in self.documents])
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            key = operation._filter[self.key]
+            self.documents.setdefault(key, {self.key: key}).update(operation._doc["$set"])
+
+    async def insert_one(self, document):
+        self.documents[document[self.key]] = dict(document)
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts, **kwargs):
+        self.texts += [texts] if isinstance(texts, str) else list(texts)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+def test_unchanged_summaries_are_not_reencoded():
+    """A second bulk run over the same summaries is served from the cache, and edits are re-encoded"""
+    print("🔍 Testing re-embed with unchanged summaries...")
+    saved = (embedding_cache.embedding_cache_collection, embedding_utils.flight_vector_collection,
+             embedding_service.encode, settings.EMBEDDING_CACHE_ENABLED)
+    embedding_cache.embedding_cache_collection = MemoryCollection("_id")
+    embedding_utils.flight_vector_collection = vectors = MemoryCollection("flight_id")
+    embedding_service.encode = encoder = CountingEncoder()
+    settings.EMBEDDING_CACHE_ENABLED = True
+    try:
+        asyncio.run(embedding_utils.embed_and_store_flight_summaries(CRASHES))
+        assert len(encoder.texts) == 2
+        assert vectors.documents["CRASH_KAL801"]["vector"] == [1.0] * 4
+
+        asyncio.run(embedding_utils.embed_and_store_flight_summaries(CRASHES))
+        assert len(encoder.texts) == 2  # nothing encoded the second time
+
+        asyncio.run(embedding_utils.embed_and_store_flight_summary("CRASH_KAL801", CRASHES[0]["summary"]))
+        assert len(encoder.texts) == 2
+
+        edited = [dict(CRASHES[0], summary="Descent below minimums at Nimitz Hill."), CRASHES[1]]
+        asyncio.run(embedding_utils.embed_and_store_flight_summaries(edited))
+        assert encoder.texts[2:] == [edited[0]["summary"]]
+    finally:
+        (embedding_cache.embedding_cache_collection, embedding_utils.flight_vector_collection,
+         embedding_service.encode, settings.EMBEDDING_CACHE_ENABLED) = saved
+    print("✅ Unchanged summaries reused their cached vectors")
+
+
+def main():
+    """Run all embedding cache tests."""
+    print("🚁 Embedding Cache Test Suite")
+    print("=" * 60)
+    test_unchanged_summaries_are_not_reencoded()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared embedding model (embedding_service.py).
+Runs without sentence-transformers - the model class is replaced by a counting stub.
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import embedding_service
+
+
+class CountingModel:
+    """Stands in for SentenceTransformer: counts loads and records which thread encodes."""
+    loads = 0
+    encode_threads = []
+
+    def __init__(self, name):
+        CountingModel.loads += 1
+
+    def encode(self, texts, **kwargs):
+        CountingModel.encode_threads.append(threading.get_ident())
+        if isinstance(texts, str):
+            return np.ones(384, dtype=np.float32)
+        return np.ones((len(texts), 384), dtype=np.float32)
+
+
+def install_counting_model():
+    CountingModel.loads = 0
+    CountingModel.encode_threads = []
+    sys.modules["sentence_transformers"] = types.SimpleNamespace(SentenceTransformer=CountingModel)
+    embedding_service._model = None
+
+
+def test_model_loaded_once():
+    """Concurrent first calls load the model once, and every later call reuses it"""
+    print("🔍 Testing one model load per process...")
+    saved = sys.modules.get("sentence_transformers")
+    install_counting_model()
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: embedding_service.encode(f"summary {i}"), range(32)))
+        embedding_service.encode(["a", "b"])
+        assert CountingModel.loads == 1
+        assert embedding_service.get_model() is embedding_service.get_model()
+    finally:
+        embedding_service._model = None
+        if saved is not None:
+            sys.modules["sentence_transformers"] = saved
+        else:
+            sys.modules.pop("sentence_transformers", None)
+    print("✅ Model loaded once and reused")
+
+
+def test_search_encodes_off_the_event_loop():
+    """A query-cache miss in search_similar_flights runs the model in a worker thread"""
+    print("\n🔍 Testing search encodes off the event loop...")
+    import search_utils
+
+    saved = sys.modules.get("sentence_transformers")
+    install_counting_model()
+    try:
+        search_utils.flight_vector_index.build([
+            {"flight_id": "CRASH_KAL801", "summary": "Guam terrain", "vector": np.ones(384).tolist()}
+        ])
+        search_utils._sync_query_caches()
+
+        async def search():
+            loop_thread = threading.get_ident()
+            results = await search_utils.search_similar_flights("Glide slope out of service at night")
+            return loop_thread, results
+
+        loop_thread, results = asyncio.run(search())
+        assert results and results[0]["flight_id"] == "CRASH_KAL801"
+        assert CountingModel.encode_threads and loop_thread not in CountingModel.encode_threads
+    finally:
+        embedding_service._model = None
+        if saved is not None:
+            sys.modules["sentence_transformers"] = saved
+        else:
+            sys.modules.pop("sentence_transformers", None)
+    print("✅ Query embedding ran in a worker thread")
+
+
+def main():
+    """Run all embedding service tests."""
+    print("🚁 Embedding Service Test Suite")
+    print("=" * 60)
+    test_model_loaded_once()
+    test_search_encodes_off_the_event_loop()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
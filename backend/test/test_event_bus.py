@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-flight event bus and ingest-triggered alert publishing.
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from event_bus import FlightEventBus, AlertPublisher, format_sse
+
+START = datetime(1997, 8, 6, 15, 40)
+
+
+def make_sample(seconds, terrain=2500, flight_id="KAL801"):
+    return {
+        "flight_id": flight_id,
+        "aircraft_type": "Boeing 747-300",
+        "timestamp": START + timedelta(seconds=seconds),
+        "location": {"altitude_ft": 3000},
+        "speed": {"airspeed_knots": 170, "vertical_speed_fpm": -500},
+        "engine": {"engine_1_rpm": 70, "engine_2_rpm": 70},
+        "aircraft_systems": {"landing_gear_status": "DOWN", "autopilot_engaged": False, "warnings": []},
+        "environment": {"terrain_proximity_ft": terrain}
+    }
+
+
+def drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+def test_fan_out_and_slow_subscriber():
+    """One publish reaches every subscriber; a full queue drops its oldest event."""
+    print("🔍 Testing fan-out...")
+
+    async def run():
+        bus = FlightEventBus(queue_size=2)
+        dashboards = [bus.subscribe("KAL801") for _ in range(10)]
+        other = bus.subscribe("THY1951")
+        for i in range(3):
+            assert bus.publish("KAL801", {"type": "alert", "n": i}) == 10
+        assert [event["n"] for event in drain(dashboards[0])] == [1, 2]
+        assert other.empty()
+        assert bus.get_stats()["dropped"] == 10
+
+        for queue in dashboards:
+            bus.unsubscribe("KAL801", queue)
+        assert not bus.has_subscribers("KAL801")
+
+    asyncio.run(run())
+    print("✅ Fan-out test PASSED")
+
+
+def test_alerts_published_on_change_only():
+    """Alerts are computed once per batch and only published when the alert set changes."""
+    print("\n🔍 Testing alert publishing...")
+
+    async def run():
+        bus = FlightEventBus()
+        publisher = AlertPublisher(bus)
+        publisher.fallback_fn = lambda flight_id, intent: f"{intent} fallback"
+
+        publisher.process([make_sample(0, terrain=400)])  # nobody watching - nothing happens
+        queues = [bus.subscribe("KAL801") for _ in range(3)]
+
+        publisher.process([make_sample(1, terrain=400), make_sample(2, terrain=300)])
+        publisher.process([make_sample(3, terrain=250)])  # same alert state
+        publisher.process([make_sample(4, terrain=2500)])  # cleared
+
+        events = drain(queues[0])
+        assert [event["type"] for event in events] == ["alert", "clear"]
+        assert events[0]["timestamp"] == START + timedelta(seconds=2)  # newest sample of the batch
+        assert events[0]["fallback_advice"] == "emergency fallback"
+        assert events[0]["anomalies"][0]["code"] == "terrain_proximity"
+        assert [event["type"] for event in drain(queues[2])] == ["alert", "clear"]
+
+    asyncio.run(run())
+    print("✅ Alert publishing test PASSED")
+
+
+def test_llm_advice_once_for_all_subscribers():
+    """Ten watchers of one aircraft cost one advice generation."""
+    print("\n🔍 Testing shared LLM advice...")
+
+    async def run():
+        bus = FlightEventBus()
+        publisher = AlertPublisher(bus)
+        calls = []
+
+        async def advice_fn(document, anomalies):
+            calls.append(document["timestamp"])
+            await asyncio.sleep(0.01)
+            return "PULL UP"
+
+        publisher.advice_fn = advice_fn
+        queues = [bus.subscribe("KAL801") for _ in range(10)]
+        publisher.process([make_sample(1, terrain=400)])
+        await asyncio.sleep(0.05)
+
+        assert len(calls) == 1
+        for queue in queues:
+            events = drain(queue)
+            assert [event["type"] for event in events] == ["alert", "advice"]
+            assert events[1]["advice"] == "PULL UP"
+
+    asyncio.run(run())
+    print("✅ Shared LLM advice test PASSED")
+
+
+def test_initial_event_not_republished():
+    """The state sent to a new subscriber counts as published: the next identical ingest is silent."""
+    print("\n🔍 Testing initial subscriber event...")
+
+    async def run():
+        bus = FlightEventBus()
+        publisher = AlertPublisher(bus)
+        queue = bus.subscribe("KAL801")
+        initial = publisher.initial_event(make_sample(0, terrain=400))
+        assert initial["type"] == "alert"
+        publisher.process([make_sample(1, terrain=350)])  # same alert state
+        assert drain(queue) == []
+        publisher.process([make_sample(2, terrain=2500)])
+        assert [event["type"] for event in drain(queue)] == ["clear"]
+
+    asyncio.run(run())
+    print("✅ Initial subscriber event test PASSED")
+
+
+def test_advice_follows_latest_alert_state():
+    """Alert changes during a generation aren't lost: the newest one is generated next."""
+    print("\n🔍 Testing advice for alert changes mid-generation...")
+
+    async def run():
+        bus = FlightEventBus()
+        publisher = AlertPublisher(bus)
+        calls = []
+
+        async def advice_fn(document, anomalies):
+            calls.append(document["environment"]["terrain_proximity_ft"])
+            await asyncio.sleep(0.02)
+            return f"advice for {anomalies[0]['severity']}"
+
+        publisher.advice_fn = advice_fn
+        queue = bus.subscribe("KAL801")
+        publisher.process([make_sample(1, terrain=400)])  # critical: generation starts
+        await asyncio.sleep(0)
+        publisher.process([make_sample(2, terrain=800)])  # warning: queued
+        publisher.process([make_sample(3, terrain=450)])  # critical again: replaces the queued state
+        await asyncio.sleep(0.1)
+
+        assert calls == [400, 450]
+        advice = [event for event in drain(queue) if event["type"] == "advice"]
+        assert [event["timestamp"] for event in advice] == [START + timedelta(seconds=1), START + timedelta(seconds=3)]
+
+    asyncio.run(run())
+    print("✅ Latest alert state advice test PASSED")
+
+
+def test_sse_format():
+    print("\n🔍 Testing SSE framing...")
+    frame = format_sse({"type": "alert", "timestamp": START})
+    assert frame.startswith(b"event: alert\ndata: {")
+    assert frame.endswith(b"\n\n")
+    assert b'"1997-08-06T15:40:00"' in frame
+    print("✅ SSE framing test PASSED")
+
+
+def main():
+    """Run all event bus tests."""
+    print("🚁 Flight Event Bus Test Suite")
+    print("=" * 60)
+    test_fan_out_and_slow_subscriber()
+    test_alerts_published_on_change_only()
+    test_llm_advice_once_for_all_subscribers()
+    test_initial_event_not_republished()
+    test_advice_follows_latest_alert_state()
+    test_sse_format()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for POST /flight_data/batch: JSON array and NDJSON bodies, per-row
+validation errors merged with write errors, and chunked inserts.
+Runs the app in-process through httpx's ASGI transport with an in-memory insert function.
+"""
+
+import sys
+import os
+import asyncio
+import json
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import httpx
+
+import main
+from config import settings
+
+
+def make_sample(i, flight_id="KAL801"):
+    return {
+        "timestamp": f"1997-08-06T15:40:{i:02d}Z",
+        "flight_id": flight_id,
+        "aircraft_type": "Boeing 747-300",
+        "pilot_id": "P1",
+        "location": {"latitude": 13.4, "longitude": 144.7, "altitude_ft": 3000 - 10 * i},
+        "speed": {"airspeed_knots": 160, "vertical_speed_fpm": -700},
+        "engine": {"engine_1_rpm": 72, "engine_2_rpm": 71},
+        "aircraft_systems": {"landing_gear_status": "DOWN", "flap_setting": "30", "autopilot_engaged": False},
+        "environment": {}
+    }
+
+
+class ChunkRecorder:
+    """Stands in for insert_flight_documents; documents whose altitude is in `reject` fail to write."""
+
+    def __init__(self, reject=()):
+        self.chunks = []
+        self.reject = set(reject)
+
+    async def insert(self, documents):
+        self.chunks.append(list(documents))
+        errors = [(position, "duplicate key") for position, doc in enumerate(documents)
+                  if doc["location"]["altitude_ft"] in self.reject]
+        return len(documents) - len(errors), errors
+
+
+async def post_batch(recorder, chunk_size, **request):
+    original_insert, original_chunk_size = main.insert_flight_documents, settings.FLIGHT_DATA_BATCH_CHUNK_SIZE
+    main.insert_flight_documents = recorder.insert
+    settings.FLIGHT_DATA_BATCH_CHUNK_SIZE = chunk_size
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/flight_data/batch", **request)
+    finally:
+        main.insert_flight_documents, settings.FLIGHT_DATA_BATCH_CHUNK_SIZE = original_insert, original_chunk_size
+
+
+def test_json_array_with_merged_errors():
+    """Validation errors and write errors come back together, in row order."""
+    print("🔍 Testing JSON array batch...")
+    rows = [make_sample(i) for i in range(6)]
+    del rows[1]["speed"]  # invalid row 1
+    rows[4] = {"flight_id": "KAL801"}  # invalid row 4
+    recorder = ChunkRecorder(reject={3000 - 10 * 3})  # row 3 fails to write
+
+    response = asyncio.run(post_batch(recorder, chunk_size=2, json=rows))
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["received"], body["inserted"], body["failed"]) == (6, 3, 3)
+    assert [error["row"] for error in body["errors"]] == [1, 3, 4]
+    assert "speed" in body["errors"][0]["error"]
+    assert body["errors"][1]["error"] == "duplicate key"
+
+    # Valid rows 0, 2, 3, 5 in chunks of two
+    assert [len(chunk) for chunk in recorder.chunks] == [2, 2]
+    assert recorder.chunks[0][0]["timestamp"].tzinfo is None  # stored as naive UTC
+    print("✅ JSON array batch test PASSED")
+
+
+def test_ndjson_body():
+    """An NDJSON stream is split into rows, blank lines skipped, and flushed in chunks."""
+    print("\n🔍 Testing NDJSON batch...")
+    lines = [json.dumps(make_sample(i)) for i in range(5)]
+    body = "\n".join(lines[:2] + ["", "{not json"] + lines[2:]) + "\n"
+    recorder = ChunkRecorder()
+
+    response = asyncio.run(post_batch(recorder, chunk_size=3, content=body.encode(),
+                                      headers={"Content-Type": "application/x-ndjson"}))
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["received"], result["inserted"], result["failed"]) == (6, 5, 1)
+    assert result["errors"][0]["row"] == 2
+    assert [len(chunk) for chunk in recorder.chunks] == [3, 2]
+    print("✅ NDJSON batch test PASSED")
+
+
+def test_body_that_is_not_an_array():
+    """A JSON body that isn't an array is a 400, and nothing is written."""
+    print("\n🔍 Testing non-array body...")
+    recorder = ChunkRecorder()
+    response = asyncio.run(post_batch(recorder, chunk_size=10, json=make_sample(0)))
+    assert response.status_code == 400
+    assert recorder.chunks == []
+    print("✅ Non-array body test PASSED")
+
+
+def main_runner():
+    """Run all batch ingest tests."""
+    print("🚁 Flight Data Batch Endpoint Test Suite")
+    print("=" * 60)
+    test_json_array_with_merged_errors()
+    test_ndjson_body()
+    test_body_that_is_not_an_array()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main_runner()
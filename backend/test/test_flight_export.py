@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming flight exports (NDJSON, and Arrow / Parquet when pyarrow is installed).
+Uses a small in-memory stand-in for the Motor collection instead of MongoDB.
+"""
+
+import sys
+import os
+import io
+import json
+import asyncio
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bson import ObjectId
+
+import flight_export
+from flight_export import iter_flight_batches, stream_export
+
+START = datetime(1997, 8, 6, 15, 40)
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction):
+        self.documents = sorted(self.documents, key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield dict(document)
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection=None):
+        return FakeCursor([doc for doc in self.documents if doc["flight_id"] == query["flight_id"]])
+
+
+def make_doc(i):
+    return {
+        "_id": ObjectId(),
+        "timestamp": START + timedelta(seconds=i),
+        "flight_id": "KAL801",
+        "aircraft_type": "Boeing 747-300",
+        "pilot_id": "P1",
+        "location": {"latitude": 13.4, "longitude": 144.7, "altitude_ft": 3000 - i},
+        "speed": {"airspeed_knots": 160, "groundspeed_knots": None, "vertical_speed_fpm": -900},
+        "engine": {"engine_1_rpm": 72, "engine_2_rpm": 71, "fuel_flow_gph": None},
+        "aircraft_systems": {"landing_gear_status": "DOWN", "flap_setting": "30", "autopilot_engaged": False, "warnings": []},
+        "environment": {"precipitation": "RAIN", "terrain_proximity_ft": 1200},
+        "pilot_actions": None
+    }
+
+
+async def collect(file_format, count, batch_size):
+    batches = iter_flight_batches(FakeCollection([make_doc(i) for i in range(count)]), {"flight_id": "KAL801"},
+                                  batch_size=batch_size)
+    return [chunk async for chunk in stream_export(batches, file_format)]
+
+
+def test_batches_are_bounded():
+    """The reader never holds more than batch_size documents."""
+    print("🔍 Testing export batch sizes...")
+
+    async def run():
+        batches = iter_flight_batches(FakeCollection([make_doc(i) for i in range(23)]), {"flight_id": "KAL801"}, batch_size=10)
+        return [len(batch) async for batch in batches]
+
+    assert asyncio.run(run()) == [10, 10, 3]
+    print("✅ Export batch size test PASSED")
+
+
+def test_ndjson_export():
+    """One JSON line per sample with ObjectId and datetime converted."""
+    print("\n🔍 Testing NDJSON export...")
+    chunks = asyncio.run(collect("ndjson", 23, 10))
+    assert len(chunks) == 3
+    lines = b"".join(chunks).decode().splitlines()
+    assert len(lines) == 23
+    first = json.loads(lines[0])
+    assert first["timestamp"] == START.isoformat()
+    assert isinstance(first["_id"], str)
+    print("✅ NDJSON export test PASSED")
+
+
+def test_arrow_and_parquet_export():
+    """Arrow IPC and Parquet round-trip with a flat, fixed schema."""
+    print("\n🔍 Testing Arrow / Parquet export...")
+    if flight_export.pa is None:
+        print("⚠️  pyarrow not installed - skipping")
+        return
+    pa, pq = flight_export.pa, flight_export.pq
+
+    table = pa.ipc.open_stream(b"".join(asyncio.run(collect("arrow", 23, 10)))).read_all()
+    assert table.num_rows == 23
+    assert table.column("location.altitude_ft").to_pylist()[:2] == [3000, 2999]
+    # All-null columns keep their declared type
+    assert table.schema.field("engine.fuel_flow_gph").type == pa.float64()
+
+    parquet = pq.read_table(io.BytesIO(b"".join(asyncio.run(collect("parquet", 23, 10)))))
+    assert parquet.num_rows == 23
+    assert parquet.column("timestamp").to_pylist()[0] == START
+    print("✅ Arrow / Parquet export test PASSED")
+
+
+def main():
+    """Run all flight export tests."""
+    print("🚁 Flight Export Test Suite")
+    print("=" * 60)
+    test_batches_are_bounded()
+    test_ndjson_export()
+    test_arrow_and_parquet_export()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test script for the flight history range reads: cursor pagination, projection and columnar shape.
+Uses a small in-memory stand-in for the Motor collection instead of MongoDB.
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flight_history import (
+    fetch_flight_history, parse_fields, build_projection, build_history_query, to_columnar, decode_cursor
+)
+
+START = datetime(1997, 8, 6, 15, 40)
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction):
+        self.documents = sorted(self.documents, key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def skip(self, count):
+        self.documents = self.documents[count:]
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self.documents[:length]
+
+
+class FakeCollection:
+    """Supports just the flight_id equality and $gte/$lte timestamp filters history reads use."""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection=None):
+        def matches(doc):
+            window = query.get("timestamp", {})
+            return (doc["flight_id"] == query["flight_id"]
+                    and doc["timestamp"] >= window.get("$gte", datetime.min)
+                    and doc["timestamp"] <= window.get("$lte", datetime.max))
+        return FakeCursor([doc for doc in self.documents if matches(doc)])
+
+
+def make_doc(seconds, altitude, flight_id="KAL801"):
+    return {
+        "flight_id": flight_id,
+        "timestamp": START + timedelta(seconds=seconds),
+        "location": {"altitude_ft": altitude, "latitude": 13.4},
+        "speed": {"airspeed_knots": 160}
+    }
+
+
+async def read_all(collection, limit, **kwargs):
+    samples, cursor, pages = [], None, 0
+    while True:
+        page, cursor = await fetch_flight_history(collection, {"flight_id": "KAL801"}, limit=limit, cursor=cursor, **kwargs)
+        samples.extend(page)
+        pages += 1
+        if cursor is None:
+            return samples, pages
+
+
+def test_pagination_covers_window_once():
+    """Paging through a window returns every sample exactly once, in order."""
+    print("🔍 Testing cursor pagination...")
+    docs = [make_doc(i, 3000 - i) for i in range(25)] + [make_doc(3, 0, flight_id="THY1951")]
+    samples, pages = asyncio.run(read_all(FakeCollection(docs), limit=10))
+    assert [doc["location"]["altitude_ft"] for doc in samples] == [3000 - i for i in range(25)]
+    assert pages == 3
+    print("✅ Cursor pagination test PASSED")
+
+
+def test_pagination_with_shared_timestamps():
+    """Samples sharing a timestamp across a page boundary are neither lost nor repeated."""
+    print("\n🔍 Testing pagination over tied timestamps...")
+    docs = [make_doc(0, 1), make_doc(1, 2), make_doc(1, 3), make_doc(1, 4), make_doc(1, 5), make_doc(2, 6)]
+    samples, _ = asyncio.run(read_all(FakeCollection(docs), limit=2))
+    assert sorted(doc["location"]["altitude_ft"] for doc in samples) == [1, 2, 3, 4, 5, 6]
+    print("✅ Tied timestamp pagination test PASSED")
+
+
+def test_time_window_and_timezone():
+    """start/end are inclusive and offset-aware params are compared as UTC."""
+    print("\n🔍 Testing time window...")
+    docs = [make_doc(i, i) for i in range(10)]
+    start = (START + timedelta(seconds=3)).replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=10)))
+    samples, _ = asyncio.run(read_all(FakeCollection(docs), limit=100, start=start, end=START + timedelta(seconds=5)))
+    assert [doc["location"]["altitude_ft"] for doc in samples] == [3, 4, 5]
+
+    query = build_history_query({"flight_id": "KAL801"}, start, None)
+    assert query["timestamp"]["$gte"] == START + timedelta(seconds=3)
+    print("✅ Time window test PASSED")
+
+
+def test_fields_and_columnar():
+    """Only known fields are projected and columnar output has one array per leaf."""
+    print("\n🔍 Testing projection and columnar shape...")
+    fields = parse_fields("location.altitude_ft, speed")
+    assert build_projection(fields) == {"_id": 0, "timestamp": 1, "location.altitude_ft": 1, "speed": 1}
+    assert build_projection(parse_fields("location,location.altitude_ft")) == {"_id": 0, "timestamp": 1, "location": 1}
+    try:
+        parse_fields("location.altitude_ft,$where")
+        assert False, "unknown field accepted"
+    except ValueError:
+        pass
+
+    columns = to_columnar([
+        {"timestamp": START, "location": {"altitude_ft": 900}},
+        {"timestamp": START + timedelta(seconds=1), "location": {"altitude_ft": 800}, "speed": {"airspeed_knots": 150}},
+    ])
+    assert columns["location.altitude_ft"] == [900, 800]
+    assert columns["speed.airspeed_knots"] == [None, 150]
+    print("✅ Projection and columnar test PASSED")
+
+
+def test_rejects_bad_cursor():
+    print("\n🔍 Testing malformed cursor...")
+    try:
+        decode_cursor("not-a-cursor")
+        assert False, "malformed cursor accepted"
+    except ValueError:
+        pass
+    print("✅ Malformed cursor test PASSED")
+
+
+def test_endpoint_limit_validation():
+    """limit=0 is rejected instead of silently becoming the default page size"""
+    print("\n🔍 Testing history endpoint limit...")
+    import httpx
+    import main
+
+    async def get(**params):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/flight_data/KAL801/history", params=params)
+
+    saved = main.flight_data_collection
+    main.flight_data_collection = FakeCollection([make_doc(i, 1000 - i) for i in range(3)])
+    try:
+        assert asyncio.run(get(limit=0)).status_code == 400
+        assert asyncio.run(get(limit=-5)).status_code == 400
+        response = asyncio.run(get())
+        assert response.status_code == 200 and len(response.json()["samples"]) == 3
+        assert len(asyncio.run(get(limit=2)).json()["samples"]) == 2
+    finally:
+        main.flight_data_collection = saved
+    print("✅ History endpoint limit test PASSED")
+
+
+def main():
+    """Run all flight history tests."""
+    print("🚁 Flight History Range API Test Suite")
+    print("=" * 60)
+    test_pagination_covers_window_once()
+    test_pagination_with_shared_timestamps()
+    test_time_window_and_timezone()
+    test_fields_and_columnar()
+    test_rejects_bad_cursor()
+    test_endpoint_limit_validation()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for the data-driven flight profile store (flight_profiles.json).
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from flight_profiles import FlightProfileStore, flight_profiles, DEFAULT_PROFILE
+
+PROFILES = {
+    "default_fallback": "Refer to emergency checklist.",
+    "profiles": {
+        "QTR": {
+            "facts": {"Flight ID": "QTR{1}", "Airport": "Doha (DOH)"},
+            "region": "Gulf",
+            "airports": [{"name": "Bahrain (BAH)", "distance": "75 NM", "ceiling": "1000ft", "visibility": "3 miles"}],
+            "blocked_airports": ["Frankfurt"],
+            "location_conflict": "Aircraft QTR is operating in the Gulf.",
+            "atc_contact": "Contact Doha ATC.",
+            "focus": {"divert_airport": "Gulf airports only."},
+            "briefing": {"emergency": ["Desert heat, {hot} and high"]}
+        }
+    },
+    "flights": {
+        "QTR1": {"profile": "QTR", "fallback": "Go around."},
+        "QTR2": {"profile": "QTR"}
+    }
+}
+
+
+def load(data):
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(data, f)
+    try:
+        return FlightProfileStore.load(f.name)
+    finally:
+        os.unlink(f.name)
+
+
+def test_new_flight_is_a_data_row():
+    """A flight added to the JSON file gets its profile, fallback and briefing without code changes"""
+    print("🔍 Testing flight rows...")
+    store = load(PROFILES)
+    assert store.profile_for("QTR1") == "QTR" and store.profile_for("QTR2") == "QTR"
+    assert store.profile_for("UNKNOWN") == DEFAULT_PROFILE
+    assert store.fallback("QTR1") == "Go around."
+    assert store.fallback("QTR2") == "Refer to emergency checklist."
+    assert store.briefing("QTR", "emergency") == "QTR:\n- Desert heat, {hot} and high"
+    assert store.briefing("QTR", "divert_airport") == store.default_briefing
+    assert store.briefing(DEFAULT_PROFILE, "emergency") == store.default_briefing
+    print("✅ Flight rows resolve correctly")
+
+
+def test_grounding_and_validation():
+    """Grounding is only used for intents with a focus, is template-safe, and drives the airport check"""
+    print("🔍 Testing grounding and airport validation...")
+    store = load(PROFILES)
+    assert store.grounding("QTR", "emergency") is None
+    assert store.grounding(DEFAULT_PROFILE, "divert_airport") is None
+
+    grounding = store.grounding("QTR", "divert_airport")
+    assert "Bahrain (BAH)" in grounding and "Gulf airports only." in grounding
+    prompt = ChatPromptTemplate.from_messages([("system", grounding), ("human", "{message}")])
+    assert prompt.input_variables == ["message"]  # the literal {1} in the facts is escaped
+
+    assert store.validate_airports("QTR", "QTR1: divert to Bahrain") == "QTR1: divert to Bahrain"
+    blocked = store.validate_airports("QTR", "QTR1: divert to Frankfurt")
+    assert "LOCATION CONFLICT" in blocked and "Bahrain (BAH)" in blocked and "Contact Doha ATC." in blocked
+    print("✅ Grounding and validation are driven by profile data")
+
+
+def test_unknown_profile_is_rejected():
+    """A flight row pointing at a missing profile fails at load time, not mid-request"""
+    print("🔍 Testing unknown profile reference...")
+    data = dict(PROFILES, flights={"X1": {"profile": "MISSING"}})
+    try:
+        load(data)
+    except ValueError as e:
+        assert "MISSING" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+    print("✅ Bad profile reference rejected")
+
+
+def test_shipped_profiles():
+    """The shipped file keeps the KAL801 grounding and the per-flight fallbacks"""
+    print("🔍 Testing shipped flight_profiles.json...")
+    assert flight_profiles.profile_for("CRASH_KAL801") == "KAL801"
+    assert "Andersen AFB (PGUA)" in flight_profiles.context("KAL801")
+    assert "SFO" in flight_profiles.fallback("CRASH_AAR214")
+    assert "Mariana Islands" in flight_profiles.validate_airports("KAL801", "KAL801 should divert to Honolulu")
+    print("✅ Shipped profiles load")
+
+
+def test_briefing_fills_prompt_context():
+    """Chat prompts carry no flight names; compile_chain fills {context} from the flight's profile"""
+    print("🔍 Testing prompt context from profile briefings...")
+    from langchain_core.runnables import RunnableLambda
+    from langchain_utils import compile_chain
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "Emergency copilot.\n{context}"),
+        ("human", "Flight ID: {flight_id}\n{message}")
+    ])
+    echo = RunnableLambda(lambda prompt_value: prompt_value.to_string())
+    inputs = {"flight_id": "TURKISH1951", "message": "altimeter?"}
+
+    thy = compile_chain(prompt, flight_profiles.profile_for("TURKISH1951"), "emergency", echo).chain.invoke(inputs)
+    assert "Radio altimeter failure" in thy and "Guam" not in thy
+    default = compile_chain(prompt, DEFAULT_PROFILE, "emergency", echo).chain.invoke(inputs)
+    assert flight_profiles.default_briefing in default
+    print("✅ Briefings reach the prompt through {context}")
+
+
+def main():
+    """Run all flight profile tests"""
+    print("🚀 Starting Flight Profile Tests")
+    print("=" * 50)
+    test_new_flight_is_a_data_row()
+    test_grounding_and_validation()
+    test_unknown_profile_is_rejected()
+    test_shipped_profiles()
+    test_briefing_fills_prompt_context()
+    print("=" * 50)
+    print("🎉 All flight profile tests passed!")
+
+
+if __name__ == "__main__":
+    main()
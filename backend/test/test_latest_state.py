@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Test script for the latest-sample-per-flight cache.
+The Redis backend is exercised against fakeredis when it is installed.
+"""
+
+import sys
+import os
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bson import ObjectId
+
+from latest_state import LatestStateCache, RedisLatestStateCache
+
+START = datetime(1997, 8, 6, 15, 40)
+
+
+def make_doc(flight_id, seconds, altitude):
+    return {
+        "_id": ObjectId(),
+        "flight_id": flight_id,
+        "timestamp": START + timedelta(seconds=seconds),
+        "location": {"altitude_ft": altitude}
+    }
+
+
+def ingested(seconds, altitude):
+    """A sample as the ingest endpoints store it (the frontend posts toISOString() with a "Z" suffix)."""
+    from models import FlightData
+    from telemetry_utils import flight_data_to_document
+
+    return flight_data_to_document(FlightData(
+        timestamp=(START + timedelta(seconds=seconds)).isoformat() + "Z",
+        flight_id="KAL801", aircraft_type="Boeing 747-300", pilot_id="P1",
+        location={"latitude": 13.4, "longitude": 144.7, "altitude_ft": altitude},
+        speed={"airspeed_knots": 160, "vertical_speed_fpm": -900},
+        engine={"engine_1_rpm": 72, "engine_2_rpm": 71},
+        aircraft_systems={"landing_gear_status": "DOWN", "flap_setting": "30", "autopilot_engaged": False},
+        environment={}
+    ))
+
+
+async def check_newest_wins(cache):
+    await cache.update_many([make_doc("KAL801", 2, 900), make_doc("THY1951", 1, 700)])
+    await cache.update(make_doc("KAL801", 1, 1000))  # late, older sample must not win
+
+    latest = await cache.get("KAL801")
+    assert latest["location"]["altitude_ft"] == 900
+    assert latest["timestamp"] == START + timedelta(seconds=2)
+    assert (await cache.get("THY1951"))["location"]["altitude_ft"] == 700
+    assert await cache.get("UNKNOWN") is None
+
+
+def test_memory_newest_sample_wins():
+    """Out-of-order samples never replace a newer one."""
+    print("🔍 Testing in-memory latest state...")
+    cache = LatestStateCache()
+    asyncio.run(check_newest_wins(cache))
+    assert cache.get_stats()["hits"] == 2
+    assert cache.get_stats()["misses"] == 1
+    print("✅ In-memory latest state test PASSED")
+
+
+def test_memory_returns_copies():
+    """Callers mutating the returned document (e.g. stringifying _id) don't touch the cache."""
+    print("\n🔍 Testing cached document isolation...")
+
+    async def run():
+        cache = LatestStateCache()
+        await cache.update(make_doc("KAL801", 1, 900))
+        first = await cache.get("KAL801")
+        first["_id"] = str(first["_id"])
+        second = await cache.get("KAL801")
+        assert isinstance(second["_id"], ObjectId)
+
+    asyncio.run(run())
+    print("✅ Cached document isolation test PASSED")
+
+
+def test_staleness_bound():
+    """Entries not refreshed within max_age_seconds are misses."""
+    print("\n🔍 Testing staleness bound...")
+
+    async def run():
+        cache = LatestStateCache(max_age_seconds=0.05)
+        await cache.update(make_doc("KAL801", 1, 900))
+        assert await cache.get("KAL801") is not None
+        time.sleep(0.06)
+        assert await cache.get("KAL801") is None
+
+    asyncio.run(run())
+    print("✅ Staleness bound test PASSED")
+
+
+def test_mixed_naive_and_aware_timestamps():
+    """Warmed (naive, from MongoDB) and ingested ("Z"-suffixed, aware) samples compare as UTC."""
+    print("\n🔍 Testing naive vs aware timestamps...")
+    async def run():
+        cache = LatestStateCache()
+        await cache.update(make_doc("KAL801", 1, 1000))  # warmed from MongoDB: naive
+        document = ingested(2, 900)
+        assert document["timestamp"] == START + timedelta(seconds=2)
+        assert document["timestamp"].tzinfo is None
+        await cache.update(document)
+        assert (await cache.get("KAL801"))["location"]["altitude_ft"] == 900
+
+        # Aware values that bypassed flight_data_to_document still compare
+        aware_old = make_doc("KAL801", 0, 1200)
+        aware_old["timestamp"] = aware_old["timestamp"].replace(tzinfo=timezone.utc)
+        await cache.update(aware_old)
+        assert (await cache.get("KAL801"))["location"]["altitude_ft"] == 900
+        aware_new = make_doc("KAL801", 3, 800)
+        aware_new["timestamp"] = aware_new["timestamp"].replace(tzinfo=timezone(timedelta(hours=10)))  # 3 s - 10 h
+        await cache.update(aware_new)
+        assert (await cache.get("KAL801"))["location"]["altitude_ft"] == 900
+
+    asyncio.run(run())
+    print("✅ Naive vs aware timestamps test PASSED")
+
+
+class LatestSampleCollection:
+    """Serves one stored document to find() and the warm-up aggregate, applying their projections."""
+
+    def __init__(self, document):
+        self.document = dict(document, _id=ObjectId())
+
+    def find(self, query, projection=None):
+        self.projection = projection
+        document = {key: value for key, value in self.document.items() if (projection or {}).get(key) != 0}
+        return LatestSampleCursor([document])
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        row = {"doc": dict(self.document)}
+        for stage in pipeline:
+            for path, include in stage.get("$project", {}).items():
+                if include == 0:
+                    row["doc"].pop(path.split(".", 1)[1], None)
+        return LatestSampleCursor([row])
+
+
+class LatestSampleCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self.documents)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def test_get_response_shape_matches_storage_mode():
+    """GET /flight_data/{flight_id} returns the same keys whether flight_data is a time-series collection or not."""
+    print("\n🔍 Testing response shape in time-series mode...")
+    import httpx
+    import main
+    import telemetry_utils
+    from config import settings
+
+    async def get_keys(source):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/flight_data/KAL801")
+        assert response.status_code == 200, (source, response.text)
+        return sorted(response.json())
+
+    async def response_keys(timeseries):
+        settings.FLIGHT_DATA_TIMESERIES = timeseries
+        document = ingested(1, 900)
+        assert ("meta" in document) == timeseries
+        collection = LatestSampleCollection(document)
+        telemetry_utils.flight_data_collection = collection
+
+        keys = {}
+        telemetry_utils.latest_state_cache = LatestStateCache()
+        await telemetry_utils.latest_state_cache.update(document)  # ingest path
+        keys["ingest"] = await get_keys("ingest")
+        telemetry_utils.latest_state_cache = LatestStateCache()
+        keys["mongo"] = await get_keys("mongo")  # cache miss, read from MongoDB
+        assert collection.projection == {"meta": 0}
+        telemetry_utils.latest_state_cache = LatestStateCache()
+        await telemetry_utils.latest_state_cache.warm(collection, "meta.flight_id" if timeseries else "flight_id")
+        keys["warm"] = await get_keys("warm")
+        return keys
+
+    saved = (settings.FLIGHT_DATA_TIMESERIES, telemetry_utils.flight_data_collection, telemetry_utils.latest_state_cache)
+    try:
+        plain = asyncio.run(response_keys(False))
+        timeseries = asyncio.run(response_keys(True))
+    finally:
+        settings.FLIGHT_DATA_TIMESERIES, telemetry_utils.flight_data_collection, telemetry_utils.latest_state_cache = saved
+    for source in ("ingest", "mongo", "warm"):
+        assert timeseries[source] == plain[source], source
+        assert "meta" not in timeseries[source]
+    print("✅ Response shape test PASSED")
+
+
+def test_redis_backend_with_fake():
+    """The Redis backend behaves like the in-memory one."""
+    print("\n🔍 Testing Redis latest state against fakeredis...")
+    try:
+        import fakeredis
+    except ImportError:
+        print("⚠️  fakeredis not installed - skipping")
+        return
+
+    async def run():
+        cache = RedisLatestStateCache(fakeredis.FakeAsyncRedis())
+        await check_newest_wins(cache)
+        # Another worker sharing the same Redis sees the same state
+        other_worker = RedisLatestStateCache(cache.client)
+        assert (await other_worker.get("KAL801"))["location"]["altitude_ft"] == 900
+
+    asyncio.run(run())
+    print("✅ Redis latest state test PASSED")
+
+
+def main():
+    """Run all latest state tests."""
+    print("🚁 Latest Flight State Cache Test Suite")
+    print("=" * 60)
+    test_memory_newest_sample_wins()
+    test_memory_returns_copies()
+    test_staleness_bound()
+    test_mixed_naive_and_aware_timestamps()
+    test_get_response_shape_matches_storage_mode()
+    test_redis_backend_with_fake()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
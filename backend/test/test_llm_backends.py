@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test script for the pluggable LLM backends (llm_client.create_llm / get_llm).
+The stub needs nothing; the OpenAI-compatible backend runs against a tiny local SSE server.
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+import llm_client
+from llm_client import OpenAICompatibleLLM, PooledOllama, StubLLM, create_llm, get_llm
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeOpenAIHandler.requests.append((self.path, self.headers.get("Authorization"), body))
+        if body["model"] == "missing-model":
+            payload = b'{"error": {"message": "model not found"}}'
+            self.send_response(404)
+        else:
+            events = [": keep-alive"] + [
+                "data: " + json.dumps({"choices": [{"delta": {"content": token}}]})
+                for token in ["Climb", " to", " FL120"]
+            ] + ["data: " + json.dumps({"choices": [{"delta": {}, "finish_reason": "stop"}]}), "data: [DONE]"]
+            payload = "\n\n".join(events).encode() + b"\n\n"
+            self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def fake_openai_url():
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{_server.server_address[1]}/v1"
+
+
+async def run_stub():
+    stub = StubLLM(response="Maintain heading and contact ATC.", first_token_seconds=0.05, tokens_per_second=100)
+    tokens = [token async for token in stub.astream("any prompt")]
+    assert tokens == ["Maintain", " heading", " and", " contact", " ATC."], tokens
+
+    start = time.perf_counter()
+    answer = await stub.ainvoke("a different prompt")
+    elapsed = time.perf_counter() - start
+    assert answer == "Maintain heading and contact ATC."
+    # 50 ms to the first token, then 4 more at 10 ms each
+    assert 0.08 <= elapsed < 0.5, elapsed
+
+    # Drops into a prompt | llm | parser chain like any other LLM
+    prompt = ChatPromptTemplate.from_messages([("human", "{flight_id}: {message}")])
+    chain = prompt | StubLLM() | StrOutputParser()
+    assert await chain.ainvoke({"flight_id": "KAL801", "message": "status?"}) == StubLLM().response
+
+
+def test_stub_backend():
+    """The stub streams its canned answer at the configured latency and token rate"""
+    print("\n🔍 Testing the stub backend...")
+    asyncio.run(run_stub())
+    assert StubLLM(response="Go around.").invoke("x") == "Go around."
+    print("✅ Stub streams canned tokens deterministically")
+
+
+async def run_openai_compatible(base_url):
+    FakeOpenAIHandler.requests.clear()
+    llm = OpenAICompatibleLLM(base_url=base_url, model="gemma-2b", api_key="secret", temperature=0.2)
+    assert [token async for token in llm.astream("Status?")] == ["Climb", " to", " FL120"]
+    assert await llm.ainvoke("Status?") == "Climb to FL120"
+
+    path, authorization, body = FakeOpenAIHandler.requests[0]
+    assert path == "/v1/chat/completions"
+    assert authorization == "Bearer secret"
+    assert body["stream"] is True and body["temperature"] == 0.2
+    assert body["messages"] == [{"role": "user", "content": "Status?"}]
+
+    missing = OpenAICompatibleLLM(base_url=base_url, model="missing-model")
+    try:
+        await missing.ainvoke("hello")
+        raise AssertionError("expected a 404 error")
+    except ValueError as e:
+        assert "status code 404" in str(e), e
+    await llm_client.aclose_clients()
+
+
+def test_openai_compatible_backend():
+    """Chat completions are streamed over SSE from an OpenAI-compatible server"""
+    print("\n🔍 Testing the OpenAI-compatible backend...")
+    base_url = fake_openai_url()
+    asyncio.run(run_openai_compatible(base_url))
+    assert OpenAICompatibleLLM(base_url=base_url).invoke("Status?") == "Climb to FL120"
+    print("✅ OpenAI-compatible streaming works (async and sync)")
+
+
+def test_backend_selection():
+    """create_llm picks the backend; get_llm shares one instance per backend and model"""
+    print("\n🔍 Testing backend selection...")
+    assert isinstance(create_llm("ollama"), PooledOllama)
+    assert isinstance(create_llm("openai"), OpenAICompatibleLLM)
+    assert isinstance(create_llm("stub"), StubLLM)
+    assert get_llm(backend="stub") is get_llm(backend="stub")
+    assert get_llm(backend="stub") is not get_llm()
+    try:
+        create_llm("bedrock")
+        raise AssertionError("expected an unknown backend error")
+    except ValueError as e:
+        assert "LLM_BACKEND" in str(e)
+    print("✅ Backends selected from settings")
+
+
+def main():
+    test_stub_backend()
+    test_openai_compatible_backend()
+    test_backend_selection()
+    print("\n✅ All LLM backend tests passed")
+
+
+if __name__ == "__main__":
+    main()
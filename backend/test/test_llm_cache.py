@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM response cache (exact tier, semantic tier, TTLs, emergency bypass).
+Uses a counting fake chain and a fake encoder instead of Ollama and MiniLM.
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+import numpy as np
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.runnables import Runnable
+
+from llm_cache import LLMResponseCache
+
+
+class CountingChain(Runnable):
+    """Stands in for prompt | llm | StrOutputParser(); answers with a call counter."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        return f"answer {self.calls} for {input['flight_id']}"
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return self.invoke(input, config)
+
+    async def astream(self, input, config=None, **kwargs):
+        answer = self.invoke(input, config)
+        for word in answer.split(" "):
+            yield word + " "
+
+
+def fake_encode(text):
+    # "status update" and "status update please" point the same way, anything else is orthogonal
+    return np.array([1.0, 0.05]) if text.startswith("status update") else np.array([0.0, 1.0])
+
+
+async def run_exact_tier():
+    cache = LLMResponseCache(ttls={"status_update": 60})
+    inner = CountingChain()
+    chain = cache.wrap(inner, "default:status_update", "status_update")
+
+    first = await chain.ainvoke({"flight_id": "KAL801", "message": "Status update"})
+    again = await chain.ainvoke({"flight_id": "KAL801", "message": "  status   UPDATE "})
+    other_flight = await chain.ainvoke({"flight_id": "AF447", "message": "status update"})
+    return cache, inner, first, again, other_flight
+
+
+def test_exact_tier():
+    """Identical questions (after normalization) are served from cache, per flight"""
+    print("🔍 Testing exact-match tier...")
+    cache, inner, first, again, other_flight = asyncio.run(run_exact_tier())
+    assert first == again
+    assert other_flight != first
+    assert inner.calls == 2
+
+    stats = cache.get_stats()["intents"]["status_update"]
+    assert stats["exact_hits"] == 1 and stats["misses"] == 2 and stats["hit_rate"] == round(1 / 3, 3)
+    print("✅ Normalized duplicates hit the cache")
+
+
+async def run_semantic_tier():
+    cache = LLMResponseCache(semantic=True, semantic_threshold=0.9, encode_fn=fake_encode)
+    inner = CountingChain()
+    chain = cache.wrap(inner, "default:status_update", "status_update")
+
+    first = await chain.ainvoke({"flight_id": "KAL801", "message": "status update"})
+    near = await chain.ainvoke({"flight_id": "KAL801", "message": "status update please"})
+    unrelated = await chain.ainvoke({"flight_id": "KAL801", "message": "check engines"})
+    other_flight = await chain.ainvoke({"flight_id": "AF447", "message": "status update please"})
+    return cache, inner, first, near, unrelated, other_flight
+
+
+def test_semantic_tier():
+    """Near-duplicate questions reuse an answer, but only for the same chain and flight"""
+    print("🔍 Testing semantic tier...")
+    cache, inner, first, near, unrelated, other_flight = asyncio.run(run_semantic_tier())
+    assert near == first
+    assert unrelated != first and other_flight != first
+    assert inner.calls == 3
+    assert cache.get_stats()["intents"]["status_update"]["semantic_hits"] == 1
+    print("✅ Near-duplicates matched by embedding")
+
+
+async def run_ttl_and_bypass():
+    cache = LLMResponseCache(ttls={"status_update": 0.05}, bypass_intents=["emergency"])
+    status_inner, emergency_inner = CountingChain(), CountingChain()
+    status_chain = cache.wrap(status_inner, "default:status_update", "status_update")
+    emergency_chain = cache.wrap(emergency_inner, "default:emergency", "emergency")
+
+    inputs = {"flight_id": "KAL801", "message": "pull up"}
+    await status_chain.ainvoke(inputs)
+    time.sleep(0.1)
+    await status_chain.ainvoke(inputs)
+    await emergency_chain.ainvoke(inputs)
+    await emergency_chain.ainvoke(inputs)
+    return cache, status_inner, emergency_inner
+
+
+def test_ttl_and_emergency_bypass():
+    """Entries expire per intent, and emergency answers are never cached"""
+    print("🔍 Testing TTL and emergency bypass...")
+    cache, status_inner, emergency_inner = asyncio.run(run_ttl_and_bypass())
+    assert status_inner.calls == 2
+    assert emergency_inner.calls == 2
+    assert cache.get_stats()["intents"]["emergency"]["bypassed"] == 2
+    print("✅ Expired entries regenerate, emergency bypasses the cache")
+
+
+def test_emergency_advisor_bypasses_shipped_cache():
+    """Two identical /advise_pilot/ requests both reach the LLM - emergency advice is never cached"""
+    print("🔍 Testing emergency advisor bypass...")
+    from llm_cache import llm_response_cache
+
+    inner = CountingChain()
+    chain = llm_response_cache.wrap(inner, "KAL801:emergency_advisor", "emergency_advisor")
+    inputs = {"flight_id": "KAL801", "warnings": "TERRAIN PULL UP"}
+
+    async def run():
+        return [await chain.ainvoke(inputs), await chain.ainvoke(inputs)]
+
+    assert asyncio.run(run()) == ["answer 1 for KAL801", "answer 2 for KAL801"]
+    assert inner.calls == 2
+    assert llm_response_cache.get_stats()["intents"]["emergency_advisor"]["bypassed"] == 2
+    print("✅ Every emergency advisor request reached the LLM")
+
+
+async def run_streaming():
+    cache = LLMResponseCache()
+    inner = CountingChain()
+    chain = cache.wrap(inner, "default:status_update", "status_update")
+    inputs = {"flight_id": "KAL801", "message": "status"}
+
+    # A stream abandoned half way (timeout / disconnect) must not be cached
+    stream = chain.astream(inputs)
+    await stream.__anext__()
+    await stream.aclose()
+
+    streamed = [chunk async for chunk in chain.astream(inputs)]
+    cached = [chunk async for chunk in chain.astream(inputs)]
+    return inner, streamed, cached
+
+
+def test_streaming():
+    """Completed streams are cached and replayed as one chunk; abandoned ones are not"""
+    print("🔍 Testing streaming through the cache...")
+    inner, streamed, cached = asyncio.run(run_streaming())
+    assert inner.calls == 2
+    assert len(streamed) > 1
+    assert cached == ["".join(streamed)]
+    print("✅ Streams cached only when complete")
+
+
+def main():
+    """Run all LLM cache tests"""
+    print("🚀 Starting LLM Response Cache Tests")
+    print("=" * 50)
+    test_exact_tier()
+    test_semantic_tier()
+    test_ttl_and_emergency_bypass()
+    test_emergency_advisor_bypasses_shipped_cache()
+    test_streaming()
+    print("=" * 50)
+    print("🎉 All LLM cache tests passed!")
+
+
+if __name__ == "__main__":
+    main()
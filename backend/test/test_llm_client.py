@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared pooled Ollama client (llm_client.py).
+Runs against a tiny local HTTP server that answers like Ollama's /api/generate.
+"""
+
+import sys
+import os
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from config import settings
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like Ollama
+    requests = []  # (client port, request body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+        FakeOllamaHandler.requests.append((self.client_address[1], body))
+        if body.get("model") == "missing:model":
+            payload = b'{"error": "model not found"}'
+            self.send_response(404)
+        elif "prompt" in body:
+            payload = (json.dumps({"response": "Descend to FL100", "done": False}) + "\n"
+                       + json.dumps({"response": "", "done": True}) + "\n").encode()
+            self.send_response(200)
+        else:
+            payload = json.dumps({"model": body.get("model"), "done": True}).encode()  # model load
+            self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def start_fake_ollama():
+    """Started once, by whichever test runs first (pytest or main())."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+        settings.OLLAMA_BASE_URL = f"http://127.0.0.1:{_server.server_address[1]}"
+    return _server
+
+
+def test_shared_instance():
+    """langchain_utils and router_utils use the same LLM object"""
+    print("\n🔍 Testing that both modules share one LLM instance...")
+    import langchain_utils
+    import router_utils
+    import llm_client
+
+    assert langchain_utils.llm is router_utils.llm
+    assert llm_client.get_llm() is langchain_utils.llm
+    assert llm_client.get_llm("llama3:8b") is not langchain_utils.llm
+    print("✅ One pooled LLM instance per model")
+
+
+async def run_pooled_generations():
+    import llm_client
+
+    FakeOllamaHandler.requests.clear()
+    llm = llm_client.PooledOllama(model=settings.OLLAMA_MODEL, base_url=settings.OLLAMA_BASE_URL,
+                                  keep_alive=settings.OLLAMA_KEEP_ALIVE)
+    answers = [await llm.ainvoke(f"Status of flight {i}?") for i in range(3)]
+    assert answers == ["Descend to FL100"] * 3, answers
+    assert llm_client.get_async_client() is llm_client.get_async_client()
+
+    ports = {port for port, _ in FakeOllamaHandler.requests}
+    assert len(FakeOllamaHandler.requests) == 3
+    assert len(ports) == 1, f"expected one reused connection, saw {len(ports)}"
+    assert all(body["keep_alive"] == settings.OLLAMA_KEEP_ALIVE for _, body in FakeOllamaHandler.requests)
+
+    # Errors match the stock Ollama class
+    missing = llm_client.PooledOllama(model="missing:model", base_url=settings.OLLAMA_BASE_URL)
+    try:
+        await missing.ainvoke("hello")
+        raise AssertionError("expected a 404 error")
+    except Exception as e:
+        assert "ollama pull missing:model" in str(e), e
+
+    assert await llm_client.ping_model() is True
+    assert "prompt" not in FakeOllamaHandler.requests[-1][1]
+    await llm_client.aclose_clients()
+
+
+def test_pooled_generations():
+    """Async generations reuse one keep-alive connection and send keep_alive"""
+    start_fake_ollama()
+    print("\n🔍 Testing pooled async generations...")
+    asyncio.run(run_pooled_generations())
+    print("✅ Three generations over one connection, keep_alive sent with each")
+
+
+def test_sync_generation():
+    """Sync invoke goes through the pooled sync client"""
+    start_fake_ollama()
+    print("\n🔍 Testing pooled sync generation...")
+    import llm_client
+
+    llm = llm_client.PooledOllama(model=settings.OLLAMA_MODEL, base_url=settings.OLLAMA_BASE_URL)
+    assert llm.invoke("Status?") == "Descend to FL100"
+    assert llm_client.get_sync_client() is llm_client.get_sync_client()
+    print("✅ Sync generation works")
+
+
+async def run_keep_warm():
+    import llm_client
+
+    FakeOllamaHandler.requests.clear()
+    llm_client._stats["last_request_at"] = None
+    task = asyncio.create_task(llm_client.keep_warm_loop(0.05))
+    await asyncio.sleep(0.12)
+    task.cancel()
+    await llm_client.aclose_clients()
+    # Idle the whole time: the initial load plus one ping per interval
+    assert len(FakeOllamaHandler.requests) >= 2, FakeOllamaHandler.requests
+    assert all("prompt" not in body for _, body in FakeOllamaHandler.requests)
+
+
+def test_keep_warm():
+    """The keep-warm loop pings an idle model"""
+    start_fake_ollama()
+    print("\n🔍 Testing keep-warm pings...")
+    asyncio.run(run_keep_warm())
+    print("✅ Idle model pinged")
+
+
+def main():
+    server = start_fake_ollama()
+    try:
+        test_shared_instance()
+        test_pooled_generations()
+        test_sync_generation()
+        test_keep_warm()
+        print("\n✅ All LLM client tests passed")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
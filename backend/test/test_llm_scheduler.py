@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM scheduler (concurrency limit, priority lanes, deadline admission).
+Uses asyncio.sleep in place of Ollama generations.
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from llm_scheduler import LLMScheduler, LLMDeadlineExceeded
+
+PRIORITIES = {"emergency": 0, "status_update": 2, "copilot_chat": 4, "pushed_advice": 5}
+
+
+async def run_priority_order():
+    scheduler = LLMScheduler(concurrency=1, priorities=PRIORITIES, deadline_seconds=5)
+    order = []
+
+    async def generation(name, seconds=0.02):
+        async def fn():
+            order.append(name)
+            await asyncio.sleep(seconds)
+        return fn
+
+    first = asyncio.create_task(scheduler.run("copilot_chat", await generation("copilot-1", 0.05)))
+    await asyncio.sleep(0.01)  # copilot-1 now holds the only slot
+    queued = [
+        asyncio.create_task(scheduler.run("copilot_chat", await generation("copilot-2"))),
+        asyncio.create_task(scheduler.run("status_update", await generation("status"))),
+        asyncio.create_task(scheduler.run("emergency", await generation("emergency"))),
+    ]
+    await asyncio.sleep(0.01)
+    depth = scheduler.queue_depth()
+    await asyncio.gather(first, *queued)
+    return scheduler, order, depth
+
+
+def test_priority_lanes():
+    """Queued emergencies start before status updates, which start before copilot questions"""
+    print("🔍 Testing priority lanes...")
+    scheduler, order, depth = asyncio.run(run_priority_order())
+    assert depth == 3
+    assert order == ["copilot-1", "emergency", "status", "copilot-2"]
+
+    stats = scheduler.get_stats()
+    assert stats["running"] == 0 and stats["queue_depth"] == 0
+    assert stats["lanes"]["copilot_chat"]["admitted"] == 2
+    assert stats["lanes"]["emergency"]["max_wait_ms"] > 0
+    print("✅ Lanes served in priority order")
+
+
+async def run_admission():
+    scheduler = LLMScheduler(concurrency=1, priorities=PRIORITIES, deadline_seconds=5)
+    scheduler.avg_generation_seconds = 1.0  # learned: each generation takes ~1 s
+    holder = asyncio.create_task(scheduler.run("status_update", lambda: asyncio.sleep(0.05)))
+    await asyncio.sleep(0.01)
+
+    start = time.monotonic()
+    try:
+        await scheduler.run("copilot_chat", lambda: asyncio.sleep(0), deadline_seconds=0.5)
+        rejected = False
+    except LLMDeadlineExceeded:
+        rejected = True
+    elapsed = time.monotonic() - start
+    # An emergency with a realistic deadline is still admitted behind the running generation
+    await scheduler.run("emergency", lambda: asyncio.sleep(0), deadline_seconds=5)
+    await holder
+    return scheduler, rejected, elapsed
+
+
+def test_deadline_admission():
+    """A request whose expected start is past its deadline is refused immediately"""
+    print("🔍 Testing deadline-aware admission...")
+    scheduler, rejected, elapsed = asyncio.run(run_admission())
+    assert rejected
+    assert elapsed < 0.02  # refused at admission, not after waiting
+    assert scheduler.get_stats()["lanes"]["copilot_chat"]["rejected"] == 1
+    assert scheduler.get_stats()["lanes"]["emergency"]["admitted"] == 1
+    print("✅ Hopeless requests refused up front")
+
+
+async def run_expiry_and_cancel():
+    scheduler = LLMScheduler(concurrency=1, priorities=PRIORITIES)
+    holder = asyncio.create_task(scheduler.run("status_update", lambda: asyncio.sleep(0.1)))
+    await asyncio.sleep(0.01)
+
+    expired = False
+    try:
+        await scheduler.run("copilot_chat", lambda: asyncio.sleep(0), deadline_seconds=0.03)
+    except LLMDeadlineExceeded:
+        expired = True
+
+    cancelled = asyncio.create_task(scheduler.run("status_update", lambda: asyncio.sleep(0)))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    await holder
+    # Neither the expired nor the cancelled waiter may keep a slot
+    await asyncio.wait_for(scheduler.run("status_update", lambda: asyncio.sleep(0)), 0.5)
+    return scheduler, expired
+
+
+def test_expiry_and_cancellation_release_slots():
+    """Waiters that time out or are cancelled leave the queue without leaking the slot"""
+    print("🔍 Testing expiry and cancellation...")
+    scheduler, expired = asyncio.run(run_expiry_and_cancel())
+    assert expired
+    stats = scheduler.get_stats()
+    assert stats["running"] == 0 and stats["queue_depth"] == 0
+    assert stats["lanes"]["copilot_chat"]["expired"] == 1
+    print("✅ Slots released")
+
+
+async def run_background_lane():
+    scheduler = LLMScheduler(concurrency=1, priorities=PRIORITIES, deadline_seconds=5)
+    order = []
+
+    def generation(name, seconds=0.02):
+        async def fn():
+            order.append(name)
+            await asyncio.sleep(seconds)
+        return fn
+
+    async def pushed(name):
+        # Same intent as the interactive call, but scheduled in the background lane
+        with scheduler.lane("pushed_advice"):
+            await scheduler.run("emergency", generation(name))
+
+    first = asyncio.create_task(scheduler.run("copilot_chat", generation("copilot", 0.05)))
+    await asyncio.sleep(0.01)
+    background = asyncio.create_task(pushed("pushed"))
+    await asyncio.sleep(0.01)
+    interactive = asyncio.create_task(scheduler.run("emergency", generation("pilot")))
+    await asyncio.gather(first, background, interactive)
+    return scheduler, order
+
+
+def test_background_lane():
+    """Work run inside scheduler.lane() queues behind interactive calls of the same intent"""
+    print("🔍 Testing the background lane...")
+    scheduler, order = asyncio.run(run_background_lane())
+    assert order == ["copilot", "pilot", "pushed"]
+    lanes = scheduler.get_stats()["lanes"]
+    assert lanes["pushed_advice"]["admitted"] == 1 and lanes["emergency"]["admitted"] == 1
+    assert LLMScheduler.lane_for("emergency") == "emergency"  # override ends with the block
+    print("✅ Background work served last")
+
+
+async def run_generation_timeout():
+    scheduler = LLMScheduler(concurrency=1, priorities=PRIORITIES, generation_timeout_seconds=0.05)
+    timed_out = False
+    try:
+        await scheduler.run("status_update", lambda: asyncio.sleep(5))
+    except LLMDeadlineExceeded:
+        timed_out = True
+    # The abandoned generation gave its slot back
+    await asyncio.wait_for(scheduler.run("emergency", lambda: asyncio.sleep(0)), 0.5)
+    return scheduler, timed_out
+
+
+def test_generation_timeout():
+    """A generation running past generation_timeout_seconds is cancelled and frees its slot"""
+    print("🔍 Testing the generation timeout...")
+    scheduler, timed_out = asyncio.run(run_generation_timeout())
+    assert timed_out
+    stats = scheduler.get_stats()
+    assert stats["running"] == 0
+    assert stats["lanes"]["status_update"]["timed_out"] == 1
+    print("✅ Stuck generation abandoned")
+
+
+def main():
+    """Run all LLM scheduler tests"""
+    print("🚀 Starting LLM Scheduler Tests")
+    print("=" * 50)
+    test_priority_lanes()
+    test_deadline_admission()
+    test_expiry_and_cancellation_release_slots()
+    test_background_lane()
+    test_generation_timeout()
+    print("=" * 50)
+    print("🎉 All LLM scheduler tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded LRU cache behind the similarity query caches.
+"""
+
+import sys
+import os
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from lru_cache import LRUCache
+
+
+def test_eviction_order():
+    """The least recently used entry is evicted first."""
+    print("🔍 Testing LRU eviction...")
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recent
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    print("✅ LRU eviction test PASSED")
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are treated as misses."""
+    print("\n🔍 Testing TTL expiry...")
+    cache = LRUCache(maxsize=10, ttl_seconds=0.05)
+    cache.set("query", [0.1, 0.2])
+    assert cache.get("query") == [0.1, 0.2]
+    time.sleep(0.06)
+    assert cache.get("query") is None
+    assert len(cache) == 0
+    print("✅ TTL expiry test PASSED")
+
+
+def test_hit_rate_stats():
+    """Hits and misses are counted for the stats endpoint."""
+    print("\n🔍 Testing hit rate stats...")
+    cache = LRUCache(maxsize=10)
+    cache.get("missing")
+    cache.set("k", "v")
+    cache.get("k")
+    cache.get("k")
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == round(2 / 3, 3)
+
+    cache.clear()
+    assert cache.get("k") is None
+    print("✅ Hit rate stats test PASSED")
+
+
+def main():
+    """Run all LRU cache tests."""
+    print("🚁 LRU Cache Test Suite")
+    print("=" * 60)
+    test_eviction_order()
+    test_ttl_expiry()
+    test_hit_rate_stats()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test script for resuming the flight_data -> time-series migration.
+Uses small in-memory collections instead of MongoDB.
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from migrate_flight_data_timeseries import copy_documents, resume_query
+
+START = datetime(2009, 2, 12, 22, 16)
+
+
+def matches(document, query):
+    # Just enough of MongoDB's query language for resume_query()
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not document[field] > condition["$gt"]:
+                return False
+        elif document[field] != condition:
+            return False
+    return True
+
+
+class MemoryCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.documents.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self.documents)
+        return self
+
+    async def __anext__(self):
+        try:
+            return dict(next(self._iter))
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class MemoryCollection:
+    """A collection that can crash after `crash_after` inserts and rejects documents in `reject`."""
+
+    def __init__(self, documents=(), crash_after=None, reject=()):
+        self.documents = list(documents)
+        self.crash_after = crash_after
+        self.reject = set(reject)
+        self.inserts = 0
+
+    def find(self, query):
+        return MemoryCursor([doc for doc in self.documents if matches(doc, query)])
+
+    async def find_one(self, query, sort):
+        documents = MemoryCursor(list(self.documents)).sort(sort).documents
+        return documents[0] if documents else None
+
+    async def insert_many(self, documents, ordered=True):
+        if self.crash_after is not None and self.inserts >= self.crash_after:
+            raise ConnectionError("migration interrupted")
+        self.inserts += 1
+        for index, document in enumerate(documents):
+            if document["_id"] in self.reject:
+                raise BulkWriteError({"nInserted": index, "writeErrors": [{"index": index, "errmsg": "rejected"}]})
+            self.documents.append(document)
+
+        class Result:
+            inserted_ids = [doc["_id"] for doc in documents]
+        return Result()
+
+
+def make_source(flights=("KAL801", "THY1951", "AAR214"), instants=4):
+    # Every flight reports at the same instants, so timestamps tie across flights
+    return [
+        {"_id": ObjectId(), "flight_id": flight_id, "aircraft_type": "Boeing 747-300",
+         "timestamp": START + timedelta(seconds=i)}
+        for i in range(instants) for flight_id in flights
+    ]
+
+
+def test_resume_with_tied_timestamps():
+    """An interrupted copy resumes without skipping samples that share the last copied timestamp."""
+    print("🔍 Testing resume across tied timestamps...")
+    source = MemoryCollection(make_source())
+
+    async def run():
+        # Batches of 2 end mid-instant (3 flights per timestamp); crash after the second batch
+        target = MemoryCollection(crash_after=2)
+        try:
+            await copy_documents(source, target, batch_size=2)
+        except ConnectionError:
+            pass
+        # The newest copied instant still has samples from other flights left to copy
+        newest = START + timedelta(seconds=1)
+        assert len(target.documents) == 4 and target.documents[-1]["timestamp"] == newest
+        assert sum(doc["timestamp"] == newest for doc in target.documents) == 1
+
+        target.crash_after = None
+        result = await copy_documents(source, target, batch_size=2)
+        return target, result
+
+    target, result = asyncio.run(run())
+    assert result == {"copied": 8, "skipped": 0}
+    assert sorted(doc["_id"] for doc in target.documents) == sorted(doc["_id"] for doc in source.documents)
+    assert all(doc["meta"]["flight_id"] == doc["flight_id"] for doc in target.documents)
+    print("✅ Resume test PASSED")
+
+
+def test_rejected_document_skipped():
+    """A document the target rejects is counted as skipped; the rest of its batch is still copied."""
+    print("\n🔍 Testing rejected documents...")
+    documents = make_source(instants=2)
+    source = MemoryCollection(documents)
+    target = MemoryCollection(reject={documents[1]["_id"]})
+    result = asyncio.run(copy_documents(source, target, batch_size=10))
+    assert result == {"copied": 5, "skipped": 1}
+    assert documents[1]["_id"] not in {doc["_id"] for doc in target.documents}
+    print("✅ Rejected document test PASSED")
+
+
+def test_resume_query():
+    """Nothing to resume from means copying everything."""
+    print("\n🔍 Testing resume query...")
+    assert resume_query(None) == {}
+    newest = {"_id": ObjectId(), "timestamp": START}
+    assert resume_query(newest)["$or"][1] == {"timestamp": START, "_id": {"$gt": newest["_id"]}}
+    print("✅ Resume query test PASSED")
+
+
+def main():
+    """Run all time-series migration tests."""
+    print("🚁 Time-Series Migration Test Suite")
+    print("=" * 60)
+    test_resume_with_tied_timestamps()
+    test_rejected_document_skipped()
+    test_resume_query()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for the MongoDB-aware JSON response encoder.
+"""
+
+import sys
+import os
+import json
+from datetime import datetime
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from bson import ObjectId
+
+import mongo_json
+from mongo_json import MongoJSONResponse, json_default
+
+START = datetime(1997, 8, 6, 15, 40, 0, 250000)
+
+
+def make_doc():
+    return {
+        "_id": ObjectId("64f5d0a6e234f1463be9ab12"),
+        "timestamp": START,
+        "location": {"altitude_ft": 900.5},
+        "history": [{"_id": ObjectId("64f5d0a6e234f1463be9ab13"), "at": START}],
+        # Anomaly engine / trend output: NumPy values and missing readings as NaN
+        "numpy": {"count": np.int64(3), "slope": np.float32(-1.5), "flag": np.bool_(True),
+                  "window": np.array([1.5, np.nan]), "ewma": np.float64("nan")},
+        "missing": [float("nan"), float("inf"), (1, 2)]
+    }
+
+
+def test_encodes_mongo_types_in_one_pass():
+    """Top-level and nested ObjectId/datetime values are converted while encoding."""
+    print("🔍 Testing MongoJSONResponse encoding...")
+    doc = make_doc()
+    body = json.loads(MongoJSONResponse(doc).body)
+    assert body["_id"] == "64f5d0a6e234f1463be9ab12"
+    assert body["timestamp"] == START.isoformat()
+    assert body["history"][0] == {"_id": "64f5d0a6e234f1463be9ab13", "at": START.isoformat()}
+    # The document itself is left untouched (cached documents can be returned as-is)
+    assert isinstance(doc["_id"], ObjectId)
+    print("✅ MongoJSONResponse encoding test PASSED")
+
+
+def test_numpy_and_non_finite_values():
+    """NumPy values and NaN/inf from the anomaly engine encode without a copy pass."""
+    print("\n🔍 Testing NumPy and non-finite values...")
+    body = json.loads(mongo_json.dumps(make_doc()))
+    assert body["numpy"] == {"count": 3, "slope": -1.5, "flag": True, "window": [1.5, None], "ewma": None}
+    assert body["missing"] == [None, None, [1, 2]]
+    try:
+        json_default(object())
+        assert False, "unknown type encoded"
+    except TypeError:
+        pass
+    print("✅ NumPy and non-finite values test PASSED")
+
+
+def main():
+    """Run all Mongo JSON encoder tests."""
+    print("🚁 Mongo JSON Encoder Test Suite")
+    print("=" * 60)
+    test_encodes_mongo_types_in_one_pass()
+    test_numpy_and_non_finite_values()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight request coalescing of identical LLM calls.
+Uses a slow fake chain instead of Ollama.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.runnables import Runnable
+
+from llm_cache import LLMResponseCache
+from single_flight import SingleFlight
+
+
+class SlowChain(Runnable):
+    """Stands in for a gemma:2b generation that takes a while."""
+
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, input, config=None, **kwargs):
+        raise NotImplementedError
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("Ollama unavailable")
+        return f"advice for {input['flight_id']}"
+
+
+async def run_coalescing():
+    single_flight = SingleFlight()
+    cache = LLMResponseCache(bypass_intents=["emergency"], single_flight=single_flight)
+    advisor, emergency = SlowChain(), SlowChain()
+    advisor_chain = cache.wrap(advisor, "KAL801:emergency_advisor", "emergency_advisor")
+    emergency_chain = cache.wrap(emergency, "default:emergency", "emergency")
+
+    inputs = {"flight_id": "KAL801", "altitude_ft": 2000}
+    answers = await asyncio.gather(*[advisor_chain.ainvoke(inputs) for _ in range(5)],
+                                   advisor_chain.ainvoke({"flight_id": "AF447", "altitude_ft": 2000}))
+    # Emergency skips the cache, but identical concurrent emergencies still share one generation
+    await asyncio.gather(*[emergency_chain.ainvoke(inputs) for _ in range(3)])
+    return single_flight, advisor, emergency, answers
+
+
+def test_concurrent_identical_calls_share_one_generation():
+    """Identical in-flight requests await one call, different inputs don't"""
+    print("🔍 Testing coalescing of concurrent identical calls...")
+    single_flight, advisor, emergency, answers = asyncio.run(run_coalescing())
+    assert advisor.calls == 2
+    assert emergency.calls == 1
+    assert answers[:5] == ["advice for KAL801"] * 5 and answers[5] == "advice for AF447"
+
+    stats = single_flight.get_stats()
+    assert stats["calls"] == 9 and stats["executions"] == 3 and stats["coalesced"] == 6
+    assert stats["collapse_ratio"] == 3.0 and stats["in_flight"] == 0
+    print("✅ 9 requests, 3 generations")
+
+
+async def run_cancelled_caller():
+    single_flight = SingleFlight()
+    cache = LLMResponseCache(single_flight=single_flight)
+    inner = SlowChain(delay=0.1)
+    chain = cache.wrap(inner, "default:status_update", "status_update")
+    inputs = {"flight_id": "KAL801", "message": "status"}
+
+    impatient = asyncio.create_task(asyncio.wait_for(chain.ainvoke(inputs), 0.02))
+    patient = asyncio.create_task(chain.ainvoke(inputs))
+    try:
+        await impatient
+    except asyncio.TimeoutError:
+        pass
+    answer = await patient
+    cached = await chain.ainvoke(inputs)
+    return inner, answer, cached
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    """A caller timing out leaves the shared generation running for everyone else"""
+    print("🔍 Testing caller timeout during a shared call...")
+    inner, answer, cached = asyncio.run(run_cancelled_caller())
+    assert answer == "advice for KAL801"
+    assert cached == answer
+    assert inner.calls == 1
+    print("✅ Shared call survived a caller timeout and was cached")
+
+
+async def run_failure():
+    single_flight = SingleFlight()
+    cache = LLMResponseCache(single_flight=single_flight)
+    chain = cache.wrap(SlowChain(fail=True), "default:status_update", "status_update")
+    inputs = {"flight_id": "KAL801", "message": "status"}
+    return await asyncio.gather(*[chain.ainvoke(inputs) for _ in range(3)], return_exceptions=True), single_flight
+
+
+def test_failure_reaches_every_caller():
+    """An Ollama error is raised to every coalesced caller and nothing is cached"""
+    print("🔍 Testing error propagation...")
+    results, single_flight = asyncio.run(run_failure())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert single_flight.get_stats()["executions"] == 1 and single_flight.in_flight() == 0
+    print("✅ All callers saw the error")
+
+
+def main():
+    """Run all single-flight tests"""
+    print("🚀 Starting Single-Flight Tests")
+    print("=" * 50)
+    test_concurrent_identical_calls_share_one_generation()
+    test_cancelled_caller_does_not_cancel_others()
+    test_failure_reaches_every_caller()
+    print("=" * 50)
+    print("🎉 All single-flight tests passed!")
+
+
+if __name__ == "__main__":
+    main()
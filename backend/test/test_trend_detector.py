@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-flight sliding-window trend detector.
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from trend_detector import TrendDetector, FlightTrendBuffer, FIELD_INDEX
+
+START = datetime(1997, 8, 6, 15, 40)
+
+
+def make_sample(seconds, altitude=3000, airspeed=160, vertical_speed=-700, terrain=None, flight_id="KAL801"):
+    return {
+        "flight_id": flight_id,
+        "aircraft_type": "Boeing 747-300",
+        "timestamp": START + timedelta(seconds=seconds),
+        "location": {"altitude_ft": altitude},
+        "speed": {"airspeed_knots": airspeed, "vertical_speed_fpm": vertical_speed},
+        "environment": {"terrain_proximity_ft": terrain}
+    }
+
+
+def test_slope_matches_least_squares():
+    """Rolling slopes equal a full least-squares fit over the window."""
+    print("🔍 Testing rolling slope...")
+    detector = TrendDetector(capacity=50, window_seconds=10)
+    rng = np.random.default_rng(7)
+    altitudes = 3000 - 12 * np.arange(200) + rng.normal(0, 3, 200)
+    detector.update_many([make_sample(i * 0.5, altitude=a) for i, a in enumerate(altitudes)])
+
+    trends = detector.get_trends("KAL801")
+    # 10 s window at 2 Hz = last 21 samples
+    times = np.arange(200)[-21:] * 0.5
+    expected = np.polyfit(times, altitudes[-21:], 1)[0] * 60
+    assert trends["samples"] == 21
+    assert abs(trends["fields"]["altitude_ft"]["slope_per_min"] - expected) < 0.5
+    print("✅ Rolling slope test PASSED")
+
+
+def test_ring_buffer_rebuild_stays_accurate():
+    """Thousands of samples through a small buffer don't drift."""
+    print("\n🔍 Testing ring buffer rebuild...")
+    buffer = FlightTrendBuffer(capacity=16, window_seconds=1000)
+    for i in range(5000):
+        buffer.add(START + timedelta(seconds=i), np.array([1000.0 + 2 * i, 150.0, np.nan, np.nan]))
+    assert buffer.count == 16
+    assert abs(buffer.slopes()[FIELD_INDEX["altitude_ft"]] - 2.0) < 1e-6
+    assert np.isnan(buffer.slopes()[FIELD_INDEX["vertical_speed_fpm"]])
+    print("✅ Ring buffer rebuild test PASSED")
+
+
+def test_terrain_closure_and_airspeed_decay():
+    """KAL801-style terrain closure and THY1951-style airspeed decay raise trend alerts."""
+    print("\n🔍 Testing trend alerts...")
+    detector = TrendDetector(window_seconds=20)
+    detector.update_many([
+        make_sample(i, altitude=2000 - 30 * i, airspeed=175 - 1.5 * i, terrain=1200 - 30 * i) for i in range(15)
+    ])
+    codes = {alert["code"]: alert for alert in detector.get_alerts("KAL801")}
+    assert codes["terrain_closure"]["severity"] == "critical"  # 780 ft left at 30 ft/s = 26 s
+    assert "airspeed_decay" in codes  # 154 kt falling 1.5 kt/s, Vref 150 in under 3 s
+    assert "sustained_steep_descent" in codes  # 1800 fpm below 2500 ft
+
+    steady = TrendDetector()
+    steady.update_many([make_sample(i, altitude=3000, terrain=2500) for i in range(15)])
+    assert steady.get_alerts("KAL801") == []
+    print("✅ Trend alert test PASSED")
+
+
+def test_out_of_order_and_ewma():
+    """Late samples are ignored and the EWMA follows the signal."""
+    print("\n🔍 Testing out-of-order samples and EWMA...")
+    detector = TrendDetector(ewma_tau_seconds=1.0)
+    detector.update_many([make_sample(i, airspeed=160) for i in range(10)])
+    detector.update_many([make_sample(3, airspeed=10)])  # late
+    detector.update_many([make_sample(10 + i, airspeed=140) for i in range(10)])
+    trends = detector.get_trends("KAL801")
+    assert detector.get_stats()["out_of_order"] == 1
+    assert trends["fields"]["airspeed_knots"]["current"] == 140
+    assert abs(trends["fields"]["airspeed_knots"]["ewma"] - 140) < 0.01
+    assert detector.get_trends("UNKNOWN") is None
+    print("✅ Out-of-order and EWMA test PASSED")
+
+
+def test_stale_buffer_has_no_alerts():
+    """Trend alerts expire once the flight stops ingesting for a whole window."""
+    print("\n🔍 Testing stale trend buffers...")
+    now = [1000.0]
+    detector = TrendDetector(window_seconds=20, clock=lambda: now[0])
+    # Same terrain closure as test_terrain_closure_and_airspeed_decay
+    detector.update_many([
+        make_sample(i, altitude=2000 - 30 * i, airspeed=175 - 1.5 * i, terrain=1200 - 30 * i) for i in range(15)
+    ])
+    assert detector.get_alerts("KAL801")
+    now[0] += 21  # nothing ingested for longer than the window
+    assert detector.get_alerts("KAL801") == []
+    trends = detector.get_trends("KAL801")
+    assert trends["stale"] is True and trends["alerts"] == []
+    print("✅ Stale buffer test PASSED")
+
+
+def test_naive_timestamps_are_utc():
+    """A naive timestamp and the same instant as an aware UTC value land at the same time."""
+    print("\n🔍 Testing naive timestamps...")
+    from datetime import timezone
+    from trend_detector import FlightTrendBuffer
+    naive, aware = FlightTrendBuffer(), FlightTrendBuffer()
+    naive.add(START, np.array([1000.0, 150.0, 0.0, np.nan]))
+    aware.add(START.replace(tzinfo=timezone.utc), np.array([1000.0, 150.0, 0.0, np.nan]))
+    assert naive.origin == aware.origin == START.replace(tzinfo=timezone.utc).timestamp()
+    print("✅ Naive timestamp test PASSED")
+
+
+def main():
+    """Run all trend detector tests."""
+    print("🚁 Trend Detector Test Suite")
+    print("=" * 60)
+    test_slope_matches_least_squares()
+    test_ring_buffer_rebuild_stays_accurate()
+    test_terrain_closure_and_airspeed_decay()
+    test_out_of_order_and_ewma()
+    test_stale_buffer_has_no_alerts()
+    test_naive_timestamps_are_utc()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
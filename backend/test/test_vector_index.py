@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory flight vector index used by /similar_crashes/.
+Runs without MongoDB or the embedding model - vectors are synthetic.
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from vector_index import FlightVectorIndex
+from ann_index import IVFBackend, read_meta
+
+
+def make_docs(count, dim=384, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, dim)).astype(np.float32)
+    return [
+        {"flight_id": f"CRASH_{i}", "summary": f"summary {i}", "vector": vectors[i].tolist()}
+        for i in range(count)
+    ]
+
+
+def brute_force(docs, query, top_k):
+    """Reference implementation matching the original per-document cosine loop."""
+    scored = []
+    for doc in docs:
+        v = np.array(doc["vector"])
+        scored.append((doc["flight_id"], np.dot(query, v) / (np.linalg.norm(query) * np.linalg.norm(v))))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:top_k]
+
+
+def test_search_matches_brute_force():
+    """Top-k results and scores match the original cosine similarity loop."""
+    print("🔍 Testing index search against brute force...")
+    docs = make_docs(500)
+    index = FlightVectorIndex()
+    index.build(docs)
+
+    query = np.random.default_rng(1).normal(size=384)
+    results = index.search(query, top_k=5)
+    expected = brute_force(docs, query, 5)
+
+    assert [r["flight_id"] for r in results] == [flight_id for flight_id, _ in expected]
+    for r, (_, score) in zip(results, expected):
+        assert abs(r["similarity"] - score) < 1e-5
+    print("✅ Index search test PASSED")
+
+
+def test_upsert_replaces_and_appends():
+    """Upserting an existing flight replaces its row; a new flight is appended."""
+    print("\n🔍 Testing index upsert...")
+    docs = make_docs(10)
+    index = FlightVectorIndex()
+    index.build(docs)
+    version = index.version
+
+    # Replace CRASH_3 with CRASH_7's vector - a CRASH_7 query should now tie between them
+    index.upsert("CRASH_3", "updated", docs[7]["vector"])
+    assert len(index) == 10
+    top_two = {r["flight_id"] for r in index.search(docs[7]["vector"], top_k=2)}
+    assert top_two == {"CRASH_3", "CRASH_7"}
+
+    index.upsert("CRASH_NEW", "new crash", docs[0]["vector"])
+    assert len(index) == 11
+    assert index.version == version + 2
+    print("✅ Index upsert test PASSED")
+
+
+def test_empty_index_and_large_top_k():
+    """Empty index returns nothing; top_k larger than the index returns everything."""
+    print("\n🔍 Testing edge cases...")
+    index = FlightVectorIndex()
+    assert index.search(np.ones(384), top_k=3) == []
+
+    index.build(make_docs(2))
+    assert len(index.search(np.ones(384), top_k=10)) == 2
+    assert index.search(np.ones(384), top_k=0) == []
+    print("✅ Edge case test PASSED")
+
+
+def test_search_latency():
+    """Search over a few thousand incident reports stays in the low milliseconds."""
+    print("\n🔍 Testing search latency...")
+    index = FlightVectorIndex()
+    index.build(make_docs(5000))
+    query = np.random.default_rng(2).normal(size=384)
+
+    start = time.perf_counter()
+    for _ in range(20):
+        index.search(query, top_k=3)
+    per_query_ms = (time.perf_counter() - start) / 20 * 1000
+
+    print(f"   5000 vectors: {per_query_ms:.2f} ms per query")
+    assert per_query_ms < 50
+    print("✅ Search latency test PASSED")
+
+
+def make_clustered_docs(count, clusters=50, dim=64, seed=0):
+    """Embeddings of real summaries cluster by topic; uniform noise is the worst case for IVF."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.3 * rng.normal(size=(count, dim))
+    return [
+        {"flight_id": f"CRASH_{i}", "summary": f"summary {i}", "vector": vectors[i].tolist()}
+        for i in range(count)
+    ]
+
+
+def test_ivf_recall_against_exact():
+    """IVF results overlap heavily with exact=True brute force, and nprobe trades recall for speed."""
+    print("\n🔍 Testing IVF recall...")
+    docs = make_clustered_docs(5000)
+    index = FlightVectorIndex()
+    index.set_ann_backend(IVFBackend(nprobe=8))
+    index.build(docs)
+    assert index.uses_ann()
+
+    queries = np.random.default_rng(3).normal(size=(20, 64))
+    queries = np.asarray([docs[i]["vector"] for i in range(0, 2000, 100)]) + 0.1 * queries
+
+    def recall(nprobe):
+        index.ann.nprobe = nprobe
+        hits = 0
+        for q in queries:
+            approx = {r["flight_id"] for r in index.search(q, top_k=10)}
+            exact = {r["flight_id"] for r in index.search(q, top_k=10, exact=True)}
+            hits += len(approx & exact)
+        return hits / (10 * len(queries))
+
+    low, high = recall(1), recall(16)
+    print(f"   recall@10 nprobe=1: {low:.2f}, nprobe=16: {high:.2f}")
+    assert high >= 0.9
+    assert high >= low
+    print("✅ IVF recall test PASSED")
+
+
+def test_ann_persisted_and_updated_incrementally():
+    """The ANN structure is saved next to the data, reloaded for identical vectors and grows with upserts."""
+    print("\n🔍 Testing ANN persistence...")
+    docs = make_clustered_docs(1000)
+    with tempfile.TemporaryDirectory() as directory:
+        index = FlightVectorIndex()
+        index.set_ann_backend(IVFBackend(nprobe=4), persist_dir=directory)
+        index.build(docs)
+        assert os.path.exists(os.path.join(directory, "ivf.npz"))
+
+        saved_meta = os.path.join(directory, "meta.json")
+        saved_at = os.path.getmtime(saved_meta)
+        index.upsert("CRASH_NEW", "new crash", docs[5]["vector"])
+        found = {r["flight_id"] for r in index.search(docs[5]["vector"], top_k=2)}
+        assert found == {"CRASH_5", "CRASH_NEW"}
+        # Single upserts don't rewrite the structure; shutdown does
+        assert os.path.getmtime(saved_meta) == saved_at
+        index.persist()
+
+        # A fresh process with the same data reuses the saved centroids
+        reloaded = FlightVectorIndex()
+        reloaded.set_ann_backend(IVFBackend(nprobe=4), persist_dir=directory)
+        reloaded.build(docs + [{"flight_id": "CRASH_NEW", "summary": "new crash", "vector": docs[5]["vector"]}])
+        assert np.array_equal(reloaded.ann.centroids, index.ann.centroids)
+        assert np.array_equal(reloaded.ann.assignments, index.ann.assignments)
+    print("✅ ANN persistence test PASSED")
+
+
+def test_fingerprint_tracked_incrementally():
+    """Upserts keep the fingerprint equal to a full rebuild of the same rows, and saves are batched."""
+    print("\n🔍 Testing incremental fingerprint and batched saves...")
+    docs = make_clustered_docs(200)
+    with tempfile.TemporaryDirectory() as directory:
+        index = FlightVectorIndex()
+        index.set_ann_backend(IVFBackend(nprobe=4), persist_dir=directory, persist_every=3)
+        index.build(docs[:100])
+        for doc in docs[100:102]:
+            index.upsert(doc["flight_id"], doc["summary"], doc["vector"])
+        index.upsert("CRASH_3", "replaced", docs[150]["vector"])  # replace in place
+
+        expected = docs[:102]
+        expected[3] = {"flight_id": "CRASH_3", "summary": "replaced", "vector": docs[150]["vector"]}
+        rebuilt = FlightVectorIndex()
+        rebuilt.build(expected)
+        assert index._fingerprint() == rebuilt._fingerprint()
+
+        # Third upsert reached persist_every: saved with the current fingerprint
+        meta = read_meta(directory)
+        assert meta["fingerprint"] == index._fingerprint() and meta["size"] == 102
+    print("✅ Incremental fingerprint test PASSED")
+
+
+def test_cached_search_results_are_copies():
+    """Mutating a returned result list must not change what the next cache hit returns."""
+    print("\n🔍 Testing cached search results are copies...")
+    import asyncio
+    import search_utils
+
+    docs = make_docs(20)
+    search_utils.flight_vector_index.build(docs)
+    search_utils._sync_query_caches()
+    query = "Terrain warnings were ignored"
+    # Seed the embedding so the test never loads the model
+    search_utils.query_embedding_cache.set(search_utils.normalize_query(query), docs[0]["vector"])
+
+    first = asyncio.run(search_utils.search_similar_flights(query, top_k=3))
+    expected = [dict(result) for result in first]
+    first[0]["summary"] = "edited by caller"
+    first.pop()
+
+    second = asyncio.run(search_utils.search_similar_flights(query, top_k=3))
+    assert second == expected
+    assert search_utils.search_results_cache.get_stats()["hits"] >= 1
+    print("✅ Cached search results copy test PASSED")
+
+
+def main():
+    """Run all vector index tests."""
+    print("🚁 Flight Vector Index Test Suite")
+    print("=" * 60)
+    test_search_matches_brute_force()
+    test_upsert_replaces_and_appends()
+    test_empty_index_and_large_top_k()
+    test_search_latency()
+    test_ivf_recall_against_exact()
+    test_ann_persisted_and_updated_incrementally()
+    test_fingerprint_tracked_incrementally()
+    test_cached_search_results_are_copies()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
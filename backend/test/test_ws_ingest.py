@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Test script for WebSocket telemetry write coalescing.
+Uses an in-memory insert function instead of MongoDB.
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ws_ingest import TelemetryCoalescer
+
+START = datetime(1997, 8, 6, 15, 40)
+
+
+def make_doc(i):
+    return {"flight_id": "KAL801", "timestamp": START + timedelta(seconds=i)}
+
+
+class RecordingStore:
+    """Collects inserted batches; rows listed in `reject` come back as write errors."""
+
+    def __init__(self, reject=(), delay=0.0):
+        self.batches = []
+        self.reject = set(reject)
+        self.delay = delay
+
+    async def insert(self, documents):
+        await asyncio.sleep(self.delay)
+        self.batches.append(list(documents))
+        errors = [(pos, "duplicate") for pos, doc in enumerate(documents) if doc["timestamp"] in self.reject]
+        return len(documents) - len(errors), errors
+
+
+def test_size_bounded_flush():
+    """A full batch is written without waiting for the interval."""
+    print("🔍 Testing size-bounded flush...")
+
+    async def run():
+        store, acks = RecordingStore(), []
+
+        async def on_flush(message):
+            acks.append(message)
+
+        coalescer = TelemetryCoalescer(store.insert, on_flush, max_batch=10, max_delay=60)
+        coalescer.start()
+        for i in range(25):
+            await coalescer.put(make_doc(i))
+        await asyncio.sleep(0.05)
+        # Two full batches flushed long before the 60s interval
+        assert [len(batch) for batch in store.batches] == [10, 10]
+        await coalescer.close()
+        return store, acks
+
+    store, acks = asyncio.run(run())
+    assert [len(batch) for batch in store.batches] == [10, 10, 5]
+    assert acks[-1]["total_persisted"] == 25
+    assert acks[-1]["last_persisted_timestamp"] == (START + timedelta(seconds=24)).isoformat()
+    print("✅ Size-bounded flush test PASSED")
+
+
+def test_time_bounded_flush():
+    """A partial batch is written once the interval passes."""
+    print("\n🔍 Testing time-bounded flush...")
+
+    async def run():
+        store, acks = RecordingStore(), []
+
+        async def on_flush(message):
+            acks.append(message)
+
+        coalescer = TelemetryCoalescer(store.insert, on_flush, max_batch=100, max_delay=0.05)
+        coalescer.start()
+        for i in range(3):
+            await coalescer.put(make_doc(i))
+        await asyncio.sleep(0.15)
+        assert [len(batch) for batch in store.batches] == [3]
+        assert acks[0]["type"] == "ack"
+        await coalescer.close()
+
+    asyncio.run(run())
+    print("✅ Time-bounded flush test PASSED")
+
+
+def test_ack_skips_failed_rows():
+    """The acked timestamp only covers rows that were actually persisted."""
+    print("\n🔍 Testing ack timestamps with failed rows...")
+
+    async def run():
+        store = RecordingStore(reject={START + timedelta(seconds=4)})
+        acks = []
+
+        async def on_flush(message):
+            acks.append(message)
+
+        coalescer = TelemetryCoalescer(store.insert, on_flush, max_batch=5, max_delay=60)
+        coalescer.start()
+        for i in range(5):
+            await coalescer.put(make_doc(i))
+        await coalescer.close()
+        return acks
+
+    acks = asyncio.run(run())
+    assert acks[0]["persisted"] == 4
+    assert acks[0]["failed"] == 1
+    assert acks[0]["last_persisted_timestamp"] == (START + timedelta(seconds=3)).isoformat()
+    print("✅ Failed row ack test PASSED")
+
+
+def test_backpressure():
+    """put() blocks once max_pending documents are waiting on a slow database."""
+    print("\n🔍 Testing backpressure...")
+
+    async def run():
+        store = RecordingStore(delay=0.2)
+
+        async def on_flush(message):
+            pass
+
+        coalescer = TelemetryCoalescer(store.insert, on_flush, max_batch=1, max_delay=0, max_pending=2)
+        coalescer.start()
+        await coalescer.put(make_doc(0))  # picked up by the flusher, now "writing"
+        await asyncio.sleep(0.01)
+        await coalescer.put(make_doc(1))
+        await coalescer.put(make_doc(2))  # buffer now full
+
+        blocked = asyncio.create_task(coalescer.put(make_doc(3)))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        await blocked  # frees up once the first write finishes
+        await coalescer.close()
+        return store
+
+    store = asyncio.run(run())
+    assert sum(len(batch) for batch in store.batches) == 4
+    print("✅ Backpressure test PASSED")
+
+
+def test_flusher_survives_failures():
+    """A batch that fails for any reason is reported and dropped; later batches still flush."""
+    print("\n🔍 Testing flusher resilience...")
+
+    async def run():
+        store, acks, calls = RecordingStore(), [], []
+
+        async def flaky_insert(documents):
+            calls.append(len(documents))
+            if len(calls) == 1:
+                raise RuntimeError("connection reset")
+            return await store.insert(documents)
+
+        async def on_flush(message):
+            acks.append(message)
+
+        coalescer = TelemetryCoalescer(flaky_insert, on_flush, max_batch=2, max_delay=60, max_pending=2)
+        coalescer.start()
+        for i in range(2):
+            await coalescer.put(make_doc(i))
+        # Naive (warmed / MongoDB style) and aware timestamps in one batch
+        aware = make_doc(3)
+        aware["timestamp"] = aware["timestamp"].replace(tzinfo=timezone.utc)
+        await coalescer.put(make_doc(2))
+        await coalescer.put(aware)
+        for i in range(4, 6):
+            await asyncio.wait_for(coalescer.put(make_doc(i)), 1)  # would hang if the flusher had died
+        await asyncio.wait_for(coalescer.close(), 1)
+        return store, acks
+
+    store, acks = asyncio.run(run())
+    assert acks[0] == {"type": "error", "error": "Write failed: connection reset", "dropped": 2}
+    assert [ack["type"] for ack in acks[1:]] == ["ack", "ack"]
+    assert acks[-1]["last_persisted_timestamp"] == (START + timedelta(seconds=5)).isoformat()
+    assert sum(len(batch) for batch in store.batches) == 4
+    print("✅ Flusher resilience test PASSED")
+
+
+def test_binary_frames():
+    """Binary frames holding JSON are ingested; undecodable ones get an error frame, not a dropped socket."""
+    print("\n🔍 Testing binary WebSocket frames...")
+    import json
+    from fastapi.testclient import TestClient
+    import main
+
+    inserted = []
+
+    async def insert(documents):
+        inserted.extend(documents)
+        return len(documents), []
+
+    sample = {
+        "timestamp": "1997-08-06T15:40:00Z", "flight_id": "KAL801", "aircraft_type": "Boeing 747-300",
+        "pilot_id": "P1", "location": {"latitude": 13.4, "longitude": 144.7, "altitude_ft": 1500},
+        "speed": {"airspeed_knots": 160, "vertical_speed_fpm": -900},
+        "engine": {"engine_1_rpm": 72, "engine_2_rpm": 71},
+        "aircraft_systems": {"landing_gear_status": "DOWN", "flap_setting": "30", "autopilot_engaged": False},
+        "environment": {}
+    }
+    original = main.insert_flight_documents
+    main.insert_flight_documents = insert  # no MongoDB here
+    try:
+        with TestClient(main.app).websocket_connect("/ws/flight_data/KAL801") as websocket:
+            websocket.send_bytes(b"\xff\xfe not json")
+            assert websocket.receive_json()["type"] == "error"
+            websocket.send_bytes(json.dumps(sample).encode())
+            websocket.send_text(json.dumps(sample))
+    finally:
+        main.insert_flight_documents = original
+    assert len(inserted) == 2
+    assert inserted[0]["timestamp"] == datetime(1997, 8, 6, 15, 40)
+    print("✅ Binary frames test PASSED")
+
+
+def main():
+    """Run all WebSocket ingest tests."""
+    print("🚁 WebSocket Telemetry Coalescing Test Suite")
+    print("=" * 60)
+    test_size_bounded_flush()
+    test_time_bounded_flush()
+    test_ack_skips_failed_rows()
+    test_backpressure()
+    test_flusher_survives_failures()
+    test_binary_frames()
+    print("\n🎉 ALL TESTS PASSED!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# backend/trend_detector.py
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from anomaly_engine import vref_for
+from models import utc_timestamp
+
+# field name -> (FlightData section, key)
+TRACKED_FIELDS = {
+    "altitude_ft": ("location", "altitude_ft"),
+    "airspeed_knots": ("speed", "airspeed_knots"),
+    "vertical_speed_fpm": ("speed", "vertical_speed_fpm"),
+    "terrain_proximity_ft": ("environment", "terrain_proximity_ft"),
+}
+FIELD_INDEX = {name: i for i, name in enumerate(TRACKED_FIELDS)}
+
+TREND_THRESHOLDS = {
+    "terrain_closure_warning_s": 60,  # terrain reached within this many seconds at the current trend
+    "terrain_closure_critical_s": 30,
+    "airspeed_decay_kt_per_s": -0.5,  # airspeed falling at least this fast...
+    "airspeed_to_vref_s": 30,  # ...and reaching Vref within this many seconds
+    "descent_rate_fpm": 1500,  # sustained altitude loss (from the altitude slope, not the VSI)
+    "descent_agl_ft": 2500,
+}
+
+
+class FlightTrendBuffer:
+    """
+    Fixed-size ring buffer of one flight's recent samples with O(1) rolling statistics.
+
+    Running sums (n, Σt, Σt², Σy, Σty per field) are updated as samples enter and
+    leave the window, so least-squares slopes need no pass over the buffer. The sums
+    are rebuilt from the buffer once per `capacity` samples to stop float drift
+    (amortized O(1)). EWMAs use a time-aware smoothing factor so uneven sample
+    spacing doesn't skew them.
+    """
+
+    def __init__(self, capacity: int = 600, window_seconds: float = 60.0, ewma_tau_seconds: float = 5.0):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.ewma_tau_seconds = ewma_tau_seconds
+        fields = len(TRACKED_FIELDS)
+        self.times = np.zeros(capacity)
+        self.values = np.full((capacity, fields), np.nan)
+        self.start = 0  # index of the oldest sample
+        self.count = 0
+        self.origin = None  # epoch seconds all times are relative to (keeps sums small)
+        self.ewma = np.full(fields, np.nan)
+        self.last_time = None
+        self.aircraft_type = None
+        self._since_rebuild = 0
+        self._reset_sums()
+
+    def _reset_sums(self):
+        fields = len(TRACKED_FIELDS)
+        self.n = np.zeros(fields)  # per field, since some fields may be missing in a sample
+        self.s_t = np.zeros(fields)
+        self.s_tt = np.zeros(fields)
+        self.s_y = np.zeros(fields)
+        self.s_ty = np.zeros(fields)
+
+    def _accumulate(self, t: float, y: np.ndarray, sign: float):
+        present = ~np.isnan(y)
+        y = np.where(present, y, 0.0)
+        self.n += sign * present
+        self.s_t += sign * present * t
+        self.s_tt += sign * present * t * t
+        self.s_y += sign * y
+        self.s_ty += sign * t * y
+
+    def _evict_oldest(self):
+        self._accumulate(self.times[self.start], self.values[self.start], -1.0)
+        self.start = (self.start + 1) % self.capacity
+        self.count -= 1
+
+    def _rebuild(self):
+        # Recompute the sums from the live samples and re-anchor the time origin
+        indexes = (self.start + np.arange(self.count)) % self.capacity
+        shift = self.times[indexes[0]] if self.count else 0.0
+        self.times[indexes] -= shift
+        self.origin += shift
+        self.last_time -= shift
+        self._reset_sums()
+        t = self.times[indexes][:, None]
+        y = self.values[indexes]
+        present = ~np.isnan(y)
+        self.n = present.sum(axis=0).astype(float)
+        self.s_t = (present * t).sum(axis=0)
+        self.s_tt = (present * t * t).sum(axis=0)
+        self.s_y = np.nansum(y, axis=0)
+        self.s_ty = np.nansum(t * y, axis=0)
+        self._since_rebuild = 0
+
+    def add(self, timestamp: datetime, values: np.ndarray) -> bool:
+        """Appends one sample. Samples not newer than the last one are ignored (returns False)."""
+        epoch = utc_timestamp(timestamp)  # naive timestamps are UTC (MongoDB), not local time
+        if self.origin is None:
+            self.origin = epoch
+        t = epoch - self.origin
+        if self.last_time is not None and t <= self.last_time:
+            return False
+
+        if self.count == self.capacity:
+            self._evict_oldest()
+        end = (self.start + self.count) % self.capacity
+        self.times[end] = t
+        self.values[end] = values
+        self.count += 1
+        self._accumulate(t, values, 1.0)
+
+        # Drop samples that have slid out of the time window
+        while self.count > 1 and self.times[self.start] < t - self.window_seconds:
+            self._evict_oldest()
+
+        # EWMA with alpha = 1 - exp(-dt / tau)
+        dt = t - self.last_time if self.last_time is not None else None
+        alpha = 1.0 if dt is None else 1.0 - math.exp(-dt / self.ewma_tau_seconds)
+        present = ~np.isnan(values)
+        fresh = present & np.isnan(self.ewma)
+        self.ewma = np.where(fresh, values, self.ewma)
+        self.ewma = np.where(present & ~fresh, alpha * values + (1 - alpha) * self.ewma, self.ewma)
+        self.last_time = t
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.capacity:
+            self._rebuild()
+        return True
+
+    def latest(self) -> np.ndarray:
+        if not self.count:
+            return np.full(len(TRACKED_FIELDS), np.nan)
+        return self.values[(self.start + self.count - 1) % self.capacity]
+
+    def slopes(self) -> np.ndarray:
+        """Least-squares slope per field, in units per second (NaN with fewer than 2 samples)."""
+        denominator = self.n * self.s_tt - self.s_t ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (self.n * self.s_ty - self.s_t * self.s_y) / denominator
+        return np.where((self.n >= 2) & (np.abs(denominator) > 1e-9), slope, np.nan)
+
+    def time_to_threshold(self, field: str, threshold: float) -> Optional[float]:
+        """Seconds until `field` crosses `threshold` at the current slope, None if it isn't heading there."""
+        i = FIELD_INDEX[field]
+        current, slope = self.latest()[i], self.slopes()[i]
+        if np.isnan(current) or np.isnan(slope) or slope == 0:
+            return None
+        seconds = (threshold - current) / slope
+        return float(seconds) if seconds >= 0 else None
+
+
+def _extract(document: Dict) -> np.ndarray:
+    values = []
+    for section, key in TRACKED_FIELDS.values():
+        value = (document.get(section) or {}).get(key)
+        values.append(np.nan if value is None else float(value))
+    return np.array(values)
+
+
+def _round(value) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), 2)
+
+
+def trend_alerts(buffer: FlightTrendBuffer) -> List[Dict]:
+    """Trend rules evaluated from the rolling statistics; same shape as anomaly_engine anomalies."""
+    alerts = []
+    latest = buffer.latest()
+    slopes = buffer.slopes()
+
+    to_terrain = buffer.time_to_threshold("terrain_proximity_ft", 0)
+    if to_terrain is not None and to_terrain < TREND_THRESHOLDS["terrain_closure_warning_s"]:
+        severity = "critical" if to_terrain < TREND_THRESHOLDS["terrain_closure_critical_s"] else "warning"
+        alerts.append({"code": "terrain_closure", "severity": severity,
+                       "message": f"Closing on terrain - impact in {to_terrain:.0f} s at current trend",
+                       "value": round(to_terrain, 1), "threshold": TREND_THRESHOLDS["terrain_closure_warning_s"]})
+
+    airspeed_slope = slopes[FIELD_INDEX["airspeed_knots"]]
+    if not np.isnan(airspeed_slope) and airspeed_slope <= TREND_THRESHOLDS["airspeed_decay_kt_per_s"]:
+        to_vref = buffer.time_to_threshold("airspeed_knots", vref_for(buffer.aircraft_type))
+        if to_vref is not None and to_vref < TREND_THRESHOLDS["airspeed_to_vref_s"]:
+            alerts.append({"code": "airspeed_decay", "severity": "critical",
+                           "message": f"Airspeed decaying {abs(airspeed_slope):.1f} kt/s - below Vref in {to_vref:.0f} s",
+                           "value": round(float(airspeed_slope), 2), "threshold": TREND_THRESHOLDS["airspeed_decay_kt_per_s"]})
+
+    descent_fpm = -slopes[FIELD_INDEX["altitude_ft"]] * 60
+    terrain_now = latest[FIELD_INDEX["terrain_proximity_ft"]]
+    agl = latest[FIELD_INDEX["altitude_ft"]] if np.isnan(terrain_now) else terrain_now
+    if not np.isnan(descent_fpm) and descent_fpm > TREND_THRESHOLDS["descent_rate_fpm"] and agl < TREND_THRESHOLDS["descent_agl_ft"]:
+        alerts.append({"code": "sustained_steep_descent", "severity": "warning",
+                       "message": f"Sustained descent of {descent_fpm:.0f} fpm below {TREND_THRESHOLDS['descent_agl_ft']} ft AGL",
+                       "value": round(float(descent_fpm), 1), "threshold": TREND_THRESHOLDS["descent_rate_fpm"]})
+    return alerts
+
+
+class TrendDetector:
+    """
+    Per-flight trend buffers, updated from the ingest hook and read by the advisor endpoints.
+    Holds at most `max_flights` buffers; the least recently updated flight is dropped first.
+
+    A flight that hasn't ingested anything for `window_seconds` has no current trend: its
+    alerts are dropped rather than attached to whatever sample an endpoint is handed now.
+    Staleness is measured on the ingest clock, so replayed historical telemetry still trends.
+    """
+
+    def __init__(self, capacity: int = 600, window_seconds: float = 60.0,
+                 ewma_tau_seconds: float = 5.0, max_flights: int = 1000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.ewma_tau_seconds = ewma_tau_seconds
+        self.max_flights = max_flights
+        self.clock = clock
+        self._updated_at: Dict[str, float] = {}  # flight_id -> clock() of its newest accepted sample
+        self._buffers: "OrderedDict[str, FlightTrendBuffer]" = OrderedDict()
+        self.samples = 0
+        self.out_of_order = 0
+
+    def update_many(self, documents: List[Dict]) -> None:
+        for document in documents:
+            flight_id = document.get("flight_id")
+            timestamp = document.get("timestamp")
+            if flight_id is None or not isinstance(timestamp, datetime):
+                continue
+            buffer = self._buffers.get(flight_id)
+            if buffer is None:
+                buffer = FlightTrendBuffer(self.capacity, self.window_seconds, self.ewma_tau_seconds)
+                self._buffers[flight_id] = buffer
+                if len(self._buffers) > self.max_flights:
+                    dropped, _ = self._buffers.popitem(last=False)
+                    self._updated_at.pop(dropped, None)
+            self._buffers.move_to_end(flight_id)
+            buffer.aircraft_type = document.get("aircraft_type", buffer.aircraft_type)
+            if buffer.add(timestamp, _extract(document)):
+                self.samples += 1
+                self._updated_at[flight_id] = self.clock()
+            else:
+                self.out_of_order += 1
+
+    def get_trends(self, flight_id: str) -> Optional[Dict]:
+        """
+        Rolling view of a flight's recent samples, or None if nothing was ingested for it.
+
+        Returns:
+            {"samples", "window_seconds", "fields": {name: {current, ewma, slope_per_min}}, "alerts": [...]}
+        """
+        buffer = self._buffers.get(flight_id)
+        if buffer is None or not buffer.count:
+            return None
+        latest, slopes = buffer.latest(), buffer.slopes()
+        fields = {
+            name: {"current": _round(latest[i]), "ewma": _round(buffer.ewma[i]), "slope_per_min": _round(slopes[i] * 60)}
+            for name, i in FIELD_INDEX.items()
+        }
+        stale = not self.is_current(flight_id)
+        return {"samples": buffer.count, "window_seconds": self.window_seconds, "stale": stale,
+                "fields": fields, "alerts": [] if stale else trend_alerts(buffer)}
+
+    def is_current(self, flight_id: str) -> bool:
+        """True while the flight's newest sample arrived within the trend window."""
+        updated_at = self._updated_at.get(flight_id)
+        return updated_at is not None and self.clock() - updated_at <= self.window_seconds
+
+    def get_alerts(self, flight_id: str) -> List[Dict]:
+        buffer = self._buffers.get(flight_id)
+        if buffer is None or not buffer.count or not self.is_current(flight_id):
+            return []
+        return trend_alerts(buffer)
+
+    def get_stats(self) -> Dict:
+        return {"flights": len(self._buffers), "samples": self.samples, "out_of_order": self.out_of_order,
+                "window_seconds": self.window_seconds, "capacity": self.capacity}
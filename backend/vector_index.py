@@ -0,0 +1,222 @@
+# backend/vector_index.py
+import hashlib
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ann_index import ANNBackend, read_meta, write_meta
+
+FINGERPRINT_MODULUS = 1 << 160
+
+
+def _row_hash(row: int, flight_id: str, vector: np.ndarray) -> int:
+    digest = hashlib.sha1(f"{row}:{flight_id}:".encode())
+    digest.update(memoryview(np.ascontiguousarray(vector)).cast("B"))
+    return int.from_bytes(digest.digest(), "big")
+
+
+class FlightVectorIndex:
+    """
+    Resident, pre-normalized float32 matrix of flight_vectors embeddings.
+
+    Rows of `matrix` line up with `flight_ids` and `summaries`, so a query is one
+    matrix-vector product instead of a Mongo scan plus a Python scoring loop.
+    Every mutation builds new arrays and swaps them in, so concurrent searches
+    always see a consistent snapshot without locking.
+
+    An optional ANN backend (see ann_index.py) answers queries once the corpus is
+    large enough; the exact matrix is always kept for `exact=True` searches. Upserts
+    update it in place and it is saved every `persist_every` upserts (and by persist()
+    at shutdown), not on every write.
+    """
+
+    def __init__(self):
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.flight_ids: List[str] = []
+        self.summaries: List[str] = []
+        self._positions: Dict[str, int] = {}  # flight_id -> row, first occurrence wins
+        self.loaded = False
+        self.version = 0  # bumped on every change so caches can key on it
+        self.last_build_seconds: Optional[float] = None
+
+        self.ann: Optional[ANNBackend] = None
+        self.ann_min_size = 0  # below this many vectors brute force is already fast
+        self.persist_dir: Optional[str] = None
+        self.persist_every = 100
+        self._unsaved_upserts = 0
+        # Sum of per-row hashes, kept up to date by build() and upsert() so the
+        # fingerprint never needs a pass over the whole matrix
+        self._fingerprint_sum = 0
+
+    def set_ann_backend(self, backend: Optional[ANNBackend], persist_dir: Optional[str] = None, min_size: int = 0,
+                        persist_every: int = 100) -> None:
+        """
+        Attaches an ANN backend. Call before build(); None means exact search only.
+        """
+        self.ann = backend
+        self.persist_dir = persist_dir
+        self.ann_min_size = min_size
+        self.persist_every = max(1, persist_every)
+
+    def _fingerprint(self) -> str:
+        # Identifies the exact data (row order, ids, vectors) an on-disk ANN structure was built from
+        return f"{len(self)}-{self._fingerprint_sum:040x}"
+
+    def _persist_ann(self) -> None:
+        if self.ann is None or self.persist_dir is None:
+            return
+        os.makedirs(self.persist_dir, exist_ok=True)
+        self.ann.save(self.persist_dir)
+        write_meta(self.persist_dir, {"backend": self.ann.name, "size": len(self), "fingerprint": self._fingerprint()})
+        self._unsaved_upserts = 0
+
+    def persist(self) -> None:
+        """Saves the ANN structure if upserts changed it since the last save (call at shutdown)."""
+        if self._unsaved_upserts:
+            self._persist_ann()
+
+    def _build_ann(self) -> None:
+        if self.ann is None:
+            return
+        # Reuse the structure saved next to the data if it was built from exactly these vectors
+        if self.persist_dir is not None:
+            meta = read_meta(self.persist_dir)
+            if (
+                meta
+                and meta.get("backend") == self.ann.name
+                and meta.get("fingerprint") == self._fingerprint()
+                and self.ann.load(self.persist_dir, self.matrix)
+            ):
+                print(f"✅ Loaded {self.ann.name} index for {len(self)} vectors from {self.persist_dir}")
+                return
+        self.ann.build(self.matrix)
+        self._persist_ann()
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        # Pre-normalizing rows turns cosine similarity into a plain dot product
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32, copy=False)
+
+    def build(self, docs: List[Dict]) -> None:
+        """
+        Rebuilds the index from flight_vectors documents ({flight_id, summary, vector}).
+        """
+        start = time.perf_counter()
+        docs = [doc for doc in docs if doc.get("vector")]
+        if docs:
+            matrix = self._normalize(np.asarray([doc["vector"] for doc in docs], dtype=np.float32))
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        flight_ids = [doc["flight_id"] for doc in docs]
+        summaries = [doc.get("summary", "") for doc in docs]
+
+        positions = {}
+        for row, flight_id in enumerate(flight_ids):
+            positions.setdefault(flight_id, row)
+
+        fingerprint_sum = sum(_row_hash(row, flight_id, matrix[row]) for row, flight_id in enumerate(flight_ids))
+
+        # Swap everything in at once
+        self.matrix, self.flight_ids, self.summaries, self._positions = matrix, flight_ids, summaries, positions
+        self._fingerprint_sum = fingerprint_sum % FINGERPRINT_MODULUS
+        self._build_ann()
+        self.loaded = True
+        self.version += 1
+        self.last_build_seconds = time.perf_counter() - start
+
+    def upsert(self, flight_id: str, summary: str, vector) -> None:
+        """
+        Inserts or replaces a single flight's row, mirroring a write to flight_vectors.
+        """
+        row_vector = self._normalize(np.asarray(vector, dtype=np.float32).reshape(1, -1))
+
+        row = self._positions.get(flight_id)
+        if row is not None:
+            old_hash = _row_hash(row, flight_id, self.matrix[row])
+            matrix = self.matrix.copy()
+            matrix[row] = row_vector[0]
+            summaries = list(self.summaries)
+            summaries[row] = summary
+            self.matrix, self.summaries = matrix, summaries
+            self._fingerprint_sum = (self._fingerprint_sum - old_hash + _row_hash(row, flight_id, row_vector[0])) % FINGERPRINT_MODULUS
+            if self.ann is not None:
+                self.ann.update(row, row_vector[0])
+        else:
+            matrix = row_vector if self.matrix.size == 0 else np.vstack([self.matrix, row_vector])
+            positions = dict(self._positions)
+            positions[flight_id] = len(self.flight_ids)
+            self.matrix, self.flight_ids, self.summaries, self._positions = (
+                matrix, self.flight_ids + [flight_id], self.summaries + [summary], positions
+            )
+            self._fingerprint_sum = (self._fingerprint_sum + _row_hash(len(self) - 1, flight_id, row_vector[0])) % FINGERPRINT_MODULUS
+            if self.ann is not None:
+                # Incremental add, with a full rebuild once the corpus has outgrown the trained structure
+                if self.ann.needs_retrain(len(self)):
+                    self.ann.build(self.matrix)
+                else:
+                    self.ann.add(row_vector, len(self) - 1)
+        self._unsaved_upserts += 1
+        if self._unsaved_upserts >= self.persist_every:
+            self._persist_ann()
+        self.loaded = True
+        self.version += 1
+
+    def uses_ann(self, exact: bool = False) -> bool:
+        return not exact and self.ann is not None and len(self) >= self.ann_min_size
+
+    def search(self, query_vector, top_k: int = 3, exact: bool = False) -> List[Dict]:
+        """
+        Returns the top_k most similar flights as {flight_id, summary, similarity}, best first.
+
+        Args:
+            query_vector: Query embedding (any norm)
+            top_k: Number of results
+            exact: Skip the ANN backend and brute-force the whole matrix (for recall checks)
+        """
+        matrix, flight_ids, summaries = self.matrix, self.flight_ids, self.summaries
+        if top_k <= 0 or matrix.shape[0] == 0:
+            return []
+
+        query = self._normalize(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+
+        if self.uses_ann(exact):
+            rows, top_scores = self.ann.search(matrix, query, top_k)
+        else:
+            scores = matrix @ query
+            # argpartition finds the top k in O(n); only those k get fully sorted
+            k = min(top_k, scores.shape[0])
+            rows = np.argpartition(-scores, k - 1)[:k]
+            rows = rows[np.argsort(-scores[rows])]
+            top_scores = scores[rows]
+
+        return [
+            {
+                "flight_id": flight_ids[row],
+                "summary": summaries[row],
+                "similarity": float(score)
+            }
+            for row, score in zip(rows, top_scores)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.flight_ids)
+
+    def get_stats(self) -> Dict:
+        return {
+            "loaded": self.loaded,
+            "size": len(self),
+            "dimension": int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0,
+            "version": self.version,
+            "last_build_seconds": self.last_build_seconds,
+            "ann_backend": self.ann.name if self.ann is not None else "exact",
+            "ann_params": self.ann.get_params() if self.ann is not None else {},
+            "ann_active": self.uses_ann(),
+        }
+
+
+# Module-level instance shared by search_utils and main
+flight_vector_index = FlightVectorIndex()
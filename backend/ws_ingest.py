@@ -0,0 +1,118 @@
+# backend/ws_ingest.py
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+from models import to_naive_utc
+
+# Sentinel telling the flusher to drain and stop
+_CLOSE = object()
+
+InsertFn = Callable[[List[Dict]], Awaitable[Tuple[int, List[Tuple[int, str]]]]]
+AckFn = Callable[[Dict], Awaitable[None]]
+
+
+class TelemetryCoalescer:
+    """
+    Buffers FlightData documents from one WebSocket and writes them in batches.
+
+    A batch is flushed when it reaches `max_batch` documents or `max_delay` seconds
+    after its first document arrived, whichever comes first. The buffer holds at most
+    `max_pending` documents: once full, put() blocks, the socket stops being read and
+    TCP flow control pushes back on the sender.
+    """
+
+    def __init__(self, insert_fn: InsertFn, on_flush: AckFn, max_batch: int = 200,
+                 max_delay: float = 0.25, max_pending: int = 5000):
+        self.insert_fn = insert_fn  # e.g. telemetry_utils.insert_flight_documents
+        self.on_flush = on_flush  # receives the ack dict after every flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.last_persisted_timestamp = None
+        self.persisted = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def put(self, document: Dict) -> None:
+        """Queues a document, waiting while the buffer is full (backpressure)."""
+        await self.queue.put(document)
+
+    async def close(self) -> None:
+        """Flushes whatever is buffered and stops the flusher."""
+        if self._task is None:
+            return
+        await self.queue.put(_CLOSE)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            document = await self.queue.get()
+            if document is _CLOSE:
+                break
+
+            batch = [document]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    document = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if document is _CLOSE:
+                    closing = True
+                    break
+                batch.append(document)
+
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                # The flusher must outlive any one batch: if it died, put() would block
+                # forever once the queue filled and close() would never return
+                print(f"❌ Telemetry flush failed, {len(batch)} samples dropped: {e}")
+
+    async def _flush(self, batch: List[Dict]) -> None:
+        try:
+            inserted, errors = await self.insert_fn(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            error = f"Database error: {e}" if isinstance(e, PyMongoError) else f"Write failed: {e}"
+            print(f"❌ Telemetry batch of {len(batch)} not persisted: {e}")
+            await self._ack({"type": "error", "error": error, "dropped": len(batch)})
+            return
+
+        failed_positions = {position for position, _ in errors}
+        persisted_timestamps = [
+            to_naive_utc(doc["timestamp"]) for position, doc in enumerate(batch) if position not in failed_positions
+        ]
+        if persisted_timestamps:
+            newest = max(persisted_timestamps)
+            if self.last_persisted_timestamp is None or newest > self.last_persisted_timestamp:
+                self.last_persisted_timestamp = newest
+
+        self.persisted += inserted
+        self.failed += len(errors)
+        await self._ack({
+            "type": "ack",
+            "persisted": inserted,
+            "failed": len(errors),
+            "total_persisted": self.persisted,
+            "last_persisted_timestamp": self.last_persisted_timestamp.isoformat() if self.last_persisted_timestamp else None,
+            "pending": self.queue.qsize()
+        })
+
+    async def _ack(self, message: Dict) -> None:
+        try:
+            await self.on_flush(message)
+        except Exception as e:
+            # The client may already be gone; the data is persisted either way
+            print(f"⚠️ Could not send telemetry ack: {e}")